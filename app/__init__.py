@@ -9,9 +9,9 @@ from .extensions import db, migrate, login_manager, csrf, limiter
 
 logger = logging.getLogger(__name__)
 
-_last_reminder_check = 0
-_reminder_lock = threading.Lock()
-_REMINDER_THROTTLE_SECONDS = 300
+_last_outbox_drain = 0
+_outbox_drain_lock = threading.Lock()
+_OUTBOX_DRAIN_THROTTLE_SECONDS = 60
 
 _BLOCKED_PREFIXES = (
     "/wp-admin", "/wp-login", "/wp-content", "/wp-includes",
@@ -37,12 +37,14 @@ def _is_probe(path):
     return False
 
 
-def create_app(config_name=None):
+def create_app(config_name=None, overrides=None, start_scheduler=True):
     if config_name is None:
         config_name = os.environ.get("FLASK_ENV", "default")
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if overrides:
+        app.config.update(overrides)
     config[config_name].init_app(app)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
@@ -52,6 +54,9 @@ def create_app(config_name=None):
     csrf.init_app(app)
     limiter.init_app(app)
 
+    from .services.request_metrics import init_request_metrics
+    init_request_metrics(app)
+
     @app.before_request
     def block_probes():
         if _is_probe(request.path):
@@ -69,6 +74,8 @@ def create_app(config_name=None):
     # Register blueprints
     from .routes.public import public_bp
     from .routes.booking import booking_bp
+    from .routes.webhooks import webhooks_bp
+    from .routes.metrics import metrics_bp
     from .routes.admin.auth import admin_auth_bp
     from .routes.admin.dashboard import admin_dashboard_bp
     from .routes.admin.bookings import admin_bookings_bp
@@ -76,12 +83,16 @@ def create_app(config_name=None):
     from .routes.admin.availability import admin_availability_bp
     from .routes.admin.payments import admin_payments_bp
     from .routes.admin.coupons import admin_coupons_bp
+    from .routes.admin.campaigns import admin_campaigns_bp
+    from .routes.admin.reports import admin_reports_bp
     from .routes.admin.settings import admin_settings_bp
     from .routes.admin.messaging import admin_messaging_bp
     from .routes.admin.devtools import admin_devtools_bp
 
     app.register_blueprint(public_bp)
     app.register_blueprint(booking_bp, url_prefix="/book")
+    app.register_blueprint(webhooks_bp, url_prefix="/webhooks")
+    app.register_blueprint(metrics_bp)
     app.register_blueprint(admin_auth_bp, url_prefix="/admin")
     app.register_blueprint(admin_dashboard_bp, url_prefix="/admin")
     app.register_blueprint(admin_bookings_bp, url_prefix="/admin/bookings")
@@ -89,6 +100,8 @@ def create_app(config_name=None):
     app.register_blueprint(admin_availability_bp, url_prefix="/admin/availability")
     app.register_blueprint(admin_payments_bp, url_prefix="/admin/payments")
     app.register_blueprint(admin_coupons_bp, url_prefix="/admin/coupons")
+    app.register_blueprint(admin_campaigns_bp, url_prefix="/admin/campaigns")
+    app.register_blueprint(admin_reports_bp, url_prefix="/admin/reports")
     app.register_blueprint(admin_settings_bp, url_prefix="/admin/settings")
     app.register_blueprint(admin_messaging_bp, url_prefix="/admin/messaging")
     app.register_blueprint(admin_devtools_bp, url_prefix="/admin/devtools")
@@ -96,27 +109,34 @@ def create_app(config_name=None):
     # Import models so they're registered with SQLAlchemy
     from . import models  # noqa: F401
 
-    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    from .cli import register_commands
+    register_commands(app)
+
+    if start_scheduler and (not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
         from .tasks.scheduler import init_scheduler
         init_scheduler(app)
 
     @app.before_request
-    def _trigger_reminder_check():
-        if not request.path.startswith("/admin/"):
+    def _trigger_outbox_drain():
+        if not request.path.startswith("/admin/") or not app.config.get("OUTBOX_EMBEDDED_WORKER", True):
+            return
+        # Like the outbox_drain job, only the scheduler leader drains
+        from .tasks.leader import is_leader
+        if not is_leader():
             return
-        global _last_reminder_check
+        global _last_outbox_drain
         now = _time.time()
-        if now - _last_reminder_check < _REMINDER_THROTTLE_SECONDS:
+        if now - _last_outbox_drain < _OUTBOX_DRAIN_THROTTLE_SECONDS:
             return
-        if not _reminder_lock.acquire(blocking=False):
+        if not _outbox_drain_lock.acquire(blocking=False):
             return
         try:
-            _last_reminder_check = now
-            from .tasks.send_reminders import check_and_send_reminders
-            t = threading.Thread(target=check_and_send_reminders, args=(app,), daemon=True)
+            _last_outbox_drain = now
+            from .tasks.outbox_worker import drain_outbox
+            t = threading.Thread(target=drain_outbox, args=(app,), daemon=True)
             t.start()
-            logger.info("Triggered background reminder check from admin request")
+            logger.info("Triggered background outbox drain from admin request")
         finally:
-            _reminder_lock.release()
+            _outbox_drain_lock.release()
 
     return app
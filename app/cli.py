@@ -0,0 +1,151 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+outbox_cli = AppGroup("outbox", help="Outbound message queue.")
+
+
+@outbox_cli.command("work")
+@click.option("--once", is_flag=True, help="Drain what is due now and exit.")
+@click.option("--batch-size", type=int, default=None, help="Messages claimed per batch.")
+def outbox_work(once, batch_size):
+    """Run the outbox worker that sends queued reminders and messages."""
+    from app.tasks.outbox_worker import drain_outbox, run_worker
+
+    app = current_app._get_current_object()
+    if batch_size:
+        app.config["OUTBOX_BATCH_SIZE"] = batch_size
+    if once:
+        drain_outbox(app)
+    else:
+        run_worker(app)
+
+
+reminders_cli = AppGroup("reminders", help="Reminder pipeline tools.")
+
+
+@reminders_cli.command("bench")
+@click.option("--bookings", type=int, default=200, show_default=True, help="Due reminders to seed.")
+@click.option("--sms-latency-ms", type=float, default=50, show_default=True)
+@click.option("--email-latency-ms", type=float, default=50, show_default=True)
+@click.option("--failure-rate", type=float, default=0.0, show_default=True,
+              help="Share of provider calls that fail (0-1).")
+@click.option("--phone-share", type=float, default=0.5, show_default=True,
+              help="Share of clients who prefer SMS.")
+@click.option("--database-url", default=None,
+              help="Scratch database to seed (default: a temporary SQLite file). Its tables are dropped afterwards.")
+def reminders_bench(bookings, sms_latency_ms, email_latency_ms, failure_rate, phone_share, database_url):
+    """Run the reminder pipeline against local fake providers and report timings."""
+    from app.tasks.reminder_bench import run_benchmark
+
+    try:
+        result = run_benchmark(
+            bookings=bookings,
+            sms_latency=sms_latency_ms / 1000,
+            email_latency=email_latency_ms / 1000,
+            failure_rate=failure_rate,
+            phone_share=phone_share,
+            database_url=database_url,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    def ms(value):
+        return "n/a" if value is None else f"{value * 1000:.0f} ms"
+
+    click.echo(f"Bookings:        {result['bookings']}")
+    click.echo(f"Reminders:       {result['sent']} sent, {result['retrying']} awaiting retry, {result['failed']} failed")
+    click.echo(f"Retries:         {result['bookings_with_failure']} booking(s) had a failed attempt, "
+               f"{result['sent_after_failure']} of them delivered on the other channel")
+    click.echo(f"Elapsed:         {result['elapsed']:.2f} s")
+    click.echo(f"Throughput:      {result['throughput']:.1f} reminders/s")
+    click.echo(f"Delivery p50/95/99: {ms(result['latency_p50'])} / {ms(result['latency_p95'])} / {ms(result['latency_p99'])}")
+    click.echo(f"DB queries:      {result['queries']} ({result['queries_per_booking']:.2f} per booking)")
+    click.echo(f"Provider:        {result['sms_accepted']} SMS, {result['email_accepted']} email accepted, "
+               f"{result['provider_rejections']} rejected")
+
+
+calendar_cli = AppGroup("calendar", help="iCalendar output.")
+
+
+@calendar_cli.command("bench")
+@click.option("--events", type=int, default=10000, show_default=True, help="Events in the synthetic export.")
+@click.option("--chunk-kb", type=int, default=64, show_default=True, help="Size of the streamed chunks.")
+def calendar_bench(events, chunk_kb):
+    """Stream a synthetic ICS export through the calendar writer and report timings."""
+    from app.tasks.calendar_bench import run_benchmark
+
+    result = run_benchmark(events=events, chunk_size=chunk_kb * 1024)
+    click.echo(f"Events:          {result['events']}")
+    click.echo(f"Output:          {result['bytes'] / 1e6:.2f} MB in {result['chunks']} chunks")
+    click.echo(f"Elapsed:         {result['elapsed'] * 1000:.0f} ms")
+    click.echo(f"Throughput:      {result['throughput']:.0f} events/s ({result['megabytes_per_second']:.1f} MB/s)")
+    click.echo(f"Peak memory:     {result['peak_memory'] / 1024:.0f} KiB")
+    click.echo(f"Folding alone:   {result['fold_lines']} long lines in {result['fold_elapsed'] * 1000:.0f} ms")
+
+
+archive_cli = AppGroup("archive", help="Booking archival.")
+
+
+@archive_cli.command("run")
+@click.option("--months", type=int, default=None,
+              help="Archive bookings older than this many months (default: the archive_after_months setting).")
+@click.option("--batch-size", type=int, default=None, help="Bookings moved per transaction.")
+def archive_run(months, batch_size):
+    """Move old bookings, payments and reminder logs into the archive tables."""
+    from app.services.archive_service import (
+        ARCHIVE_BATCH_SIZE,
+        MIN_ARCHIVE_MONTHS,
+        archive_bookings,
+        archive_cutoff,
+        get_archive_counts,
+        get_archive_months,
+    )
+
+    months = get_archive_months() if months is None else months
+    if months < MIN_ARCHIVE_MONTHS:
+        raise click.ClickException(f"Archival needs a horizon of at least {MIN_ARCHIVE_MONTHS} months (got {months}).")
+    cutoff = archive_cutoff(months)
+    moved = archive_bookings(cutoff, batch_size=batch_size or ARCHIVE_BATCH_SIZE)
+    counts = get_archive_counts()
+    click.echo(f"Archived {moved} bookings dated before {cutoff.isoformat()}.")
+    click.echo(f"Archive now holds {counts['bookings']} bookings, {counts['payments']} payments, "
+               f"{counts['reminder_logs']} reminder logs.")
+
+
+fakes_cli = AppGroup("fakes", help="Local stand-ins for the SMS and email providers.")
+
+
+@fakes_cli.command("serve")
+@click.option("--smtp-port", type=int, default=8025, show_default=True)
+@click.option("--sms-port", type=int, default=8026, show_default=True)
+@click.option("--latency-ms", type=float, default=0, show_default=True)
+@click.option("--failure-rate", type=float, default=0.0, show_default=True)
+def fakes_serve(smtp_port, sms_port, latency_ms, failure_rate):
+    """Run a fake SMTP sink and fake Send.to API until interrupted."""
+    import time
+    from app.services.fake_providers import FakeSMSServer, FakeSMTPServer
+
+    smtp = FakeSMTPServer(port=smtp_port, latency=latency_ms / 1000, failure_rate=failure_rate).start()
+    sms = FakeSMSServer(port=sms_port, latency=latency_ms / 1000, failure_rate=failure_rate).start()
+    click.echo("Point the app at the fakes with:")
+    for key, value in {**smtp.env(), **sms.env()}.items():
+        click.echo(f"  export {key}={value}")
+    try:
+        while True:
+            time.sleep(5)
+            click.echo(f"accepted: {len(smtp.accepted)} email, {len(sms.accepted)} SMS; "
+                       f"rejected: {smtp.rejected + sms.rejected}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        smtp.stop()
+        sms.stop()
+
+
+def register_commands(app):
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(reminders_cli)
+    app.cli.add_command(calendar_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(fakes_cli)
@@ -16,6 +16,39 @@ class Config:
     SESSION_COOKIE_SAMESITE = "Lax"
     PERMANENT_SESSION_LIFETIME = 3600
 
+    REMINDER_SMS_CONCURRENCY = int(os.environ.get("REMINDER_SMS_CONCURRENCY", 4))
+    REMINDER_EMAIL_CONCURRENCY = int(os.environ.get("REMINDER_EMAIL_CONCURRENCY", 4))
+    REMINDER_SWEEP_MINUTES = int(os.environ.get("REMINDER_SWEEP_MINUTES", 60))
+
+    # Only the process holding the scheduler lease runs scheduled jobs
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get("SCHEDULER_LEASE_SECONDS", 45))
+    SCHEDULER_HEARTBEAT_SECONDS = int(os.environ.get("SCHEDULER_HEARTBEAT_SECONDS", 15))
+
+    # Set OUTBOX_EMBEDDED_WORKER=false when running `flask outbox work` separately
+    OUTBOX_EMBEDDED_WORKER = os.environ.get("OUTBOX_EMBEDDED_WORKER", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 5))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get("OUTBOX_RETRY_BASE_SECONDS", 60))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", 600))
+    OUTBOX_POLL_SECONDS = int(os.environ.get("OUTBOX_POLL_SECONDS", 5))
+
+    # Marketing campaigns are queued in chunks and sent at most this fast per process
+    CAMPAIGN_CHUNK_SIZE = int(os.environ.get("CAMPAIGN_CHUNK_SIZE", 500))
+    CAMPAIGN_EMAIL_PER_SECOND = float(os.environ.get("CAMPAIGN_EMAIL_PER_SECOND", 5))
+    CAMPAIGN_SMS_PER_SECOND = float(os.environ.get("CAMPAIGN_SMS_PER_SECOND", 2))
+    # Campaign unsubscribe links are built on this, since no request is there to take the host from
+    PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "https://hoponomassage.com")
+
+    # Provider delivery receipts are queued by the webhooks and folded in by a scheduled job
+    DELIVERY_EVENT_BATCH_SIZE = int(os.environ.get("DELIVERY_EVENT_BATCH_SIZE", 500))
+    DELIVERY_EVENT_RETENTION_DAYS = int(os.environ.get("DELIVERY_EVENT_RETENTION_DAYS", 30))
+
+    # Old bookings are moved to the archive tables by a nightly job, this many per transaction
+    ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 500))
+
+    # Share of requests whose latency and SQL use are recorded (0 turns request metrics off)
+    METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 1.0))
+
     @staticmethod
     def init_app(app):
         if not app.config.get("SECRET_KEY"):
@@ -33,6 +66,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     SESSION_COOKIE_SECURE = True
+    METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 0.1))
 
 
 class TestConfig(Config):
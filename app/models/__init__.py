@@ -8,6 +8,11 @@ from .payment import Payment
 from .note import ClientNote
 from .reminder_log import ReminderLog
 from .settings import Setting
+from .outbound_message import OutboundMessage
+from .scheduler_lease import SchedulerLease
+from .campaign import Campaign
+from .delivery_event import DeliveryEvent
+from .archive import ArchivedBooking, ArchivedPayment, ArchivedReminderLog
 
 __all__ = [
     "AdminUser",
@@ -20,4 +25,11 @@ __all__ = [
     "ClientNote",
     "ReminderLog",
     "Setting",
+    "OutboundMessage",
+    "SchedulerLease",
+    "Campaign",
+    "DeliveryEvent",
+    "ArchivedBooking",
+    "ArchivedPayment",
+    "ArchivedReminderLog",
 ]
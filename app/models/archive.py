@@ -0,0 +1,69 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class ArchivedBooking(db.Model):
+    """A booking moved out of `bookings` by the archival job. Same columns and id."""
+
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        db.Index("ix_bookings_archive_client_id_date", "client_id", "date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    confirmation_token = db.Column(db.String(36), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=False)
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id"), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    buffer_before = db.Column(db.Time, nullable=False)
+    buffer_after = db.Column(db.Time, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    coupon_id = db.Column(db.Integer, db.ForeignKey("coupons.id"), nullable=True)
+    discount_amount = db.Column(db.Numeric(6, 2), nullable=True)
+    source = db.Column(db.String(20))
+    admin_notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    client = db.relationship("Client")
+    service = db.relationship("Service")
+    payment = db.relationship("ArchivedPayment", backref="booking", uselist=False)
+    reminder_logs = db.relationship("ArchivedReminderLog", backref="booking", lazy="dynamic")
+
+
+class ArchivedPayment(db.Model):
+    __tablename__ = "payments_archive"
+    __table_args__ = (
+        db.Index("ix_payments_archive_client_id", "client_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings_archive.id"), unique=True, nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=False)
+    amount_eur = db.Column(db.Numeric(6, 2), nullable=False)
+    method = db.Column(db.String(20), nullable=False)
+    notes = db.Column(db.Text)
+    paid_at = db.Column(db.DateTime)
+    recorded_by = db.Column(db.Integer, db.ForeignKey("admin_users.id"))
+
+
+class ArchivedReminderLog(db.Model):
+    __tablename__ = "reminder_log_archive"
+    __table_args__ = (
+        db.Index("ix_reminder_log_archive_booking_id", "booking_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings_archive.id"), nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    sent_at = db.Column(db.DateTime)
+    error_message = db.Column(db.Text)
+    attempt_count = db.Column(db.Integer, nullable=False, default=1)
+    next_attempt_at = db.Column(db.DateTime)
+    provider_message_id = db.Column(db.String(255))
+    delivery_status = db.Column(db.String(20))
+    delivery_updated_at = db.Column(db.DateTime)
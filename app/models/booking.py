@@ -5,7 +5,11 @@ from app.extensions import db
 
 class Booking(db.Model):
     __tablename__ = "bookings"
-    __table_args__ = (db.Index("ix_bookings_date_status", "date", "status"),)
+    __table_args__ = (
+        db.Index("ix_bookings_date_status", "date", "status"),
+        db.Index("ix_bookings_client_id_date", "client_id", "date"),
+        db.Index("ix_bookings_status_date_start_time", "status", "date", "start_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     confirmation_token = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class Campaign(db.Model):
+    __tablename__ = "campaigns"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    channel = db.Column(db.String(10), nullable=False)  # 'email' or 'sms'
+    subject = db.Column(db.String(255))
+    body = db.Column(db.Text, nullable=False)  # sanitized HTML for email, plain text for SMS
+    # Segment: clients with marketing consent, optionally filtered further
+    last_visit_before = db.Column(db.Date)  # no completed visit on or after this date
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id"), nullable=True)  # has had this service
+    status = db.Column(db.String(20), nullable=False, default="draft")  # draft, running, paused, completed
+    # Fan-out cursor: recipients are queued in client id order, so a restart resumes after this id
+    last_client_id = db.Column(db.Integer, nullable=False, default=0)
+    fanout_done = db.Column(db.Boolean, nullable=False, default=False)
+    queued_count = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey("admin_users.id"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    service = db.relationship("Service")
+    messages = db.relationship("OutboundMessage", backref="campaign", lazy="dynamic")
@@ -4,16 +4,24 @@ from app.extensions import db
 
 class Client(db.Model):
     __tablename__ = "clients"
+    __table_args__ = (
+        db.Index("ix_clients_name_id", "name", "id"),
+        db.Index("ix_clients_phone_normalized", "phone_normalized"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=False)
     phone = db.Column(db.String(30), nullable=False)
+    phone_normalized = db.Column(db.String(30))
     reminder_preference = db.Column(db.String(10), nullable=False, default="email")
     gdpr_consent = db.Column(db.Boolean, nullable=False, default=False)
     gdpr_consented_at = db.Column(db.DateTime)
     marketing_consent = db.Column(db.Boolean, nullable=False, default=False)
     marketing_consented_at = db.Column(db.DateTime)
+    anonymized_at = db.Column(db.DateTime)
+    email_bounced_at = db.Column(db.DateTime)  # hard bounce reported by the email provider
+    phone_undeliverable_at = db.Column(db.DateTime)  # SMS rejected/undeliverable per delivery report
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
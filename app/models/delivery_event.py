@@ -0,0 +1,18 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class DeliveryEvent(db.Model):
+    __tablename__ = "delivery_events"
+    __table_args__ = (
+        db.Index("ix_delivery_events_processed_at_id", "processed_at", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(10), nullable=False)  # 'sms' or 'email'
+    event = db.Column(db.String(30), nullable=False)  # provider status, e.g. DELIVERED, hard_bounce
+    provider_message_id = db.Column(db.String(255))
+    recipient = db.Column(db.String(255))
+    payload = db.Column(db.Text)  # raw JSON as received
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class OutboundMessage(db.Model):
+    __tablename__ = "outbound_messages"
+    __table_args__ = (
+        db.Index("ix_outbound_messages_status_next_attempt", "status", "next_attempt_at"),
+        db.Index("ix_outbound_messages_booking_id_kind", "booking_id", "kind"),
+        db.Index("ix_outbound_messages_campaign_id_status", "campaign_id", "status"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'reminder', 'confirmation', 'cancellation' or 'message'
+    channel = db.Column(db.String(10))  # 'sms' or 'email'; reminders pick per client preference
+    recipient = db.Column(db.String(255))
+    subject = db.Column(db.String(255))
+    body = db.Column(db.Text)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id"), nullable=True)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id"), nullable=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey("campaigns.id"), nullable=True)
+    dedupe_key = db.Column(db.String(100), unique=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sending, sent, failed, skipped
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(64))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
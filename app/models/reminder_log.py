@@ -6,6 +6,8 @@ class ReminderLog(db.Model):
     __tablename__ = "reminder_log"
     __table_args__ = (
         db.UniqueConstraint("booking_id", "status", name="uq_reminder_booking_sent"),
+        db.Index("ix_reminder_log_provider_message_id", "provider_message_id"),
+        db.Index("ix_reminder_log_status_sent_at", "status", "sent_at"),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -14,3 +16,8 @@ class ReminderLog(db.Model):
     status = db.Column(db.String(20), nullable=False)  # 'sent', 'failed', 'pending'
     sent_at = db.Column(db.DateTime)
     error_message = db.Column(db.Text)
+    attempt_count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    next_attempt_at = db.Column(db.DateTime)  # UTC; set while a failed reminder is waiting to be retried
+    provider_message_id = db.Column(db.String(255))  # Send.to message_id or the email Message-ID
+    delivery_status = db.Column(db.String(20))  # from delivery receipts: delivered, bounced, undelivered, ...
+    delivery_updated_at = db.Column(db.DateTime)
@@ -0,0 +1,12 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class SchedulerLease(db.Model):
+    __tablename__ = "scheduler_leases"
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    renewed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -1,11 +1,14 @@
 from datetime import date, datetime, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, jsonify, stream_with_context
 from flask_login import login_required
+from sqlalchemy.orm import contains_eager
 from app.extensions import db
 from app.models.booking import Booking
 from app.models.service import Service
 from app.models.client import Client
-from app.services.booking_service import create_booking
+from app.services.booking_service import close_day, create_booking, get_closure_report
+from app.services.ical import STUDIO_LOCATION, stream_calendar
+from app.services.outbox_service import cancel_reminder, enqueue_booking_notice, reminder_due_at, schedule_reminder
 from app.services.slot_engine import get_available_slots
 
 admin_bookings_bp = Blueprint("admin_bookings", __name__)
@@ -44,98 +47,110 @@ def list_bookings():
     return render_template("admin/bookings.html", bookings=bookings)
 
 
-@admin_bookings_bp.route("/export.ics")
+def _parse_day(value):
+    try:
+        return datetime.strptime(value or "", "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+@admin_bookings_bp.route("/close-day")
 @login_required
-def export_ics():
-    bookings = _filtered_bookings_query().all()
+def close_day_form():
+    day = _parse_day(request.args.get("date"))
+    past = bool(day and day < date.today())
+    affected = []
+    report = []
+    if day:
+        if not past:
+            affected = (
+                Booking.query.filter(Booking.date == day, Booking.status == "confirmed")
+                .order_by(Booking.start_time)
+                .all()
+            )
+        report = get_closure_report(day)
+    return render_template("admin/close_day.html", day=day, past=past, affected=affected, report=report)
 
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//HoPono Massage//Booking Export//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-        "X-WR-TIMEZONE:Europe/Nicosia",
-        "BEGIN:VTIMEZONE",
-        "TZID:Europe/Nicosia",
-        "BEGIN:STANDARD",
-        "DTSTART:19701025T040000",
-        "RRULE:FREQ=YEARLY;BYDAY=-1SU;BYMONTH=10",
-        "TZOFFSETFROM:+0300",
-        "TZOFFSETTO:+0200",
-        "TZNAME:EET",
-        "END:STANDARD",
-        "BEGIN:DAYLIGHT",
-        "DTSTART:19700329T030000",
-        "RRULE:FREQ=YEARLY;BYDAY=-1SU;BYMONTH=3",
-        "TZOFFSETFROM:+0200",
-        "TZOFFSETTO:+0300",
-        "TZNAME:EEST",
-        "END:DAYLIGHT",
-        "END:VTIMEZONE",
-    ]
 
-    for b in bookings:
-        client = b.client
-        service = b.service
-        dt_start = f"{b.date.strftime('%Y%m%d')}T{b.start_time.strftime('%H%M%S')}"
-        dt_end = f"{b.date.strftime('%Y%m%d')}T{b.end_time.strftime('%H%M%S')}"
-        summary = _ics_escape(f"HoPono: {service.name} - {client.name}")
-        description = _ics_escape(
-            f"Client: {client.name}\\n"
-            f"Phone: {client.phone or 'N/A'}\\n"
-            f"Email: {client.email or 'N/A'}\\n"
-            f"Service: {service.name} ({service.duration_minutes}min)\\n"
-            f"Price: €{service.price_eur:.2f}\\n"
-            f"Status: {b.status.capitalize()}"
+@admin_bookings_bp.route("/close-day", methods=["POST"])
+@login_required
+def close_day_submit():
+    day = _parse_day(request.form.get("date"))
+    if not day:
+        flash("Choose a valid date.", "error")
+        return redirect(url_for("admin_bookings.close_day_form"))
+
+    try:
+        result = close_day(
+            day,
+            rebook_url=url_for("booking.select_service", _external=True),
+            reason=request.form.get("reason", "").strip() or None,
+            notify=bool(request.form.get("notify")),
         )
-        uid = f"hopono-booking-{b.id}@hopono.com"
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin_bookings.close_day_form", date=day.isoformat()))
+    flash(
+        f"Closed {day.strftime('%d %b %Y')}: {result['cancelled']} booking(s) cancelled, "
+        f"{result['notified']} client(s) being notified"
+        + (f", {result['unreachable']} with no reachable contact" if result["unreachable"] else "")
+        + ".",
+        "success",
+    )
+    return redirect(url_for("admin_bookings.close_day_form", date=day.isoformat()))
 
-        dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
 
-        lines.extend([
-            "BEGIN:VEVENT",
-            f"UID:{uid}",
-            f"DTSTAMP:{dtstamp}",
-            f"DTSTART;TZID=Europe/Nicosia:{dt_start}",
-            f"DTEND;TZID=Europe/Nicosia:{dt_end}",
-            _ics_fold(f"SUMMARY:{summary}"),
-            _ics_fold(f"DESCRIPTION:{description}"),
-            _ics_fold(f"LOCATION:HoPono Massage Studio\\, Nicosia\\, Cyprus"),
-            "STATUS:CONFIRMED",
-            "END:VEVENT",
-        ])
+@admin_bookings_bp.route("/close-day/status")
+@login_required
+def close_day_status():
+    day = _parse_day(request.args.get("date"))
+    if not day:
+        return jsonify({"error": "date is required"}), 400
+    return jsonify({"date": day.isoformat(), "clients": get_closure_report(day)})
+
+
+EXPORT_CHUNK_ROWS = 500
 
-    lines.append("END:VCALENDAR")
 
-    ics_content = "\r\n".join(lines) + "\r\n"
+@admin_bookings_bp.route("/export.ics")
+@login_required
+def export_ics():
+    bookings = (
+        _filtered_bookings_query()
+        .options(contains_eager(Booking.client), contains_eager(Booking.service))
+        .yield_per(EXPORT_CHUNK_ROWS)
+    )
+    dtstamp = datetime.utcnow()
+
+    def events():
+        for b in bookings:
+            client = b.client
+            service = b.service
+            yield {
+                "uid": f"hopono-booking-{b.id}@hopono.com",
+                "start": datetime.combine(b.date, b.start_time),
+                "end": datetime.combine(b.date, b.end_time),
+                "summary": f"HoPono: {service.name} - {client.name}",
+                "dtstamp": dtstamp,
+                "description": (
+                    f"Client: {client.name}\n"
+                    f"Phone: {client.phone or 'N/A'}\n"
+                    f"Email: {client.email or 'N/A'}\n"
+                    f"Service: {service.name} ({service.duration_minutes}min)\n"
+                    f"Price: €{service.price_eur:.2f}\n"
+                    f"Status: {b.status.capitalize()}"
+                ),
+                "location": STUDIO_LOCATION,
+                "status": "CANCELLED" if b.status == "cancelled" else "CONFIRMED",
+            }
 
     return Response(
-        ics_content,
+        stream_with_context(stream_calendar(events(), prodid="-//HoPono Massage//Booking Export//EN")),
         mimetype="text/calendar",
         headers={"Content-Disposition": "attachment; filename=hopono_bookings.ics"},
     )
 
 
-def _ics_escape(text):
-    text = text.replace("\\", "\\\\")
-    text = text.replace(",", "\\,")
-    text = text.replace(";", "\\;")
-    return text
-
-
-def _ics_fold(line):
-    result = []
-    while len(line.encode("utf-8")) > 75:
-        cut = 75
-        while len(line[:cut].encode("utf-8")) > 75:
-            cut -= 1
-        result.append(line[:cut])
-        line = " " + line[cut:]
-    result.append(line)
-    return "\r\n".join(result)
-
-
 @admin_bookings_bp.route("/calendar-data")
 @login_required
 def calendar_data():
@@ -218,8 +233,20 @@ def update_status(booking_id):
     booking = Booking.query.get_or_404(booking_id)
     new_status = request.form.get("status")
     if new_status in ("confirmed", "cancelled", "completed", "no_show"):
+        old_status = booking.status
         booking.status = new_status
         booking.updated_at = datetime.utcnow()
+        # Moving a completed or no-show booking back is a record correction, not
+        # news for the client: only an upcoming booking that is cancelled, or
+        # confirmed again after a cancellation, gets a notice.
+        upcoming = reminder_due_at(booking.date, booking.start_time, 0) > datetime.utcnow()
+        if new_status != "confirmed":
+            cancel_reminder(booking.id)
+        if upcoming and (old_status, new_status) == ("cancelled", "confirmed"):
+            schedule_reminder(booking)
+            enqueue_booking_notice(booking, "confirmation")
+        elif upcoming and (old_status, new_status) == ("confirmed", "cancelled"):
+            enqueue_booking_notice(booking, "cancellation")
         db.session.commit()
         flash(f"Booking marked as {new_status}.", "success")
     return redirect(url_for("admin_bookings.booking_detail", booking_id=booking.id))
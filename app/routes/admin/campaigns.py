@@ -0,0 +1,86 @@
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
+from app.models.campaign import Campaign
+from app.models.service import Service
+from app.services.campaign_service import (
+    count_segment,
+    create_campaign,
+    get_campaign_progress,
+    pause_campaign,
+    start_campaign,
+)
+
+admin_campaigns_bp = Blueprint("admin_campaigns", __name__)
+
+
+@admin_campaigns_bp.route("/")
+@login_required
+def list_campaigns():
+    campaigns = Campaign.query.order_by(Campaign.created_at.desc()).all()
+    services = Service.query.order_by(Service.name).all()
+    return render_template("admin/campaigns.html", campaigns=campaigns, services=services)
+
+
+@admin_campaigns_bp.route("/new", methods=["POST"])
+@login_required
+def new_campaign():
+    last_visit_before = request.form.get("last_visit_before") or None
+    try:
+        campaign = create_campaign(
+            name=request.form.get("name"),
+            channel=request.form.get("channel"),
+            subject=request.form.get("subject"),
+            body=request.form.get("body"),
+            last_visit_before=datetime.strptime(last_visit_before, "%Y-%m-%d").date() if last_visit_before else None,
+            service_id=request.form.get("service_id", type=int) or None,
+            created_by=current_user.id,
+        )
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin_campaigns.list_campaigns"))
+
+    flash("Campaign saved as draft.", "success")
+    return redirect(url_for("admin_campaigns.campaign_detail", campaign_id=campaign.id))
+
+
+@admin_campaigns_bp.route("/<int:campaign_id>")
+@login_required
+def campaign_detail(campaign_id):
+    campaign = Campaign.query.get_or_404(campaign_id)
+    audience = count_segment(campaign) if campaign.status == "draft" else None
+    return render_template(
+        "admin/campaign_detail.html",
+        campaign=campaign,
+        audience=audience,
+        progress=get_campaign_progress(campaign),
+    )
+
+
+@admin_campaigns_bp.route("/<int:campaign_id>/start", methods=["POST"])
+@login_required
+def start(campaign_id):
+    try:
+        start_campaign(campaign_id)
+        flash("Campaign started. Messages are queued in the background.", "success")
+    except ValueError as e:
+        flash(str(e), "error")
+    return redirect(url_for("admin_campaigns.campaign_detail", campaign_id=campaign_id))
+
+
+@admin_campaigns_bp.route("/<int:campaign_id>/pause", methods=["POST"])
+@login_required
+def pause(campaign_id):
+    try:
+        pause_campaign(campaign_id)
+        flash("Campaign paused.", "success")
+    except ValueError as e:
+        flash(str(e), "error")
+    return redirect(url_for("admin_campaigns.campaign_detail", campaign_id=campaign_id))
+
+
+@admin_campaigns_bp.route("/<int:campaign_id>/progress")
+@login_required
+def progress(campaign_id):
+    campaign = Campaign.query.get_or_404(campaign_id)
+    return jsonify({"status": campaign.status, **get_campaign_progress(campaign)})
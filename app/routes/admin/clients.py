@@ -1,68 +1,219 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
 from app.extensions import db
+from app.models.archive import ArchivedBooking, ArchivedPayment
 from app.models.client import Client
 from app.models.note import ClientNote
-from app.models.booking import Booking
-from app.models.payment import Payment
+from app.models.outbound_message import OutboundMessage
+from app.services.client_service import (
+    get_client_stats,
+    get_booking_history,
+    get_payment_history,
+    get_note_history,
+    list_clients_page,
+    find_duplicate_groups,
+    merge_clients,
+)
+from app.services.gdpr_service import stream_export_json, stream_export_zip, anonymize_client
+from app.services.outbox_service import enqueue_client_message, message_status
+from app.tasks.outbox_worker import wake_outbox
 
 admin_clients_bp = Blueprint("admin_clients", __name__)
 
 
+def _cursor_from_args():
+    after_name = request.args.get("after_name")
+    after_id = request.args.get("after_id", type=int)
+    if after_name is None or after_id is None:
+        return None
+    return after_name, after_id
+
+
 @admin_clients_bp.route("/")
 @login_required
 def list_clients():
     search = request.args.get("search", "").strip()
-    query = Client.query
-
-    if search:
-        query = query.filter(
-            db.or_(
-                Client.name.ilike(f"%{search}%"),
-                Client.email.ilike(f"%{search}%"),
-                Client.phone.ilike(f"%{search}%"),
-            )
-        )
+    rows, next_cursor = list_clients_page(search=search, after=_cursor_from_args())
+    return render_template("admin/clients.html", rows=rows, next_cursor=next_cursor)
+
+
+@admin_clients_bp.route("/api/list")
+@login_required
+def api_list():
+    search = request.args.get("search", "").strip()
+    rows, next_cursor = list_clients_page(search=search, after=_cursor_from_args())
+
+    items = []
+    for row in rows:
+        client = row["client"]
+        items.append({
+            "id": client.id,
+            "url": url_for("admin_clients.client_detail", client_id=client.id),
+            "name": client.name,
+            "email": client.email,
+            "phone": client.phone,
+            "reminder_preference": client.reminder_preference,
+            "booking_count": row["booking_count"],
+            "visit_count": row["visit_count"],
+            "last_visit": row["last_visit"].strftime("%d %b %Y") if row["last_visit"] else None,
+        })
+
+    return jsonify({
+        "items": items,
+        "next_cursor": {"after_name": next_cursor[0], "after_id": next_cursor[1]} if next_cursor else None,
+    })
+
+
+@admin_clients_bp.route("/duplicates")
+@login_required
+def duplicates():
+    groups = find_duplicate_groups()
+    return render_template("admin/client_duplicates.html", groups=groups)
+
+
+@admin_clients_bp.route("/merge", methods=["POST"])
+@login_required
+def merge():
+    target_id = request.form.get("target_id", type=int)
+    source_ids = request.form.getlist("source_ids", type=int)
+
+    if not target_id:
+        flash("Choose the client record to keep.", "error")
+        return redirect(url_for("admin_clients.duplicates"))
 
-    clients = query.order_by(Client.name).all()
-    return render_template("admin/clients.html", clients=clients)
+    try:
+        count = merge_clients(target_id, source_ids, merged_by=current_user.id)
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("admin_clients.duplicates"))
+
+    flash(f"Merged {count} duplicate record{'s' if count != 1 else ''}.", "success")
+    return redirect(url_for("admin_clients.client_detail", client_id=target_id))
 
 
 @admin_clients_bp.route("/<int:client_id>")
 @login_required
 def client_detail(client_id):
     client = Client.query.get_or_404(client_id)
-    bookings = (
-        Booking.query.filter_by(client_id=client_id)
-        .order_by(Booking.date.desc(), Booking.start_time.desc())
-        .all()
-    )
-    notes = (
-        ClientNote.query.filter_by(client_id=client_id)
-        .order_by(ClientNote.created_at.desc())
-        .all()
-    )
-    payments = (
-        Payment.query.filter_by(client_id=client_id)
-        .order_by(Payment.paid_at.desc())
+    stats = get_client_stats(client_id)
+    recent_messages = (
+        OutboundMessage.query.filter(
+            OutboundMessage.client_id == client_id,
+            OutboundMessage.kind == "message",
+            OutboundMessage.campaign_id.is_(None),
+        )
+        .order_by(OutboundMessage.id.desc())
+        .limit(10)
         .all()
     )
 
-    total_paid = sum(p.amount_eur for p in payments)
-    visit_count = len([b for b in bookings if b.status == "completed"])
-
     return render_template(
         "admin/client_detail.html",
         client=client,
-        bookings=bookings,
-        notes=notes,
-        payments=payments,
-        total_paid=total_paid,
-        visit_count=visit_count,
+        stats=stats,
+        recent_messages=[message_status(m) for m in recent_messages],
+    )
+
+
+@admin_clients_bp.route("/<int:client_id>/history/bookings")
+@login_required
+def history_bookings(client_id):
+    Client.query.get_or_404(client_id)
+    page = request.args.get("page", 1, type=int)
+    bookings, has_more = get_booking_history(client_id, page)
+
+    items = []
+    for b in bookings:
+        archived = isinstance(b, ArchivedBooking)
+        items.append({
+            "id": b.id,
+            "url": None if archived else url_for("admin_bookings.booking_detail", booking_id=b.id),
+            "archived": archived,
+            "service": b.service.name,
+            "date": b.date.strftime("%d %b %Y"),
+            "start": b.start_time.strftime("%H:%M"),
+            "status": b.status,
+            "payment": {
+                "amount": float(b.payment.amount_eur),
+                "method": b.payment.method,
+            } if b.payment else None,
+        })
+
+    return jsonify({"items": items, "page": page, "has_more": has_more})
+
+
+@admin_clients_bp.route("/<int:client_id>/history/payments")
+@login_required
+def history_payments(client_id):
+    Client.query.get_or_404(client_id)
+    page = request.args.get("page", 1, type=int)
+    payments, has_more = get_payment_history(client_id, page)
+
+    items = []
+    for p in payments:
+        archived = isinstance(p, ArchivedPayment)
+        items.append({
+            "id": p.id,
+            "booking_url": None if archived else url_for("admin_bookings.booking_detail", booking_id=p.booking_id),
+            "archived": archived,
+            "service": p.booking.service.name,
+            "amount": float(p.amount_eur),
+            "method": p.method,
+            "notes": p.notes or "",
+            "paid_at": p.paid_at.strftime("%d %b %Y, %H:%M") if p.paid_at else None,
+        })
+
+    return jsonify({"items": items, "page": page, "has_more": has_more})
+
+
+@admin_clients_bp.route("/<int:client_id>/history/notes")
+@login_required
+def history_notes(client_id):
+    Client.query.get_or_404(client_id)
+    page = request.args.get("page", 1, type=int)
+    notes, has_more = get_note_history(client_id, page)
+
+    items = []
+    for n in notes:
+        items.append({
+            "id": n.id,
+            "content": n.content,
+            "created_at": n.created_at.strftime("%d %b %Y, %H:%M") if n.created_at else None,
+        })
+
+    return jsonify({"items": items, "page": page, "has_more": has_more})
+
+
+@admin_clients_bp.route("/<int:client_id>/export")
+@login_required
+def export_data(client_id):
+    client = Client.query.get_or_404(client_id)
+    if request.args.get("format") == "zip":
+        return Response(
+            stream_with_context(stream_export_zip(client)),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f"attachment; filename=hopono-client-{client.id}.zip"},
+        )
+    return Response(
+        stream_with_context(stream_export_json(client)),
+        mimetype="application/json",
+        headers={"Content-Disposition": f"attachment; filename=hopono-client-{client.id}.json"},
     )
 
 
+@admin_clients_bp.route("/<int:client_id>/erase", methods=["POST"])
+@login_required
+def erase(client_id):
+    Client.query.get_or_404(client_id)
+    try:
+        anonymize_client(client_id)
+        flash("Client personal data erased.", "success")
+    except ValueError as e:
+        flash(str(e), "error")
+    return redirect(url_for("admin_clients.client_detail", client_id=client_id))
+
+
 @admin_clients_bp.route("/<int:client_id>/notes", methods=["POST"])
 @login_required
 def add_note(client_id):
@@ -82,3 +233,28 @@ def add_note(client_id):
         flash("Note added.", "success")
 
     return redirect(url_for("admin_clients.client_detail", client_id=client_id))
+
+
+@admin_clients_bp.route("/<int:client_id>/messages", methods=["POST"])
+@login_required
+def send_message(client_id):
+    client = Client.query.get_or_404(client_id)
+    try:
+        msg = enqueue_client_message(
+            client,
+            request.form.get("channel", ""),
+            request.form.get("body", ""),
+            subject=request.form.get("subject"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    wake_outbox(current_app._get_current_object())
+    return jsonify(message_status(msg)), 202
+
+
+@admin_clients_bp.route("/<int:client_id>/messages/<int:message_id>")
+@login_required
+def client_message_status(client_id, message_id):
+    msg = OutboundMessage.query.filter_by(id=message_id, client_id=client_id, kind="message").first_or_404()
+    return jsonify(message_status(msg))
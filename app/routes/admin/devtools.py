@@ -1,5 +1,5 @@
 import os
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app
 from flask_login import login_required
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.extensions import limiter
@@ -43,4 +43,41 @@ def devtools_login():
 @admin_devtools_bp.route("/")
 @devtools_required
 def devtools_page():
-    return render_template("admin/devtools.html")
+    from app.services.circuit_breaker import get_breaker
+    from app.tasks.leader import get_leader_status
+    from app.tasks.scheduler import scheduler
+
+    jobs = [
+        {"id": job.id, "next_run_time": job.next_run_time}
+        for job in scheduler.get_jobs()
+    ] if scheduler.running else []
+    return render_template(
+        "admin/devtools.html",
+        leader=get_leader_status(),
+        scheduler_running=scheduler.running,
+        jobs=jobs,
+        breakers=[get_breaker(name).snapshot() for name in ("sms", "email")],
+    )
+
+
+@admin_devtools_bp.route("/metrics")
+@devtools_required
+def request_metrics_page():
+    from app.services.request_metrics import metrics
+
+    return render_template(
+        "admin/request_metrics.html",
+        snapshot=metrics.snapshot(),
+        sample_rate=current_app.config.get("METRICS_SAMPLE_RATE", 1.0),
+        prometheus_enabled=bool(os.environ.get("METRICS_TOKEN")),
+    )
+
+
+@admin_devtools_bp.route("/metrics/reset", methods=["POST"])
+@devtools_required
+def reset_request_metrics():
+    from app.services.request_metrics import metrics
+
+    metrics.reset()
+    flash("Request metrics reset for this process.", "success")
+    return redirect(url_for("admin_devtools.request_metrics_page"))
@@ -1,25 +1,42 @@
-import re
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from flask_login import login_required
+from flask import Blueprint, render_template, request, url_for, jsonify, abort, current_app
+from app.extensions import db
+from app.models.outbound_message import OutboundMessage
 from app.routes.admin.devtools import devtools_required
-from app.services.reminder_service import send_sms, send_email
+from app.services.message_templates import MESSAGE_KINDS, render_preview, sanitize_html
+from app.services.outbox_service import enqueue_message, message_status
+from app.tasks.outbox_worker import wake_outbox
 
 admin_messaging_bp = Blueprint("admin_messaging", __name__)
 
-_DANGEROUS_TAGS = re.compile(r"<\s*\/?\s*(script|iframe|object|embed|form|meta|link|base)\b[^>]*>", re.IGNORECASE)
-_EVENT_HANDLERS = re.compile(r"\bon\w+\s*=", re.IGNORECASE)
-
-
-def _sanitize_html(html):
-    html = _DANGEROUS_TAGS.sub("", html)
-    html = _EVENT_HANDLERS.sub("", html)
-    return html
-
 
 @admin_messaging_bp.route("/")
 @devtools_required
 def messaging_page():
-    return render_template("admin/messaging.html")
+    return render_template("admin/messaging.html", message_kinds=MESSAGE_KINDS)
+
+
+@admin_messaging_bp.route("/preview/<kind>")
+@devtools_required
+def preview_template(kind):
+    if kind not in MESSAGE_KINDS:
+        abort(404)
+    message = render_preview(kind)
+    return jsonify({
+        "subject": message.subject,
+        "html": message.html,
+        "text": message.text,
+        "sms": message.sms,
+        "sms_length": len(message.sms),
+    })
+
+
+def _queued(msg):
+    db.session.commit()
+    wake_outbox(current_app._get_current_object())
+    return jsonify({
+        **message_status(msg),
+        "status_url": url_for("admin_messaging.message_status_json", message_id=msg.id),
+    }), 202
 
 
 @admin_messaging_bp.route("/send-test-sms", methods=["POST"])
@@ -29,16 +46,9 @@ def send_test_sms():
     message = request.form.get("message", "").strip()
 
     if not phone or not message:
-        flash("Phone number and message are required.", "error")
-        return redirect(url_for("admin_messaging.messaging_page"))
-
-    success = send_sms(phone, message)
-    if success:
-        flash(f"Test SMS sent successfully to {phone}.", "success")
-    else:
-        flash(f"Failed to send SMS to {phone}. Check server logs for details.", "error")
+        return jsonify({"error": "Phone number and message are required."}), 400
 
-    return redirect(url_for("admin_messaging.messaging_page"))
+    return _queued(enqueue_message("sms", phone, message))
 
 
 @admin_messaging_bp.route("/send-test-email", methods=["POST"])
@@ -49,14 +59,13 @@ def send_test_email():
     html_content = request.form.get("html_content", "").strip()
 
     if not to_email or not subject or not html_content:
-        flash("Email address, subject, and message are all required.", "error")
-        return redirect(url_for("admin_messaging.messaging_page"))
+        return jsonify({"error": "Email address, subject, and message are all required."}), 400
 
-    html_content = _sanitize_html(html_content)
-    success = send_email(to_email, subject, html_content)
-    if success:
-        flash(f"Test email sent successfully to {to_email}.", "success")
-    else:
-        flash(f"Failed to send email to {to_email}. Check server logs for details.", "error")
+    return _queued(enqueue_message("email", to_email, sanitize_html(html_content), subject=subject))
 
-    return redirect(url_for("admin_messaging.messaging_page"))
+
+@admin_messaging_bp.route("/messages/<int:message_id>")
+@devtools_required
+def message_status_json(message_id):
+    msg = OutboundMessage.query.get_or_404(message_id)
+    return jsonify(message_status(msg))
@@ -1,38 +1,54 @@
-from datetime import date, datetime
+from datetime import date
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.extensions import db
 from app.models.booking import Booking
 from app.models.payment import Payment
+from app.services.payment_service import (
+    PAYMENT_METHODS,
+    get_reconciliation,
+    get_unpaid_bookings,
+    get_paid_bookings,
+    record_bulk_payments,
+)
 
 admin_payments_bp = Blueprint("admin_payments", __name__)
 
 
+def _date_range_from_args():
+    single = request.args.get("date")
+    today = date.today().isoformat()
+    date_from = request.args.get("date_from") or single or today
+    date_to = request.args.get("date_to") or single or date_from
+    try:
+        start = date.fromisoformat(date_from)
+        end = date.fromisoformat(date_to)
+    except ValueError:
+        start = end = date.today()
+    if end < start:
+        start, end = end, start
+    return start, end
+
+
 @admin_payments_bp.route("/")
 @login_required
 def list_payments():
-    view_date = request.args.get("date", date.today().isoformat())
-
-    # Bookings for that date that are completed but have no payment recorded
-    unpaid = (
-        Booking.query.filter_by(date=view_date, status="completed")
-        .outerjoin(Payment)
-        .filter(Payment.id.is_(None))
-        .all()
-    )
-
-    # Already paid bookings for that date
-    paid = (
-        Booking.query.filter_by(date=view_date)
-        .join(Payment)
-        .all()
-    )
+    date_from, date_to = _date_range_from_args()
+    try:
+        summary = get_reconciliation(date_from, date_to)
+    except ValueError as e:
+        flash(str(e), "error")
+        date_from = date_to = date.today()
+        summary = get_reconciliation(date_from, date_to)
 
     return render_template(
         "admin/payments.html",
-        unpaid=unpaid,
-        paid=paid,
-        view_date=view_date,
+        unpaid=get_unpaid_bookings(date_from, date_to),
+        paid=get_paid_bookings(date_from, date_to),
+        summary=summary,
+        methods=PAYMENT_METHODS,
+        date_from=date_from.isoformat(),
+        date_to=date_to.isoformat(),
     )
 
 
@@ -67,3 +83,20 @@ def record_payment():
     db.session.commit()
     flash("Payment recorded.", "success")
     return redirect(url_for("admin_payments.list_payments", date=booking.date.isoformat()))
+
+
+@admin_payments_bp.route("/record-bulk", methods=["POST"])
+@login_required
+def record_bulk():
+    booking_ids = request.form.getlist("booking_ids", type=int)
+    method = request.form.get("method")
+    date_from = request.form.get("date_from")
+    date_to = request.form.get("date_to")
+
+    try:
+        count = record_bulk_payments(booking_ids, method, recorded_by=current_user.id)
+        flash(f"Recorded {count} payment{'s' if count != 1 else ''}.", "success")
+    except ValueError as e:
+        flash(str(e), "error")
+
+    return redirect(url_for("admin_payments.list_payments", date_from=date_from, date_to=date_to))
@@ -0,0 +1,36 @@
+from datetime import datetime
+from flask import Blueprint, render_template, request, jsonify, flash
+from flask_login import login_required
+from app.services.report_service import get_reminder_report
+
+admin_reports_bp = Blueprint("admin_reports", __name__)
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+
+
+@admin_reports_bp.route("/reminders")
+@login_required
+def reminders():
+    try:
+        report = get_reminder_report(_date_arg("from"), _date_arg("to"))
+    except ValueError as e:
+        flash(str(e), "error")
+        report = get_reminder_report()
+    return render_template("admin/reminder_report.html", report=report)
+
+
+@admin_reports_bp.route("/api/reminders")
+@login_required
+def reminders_json():
+    try:
+        return jsonify(get_reminder_report(_date_arg("from"), _date_arg("to")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
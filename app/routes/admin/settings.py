@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
 from app.extensions import db
 from app.models.settings import Setting
+from app.services.outbox_service import reschedule_pending_reminders
 
 admin_settings_bp = Blueprint("admin_settings", __name__)
 
@@ -10,6 +11,9 @@ DEFAULT_SETTINGS = {
     "buffer_minutes": "30",
     "sms_enabled": "true",
     "email_enabled": "true",
+    "booking_notifications_enabled": "true",
+    "retention_years": "0",
+    "archive_after_months": "0",
 }
 
 
@@ -26,6 +30,9 @@ def view_settings():
 @admin_settings_bp.route("/", methods=["POST"])
 @login_required
 def update_settings():
+    old_hours = db.session.get(Setting, "reminder_hours_before")
+    old_hours = old_hours.value if old_hours else DEFAULT_SETTINGS["reminder_hours_before"]
+
     for key in DEFAULT_SETTINGS:
         value = request.form.get(key, "").strip()
         if value:
@@ -36,6 +43,10 @@ def update_settings():
                 setting = Setting(key=key, value=value)
                 db.session.add(setting)
 
+    new_hours = request.form.get("reminder_hours_before", "").strip()
+    if new_hours and new_hours != old_hours:
+        reschedule_pending_reminders(int(new_hours))
+
     db.session.commit()
     flash("Settings updated.", "success")
     return redirect(url_for("admin_settings.view_settings"))
@@ -1,6 +1,9 @@
+import hashlib
+import os
 import time
 import logging
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, Response
+from functools import lru_cache
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, Response, current_app, session
 from app.extensions import db, limiter
 from app.models.service import Service
 from app.models.booking import Booking
@@ -9,7 +12,7 @@ from app.models.coupon import Coupon
 from app.services.slot_engine import get_available_slots
 from app.services.booking_service import create_booking
 from app.services.coupon_service import validate_coupon
-from app.services.calendar_service import generate_ics, google_calendar_url, outlook_calendar_url
+from app.services.calendar_service import calendar_entry
 
 logger = logging.getLogger(__name__)
 
@@ -73,23 +76,78 @@ def confirm():
         return redirect(url_for("booking.select_service"))
 
 
+def _booking_for_token(token):
+    return (
+        Booking.query.options(db.joinedload(Booking.service), db.joinedload(Booking.client))
+        .filter_by(confirmation_token=token)
+        .first_or_404()
+    )
+
+
+def _revalidate(response, etag):
+    """Let browsers and calendar apps keep the response but check its ETag on every use."""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+_CONFIRMATION_TEMPLATES = ("base.html", "booking/confirmation.html")
+
+
+@lru_cache(maxsize=None)
+def _confirmation_template_files():
+    env = current_app.jinja_env
+    return tuple(env.loader.get_source(env, name)[1] for name in _CONFIRMATION_TEMPLATES)
+
+
+@lru_cache(maxsize=4)
+def _template_hash(files, mtimes):
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def _confirmation_template_version():
+    """
+    Hash of the confirmation page's templates. It is keyed on their mtimes, so
+    editing a template while the app runs changes the ETag: two stat() calls
+    per request instead of reading and hashing the files.
+    """
+    files = _confirmation_template_files()
+    return _template_hash(files, tuple(os.stat(path).st_mtime_ns for path in files))
+
+
 @booking_bp.route("/success/<token>")
 def success(token):
-    booking = Booking.query.filter_by(confirmation_token=token).first_or_404()
-    gcal_url = google_calendar_url(booking)
-    outlook_url = outlook_calendar_url(booking)
-    return render_template("booking/confirmation.html", booking=booking, gcal_url=gcal_url, outlook_url=outlook_url)
+    booking = _booking_for_token(token)
+    entry = calendar_entry(booking)
+    client = booking.client
+    etag = hashlib.sha256(
+        f"{entry.etag}|{booking.discount_amount}|{client.email}|{client.reminder_preference}|"
+        f"{_confirmation_template_version()}".encode("utf-8")
+    ).hexdigest()[:32]
+
+    # A pending flash message has to be rendered, so it never gets a 304
+    if "_flashes" not in session and request.if_none_match.contains(etag):
+        return _revalidate(Response(status=304), etag)
+    html = render_template(
+        "booking/confirmation.html", booking=booking, gcal_url=entry.google_url, outlook_url=entry.outlook_url
+    )
+    return _revalidate(Response(html), etag)
 
 
 @booking_bp.route("/calendar/<token>.ics")
 def download_ics(token):
-    booking = Booking.query.filter_by(confirmation_token=token).first_or_404()
-    ics_content = generate_ics(booking)
-    return Response(
-        ics_content,
+    entry = calendar_entry(_booking_for_token(token))
+    response = Response(
+        entry.ics,
         mimetype="text/calendar",
         headers={"Content-Disposition": f"attachment; filename=hopono-booking-{token}.ics"}
     )
+    return _revalidate(response, entry.etag).make_conditional(request)
 
 
 @booking_bp.route("/validate-coupon", methods=["POST"])
@@ -0,0 +1,24 @@
+import hmac
+import os
+from flask import Blueprint, Response, abort, current_app, request
+from app.extensions import limiter
+from app.services.request_metrics import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+@limiter.exempt
+def prometheus_metrics():
+    """Disabled unless METRICS_TOKEN is set; scrapers send it as a Bearer token or ?token=."""
+    expected = os.environ.get("METRICS_TOKEN")
+    if not expected:
+        abort(404)
+    auth = request.headers.get("Authorization", "")
+    given = auth[7:] if auth.startswith("Bearer ") else request.args.get("token", "")
+    if not hmac.compare_digest(given.encode(), expected.encode()):
+        abort(401)
+    return Response(
+        metrics.prometheus(current_app.config.get("METRICS_SAMPLE_RATE", 1.0)),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
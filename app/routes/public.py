@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template
-from app.extensions import db
+from flask import Blueprint, render_template, request
+from app.extensions import csrf, db
 from app.models.service import Service
+from app.services.campaign_service import unsubscribe
 
 public_bp = Blueprint("public", __name__)
 
@@ -30,3 +31,18 @@ def contact():
 @public_bp.route("/privacy")
 def privacy():
     return render_template("public/privacy.html")
+
+
+# The signed token is the authorization, and mail providers' one-click
+# unsubscribe (RFC 8058) POSTs without a CSRF token.
+@public_bp.route("/unsubscribe/<token>", methods=["GET", "POST"])
+@csrf.exempt
+def unsubscribe_page(token):
+    # GET only asks, so link scanners that prefetch URLs unsubscribe nobody
+    if request.method == "GET":
+        return render_template("public/unsubscribe.html", done=False)
+    try:
+        unsubscribe(token)
+    except ValueError as e:
+        return render_template("public/unsubscribe.html", done=False, error=str(e)), 400
+    return render_template("public/unsubscribe.html", done=True)
@@ -0,0 +1,49 @@
+import hmac
+import os
+from flask import Blueprint, request, abort
+from app.extensions import csrf, limiter
+from app.services.delivery_service import record_email_events, record_sms_reports
+
+webhooks_bp = Blueprint("webhooks", __name__)
+
+MAX_WEBHOOK_BYTES = 256 * 1024
+
+
+def _check_token():
+    """Webhooks are disabled unless DELIVERY_WEBHOOK_TOKEN is set; callers send it as a Bearer token or ?token=."""
+    expected = os.environ.get("DELIVERY_WEBHOOK_TOKEN")
+    if not expected:
+        abort(404)
+    auth = request.headers.get("Authorization", "")
+    given = auth[7:] if auth.startswith("Bearer ") else request.args.get("token", "")
+    if not hmac.compare_digest(given.encode(), expected.encode()):
+        abort(401)
+    if (request.content_length or 0) > MAX_WEBHOOK_BYTES:
+        abort(413)
+
+
+def _payload():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = request.form.to_dict()
+    if not payload:
+        abort(400)
+    return payload
+
+
+@webhooks_bp.route("/sms", methods=["POST"])
+@csrf.exempt
+@limiter.exempt
+def sms_delivery_report():
+    _check_token()
+    record_sms_reports(_payload())
+    return "", 204
+
+
+@webhooks_bp.route("/email", methods=["POST"])
+@csrf.exempt
+@limiter.exempt
+def email_event():
+    _check_token()
+    record_email_events(_payload())
+    return "", 204
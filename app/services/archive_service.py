@@ -0,0 +1,104 @@
+import logging
+from datetime import date, datetime
+from sqlalchemy import exists, insert, literal, select
+from app.extensions import db
+from app.models.archive import ArchivedBooking, ArchivedPayment, ArchivedReminderLog
+from app.models.booking import Booking
+from app.models.note import ClientNote
+from app.models.outbound_message import OutboundMessage
+from app.models.payment import Payment
+from app.models.reminder_log import ReminderLog
+from app.models.settings import Setting
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+# Reports and reconciliation only read the hot tables and cover at most a
+# year, so nothing younger than this is ever archived.
+MIN_ARCHIVE_MONTHS = 12
+
+
+def get_archive_months():
+    setting = db.session.get(Setting, "archive_after_months")
+    return int(setting.value) if setting else 0
+
+
+def archive_cutoff(months, today=None):
+    """First day that stays in the hot tables: `months` before today (clamped to month end)."""
+    today = today or date.today()
+    total = today.year * 12 + today.month - 1 - months
+    year, month = divmod(total, 12)
+    for day in (today.day, 30, 29, 28):
+        try:
+            return date(year, month + 1, day)
+        except ValueError:
+            continue
+
+
+def _archivable(before):
+    """
+    Bookings dated before `before` that are finished with: not still
+    'confirmed', no note pointing at them, and nothing left to send for them.
+    """
+    return db.session.query(Booking.id).filter(
+        Booking.date < before,
+        Booking.status != "confirmed",
+        ~exists().where(ClientNote.booking_id == Booking.id),
+        ~exists().where(
+            OutboundMessage.booking_id == Booking.id,
+            OutboundMessage.status.in_(("pending", "sending")),
+        ),
+    )
+
+
+def _copy_rows(model, archive_model, column, ids, **extra):
+    """INSERT ... SELECT the rows whose `column` is in `ids` into the archive table."""
+    columns = [c.name for c in model.__table__.columns]
+    source = select(*model.__table__.columns, *(literal(v) for v in extra.values())).where(column.in_(ids))
+    db.session.execute(insert(archive_model.__table__).from_select(columns + list(extra), source))
+
+
+def archive_bookings(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move bookings dated before `before`, with their payments and reminder
+    logs, into the archive tables. Finished outbox rows keep their history
+    but lose the booking reference.
+
+    Each batch of `batch_size` bookings is copied and deleted in its own
+    transaction, so no single transaction holds locks for long and a crash
+    leaves every booking in exactly one place.
+
+    Returns the number of bookings archived.
+    """
+    total = 0
+    while True:
+        ids = [row[0] for row in _archivable(before).order_by(Booking.id).limit(batch_size).all()]
+        if not ids:
+            break
+        try:
+            _copy_rows(Booking, ArchivedBooking, Booking.id, ids, archived_at=datetime.utcnow())
+            _copy_rows(Payment, ArchivedPayment, Payment.booking_id, ids)
+            _copy_rows(ReminderLog, ArchivedReminderLog, ReminderLog.booking_id, ids)
+            OutboundMessage.query.filter(OutboundMessage.booking_id.in_(ids)).update(
+                {OutboundMessage.booking_id: None}, synchronize_session=False
+            )
+            ReminderLog.query.filter(ReminderLog.booking_id.in_(ids)).delete(synchronize_session=False)
+            Payment.query.filter(Payment.booking_id.in_(ids)).delete(synchronize_session=False)
+            Booking.query.filter(Booking.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        total += len(ids)
+        logger.info("Archived %d bookings (%d so far)", len(ids), total)
+    db.session.expire_all()
+    return total
+
+
+def get_archive_counts():
+    """Returns dict with keys: bookings, payments, reminder_logs"""
+    return {
+        "bookings": ArchivedBooking.query.count(),
+        "payments": ArchivedPayment.query.count(),
+        "reminder_logs": ArchivedReminderLog.query.count(),
+    }
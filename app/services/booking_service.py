@@ -1,13 +1,25 @@
 import re
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from sqlalchemy import String, and_, cast
 from app.extensions import db
+from app.models.availability import AvailabilityWindow
 from app.models.booking import Booking
 from app.models.client import Client
+from app.models.outbound_message import OutboundMessage
 from app.models.service import Service
 from app.models.settings import Setting
 from app.services.slot_engine import get_available_slots
 from app.services.coupon_service import validate_coupon, apply_coupon
+from app.services.client_service import normalize_phone
+from app.services.message_templates import render_message
+from app.services.outbox_service import (
+    enqueue_booking_notice,
+    enqueue_message,
+    get_channel_settings,
+    pick_notice_channel,
+    schedule_reminder,
+)
 
 
 def _get_buffer_minutes():
@@ -64,7 +76,10 @@ def create_booking(
     client = Client.query.filter_by(email=client_email.lower().strip()).first()
     if client:
         client.name = client_name
+        if normalize_phone(client_phone) != client.phone_normalized:
+            client.phone_undeliverable_at = None
         client.phone = client_phone
+        client.phone_normalized = normalize_phone(client_phone)
         client.reminder_preference = reminder_preference
         if gdpr_consent:
             client.gdpr_consent = True
@@ -81,6 +96,7 @@ def create_booking(
             name=client_name,
             email=client_email.lower().strip(),
             phone=client_phone,
+            phone_normalized=normalize_phone(client_phone),
             reminder_preference=reminder_preference,
             gdpr_consent=True,
             gdpr_consented_at=datetime.utcnow(),
@@ -122,6 +138,144 @@ def create_booking(
         source=source,
     )
     db.session.add(booking)
+    db.session.flush()
+    schedule_reminder(booking)
+    enqueue_booking_notice(booking, "confirmation")
     db.session.commit()
 
     return booking
+
+
+def close_day(day, rebook_url, reason=None, notify=True):
+    """
+    Close the studio for a day in one transaction: delete the day's
+    availability windows, cancel every confirmed booking with a single
+    UPDATE, withdraw their queued reminders and confirmations, and queue
+    one apology per booking (keyed closure:<booking id>) with a rebook link.
+    Slots are computed from the windows on every request, so nothing else
+    needs invalidating.
+
+    Raises ValueError for a day in the past: its bookings have already happened.
+
+    Returns dict with keys: cancelled, windows_deleted, notified, unreachable
+    """
+    if day < date.today():
+        raise ValueError("Past days cannot be closed.")
+    bookings = (
+        Booking.query.filter(Booking.date == day, Booking.status == "confirmed")
+        .options(db.joinedload(Booking.client), db.joinedload(Booking.service))
+        .all()
+    )
+    booking_ids = [b.id for b in bookings]
+    now = datetime.utcnow()
+
+    windows_deleted = AvailabilityWindow.query.filter_by(date=day).delete(synchronize_session=False)
+    notified = unreachable = 0
+    if booking_ids:
+        Booking.query.filter(Booking.id.in_(booking_ids)).update(
+            {Booking.status: "cancelled", Booking.updated_at: now}, synchronize_session=False,
+        )
+        OutboundMessage.query.filter(
+            OutboundMessage.booking_id.in_(booking_ids),
+            OutboundMessage.kind.in_(("reminder", "confirmation")),
+            OutboundMessage.status == "pending",
+        ).update(
+            {OutboundMessage.status: "skipped", OutboundMessage.last_error: "day closed"},
+            synchronize_session=False,
+        )
+        # A booking re-confirmed after an earlier closure of this day gets a fresh closure row
+        OutboundMessage.query.filter(
+            OutboundMessage.dedupe_key.in_([f"closure:{booking_id}" for booking_id in booking_ids]),
+        ).delete(synchronize_session=False)
+
+    if bookings:
+        sms_enabled, email_enabled = get_channel_settings()
+        for booking in bookings:
+            client = booking.client
+            if not notify:
+                _closure_marker(booking, "closed without notifying")
+                continue
+            channel = None if client.anonymized_at else pick_notice_channel(client, sms_enabled, email_enabled)
+            if channel is None:
+                _closure_marker(booking, "no channel available")
+                unreachable += 1
+                continue
+            message = render_message(
+                "closure",
+                client_name=client.name,
+                service_name=booking.service.name,
+                booking_date=booking.date.strftime("%B %d, %Y"),
+                booking_time=booking.start_time.strftime("%H:%M"),
+                rebook_url=rebook_url,
+                reason=reason,
+            )
+            enqueue_message(
+                channel,
+                client.phone if channel == "sms" else client.email,
+                message.sms if channel == "sms" else message.html,
+                subject=message.subject,
+                client_id=client.id,
+                booking_id=booking.id,
+                dedupe_key=f"closure:{booking.id}",
+            )
+            notified += 1
+
+    db.session.commit()
+    return {
+        "cancelled": len(booking_ids),
+        "windows_deleted": windows_deleted,
+        "notified": notified,
+        "unreachable": unreachable,
+    }
+
+
+def _closure_marker(booking, reason):
+    """
+    Record a closed-day booking whose client gets no apology as a skipped
+    closure:<booking id> row, so the closure report still lists it.
+    """
+    db.session.add(OutboundMessage(
+        kind="message",
+        booking_id=booking.id,
+        client_id=booking.client_id,
+        dedupe_key=f"closure:{booking.id}",
+        status="skipped",
+        last_error=reason,
+    ))
+
+
+def get_closure_report(day):
+    """
+    Per-client outcome of a day closure: one row per booking the closure
+    cancelled (those with a closure:<booking id> outbox row) with the status
+    of its apology. Bookings cancelled on that day for other reasons are left out.
+
+    Returns list of dicts with keys: booking_id, client_id, client_name,
+    start_time, channel, recipient, status, attempts, last_error, sent_at
+    """
+    rows = (
+        db.session.query(Booking.id, Booking.start_time, Client.id, Client.name, OutboundMessage)
+        .join(Client, Client.id == Booking.client_id)
+        .join(OutboundMessage, and_(
+            OutboundMessage.booking_id == Booking.id,
+            OutboundMessage.dedupe_key == "closure:" + cast(Booking.id, String),
+        ))
+        .filter(Booking.date == day, Booking.status == "cancelled")
+        .order_by(Booking.start_time)
+        .all()
+    )
+    return [
+        {
+            "booking_id": booking_id,
+            "client_id": client_id,
+            "client_name": client_name,
+            "start_time": start_time.strftime("%H:%M"),
+            "channel": msg.channel,
+            "recipient": msg.recipient,
+            "status": msg.status,
+            "attempts": msg.attempts,
+            "last_error": msg.last_error,
+            "sent_at": msg.sent_at.isoformat() if msg.sent_at else None,
+        }
+        for booking_id, start_time, client_id, client_name, msg in rows
+    ]
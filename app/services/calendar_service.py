@@ -1,95 +1,123 @@
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
 from urllib.parse import quote
+from app.services.ical import STUDIO_LOCATION, render_calendar
 
 
-def generate_ics(booking):
-    start_dt = datetime.combine(booking.date, booking.start_time)
-    end_dt = datetime.combine(booking.date, booking.end_time)
-
-    uid = f"hopono-booking-{booking.id}@hoponomassage.com"
-    now = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    dtstart = start_dt.strftime("%Y%m%dT%H%M%S")
-    dtend = end_dt.strftime("%Y%m%dT%H%M%S")
-
-    summary = f"{booking.service.name} — HoPono Massage"
-    description = (
-        f"Service: {booking.service.name}\\n"
-        f"Duration: {booking.service.duration_minutes} minutes\\n"
-        f"Price: EUR {booking.service.price_eur}\\n"
-        f"\\nQuestions? Call +357 96 537 959"
+class _Event(NamedTuple):
+    """Everything a booking's calendar entry is built from; doubles as its cache key."""
+    booking_id: int
+    start_dt: datetime
+    end_dt: datetime
+    service_name: str
+    duration_minutes: int
+    price_eur: str
+    stamp: datetime
+
+
+class CalendarEntry(NamedTuple):
+    ics: str
+    etag: str
+    google_url: str
+    outlook_url: str
+
+
+def _event(booking):
+    service = booking.service
+    return _Event(
+        booking_id=booking.id,
+        start_dt=datetime.combine(booking.date, booking.start_time),
+        end_dt=datetime.combine(booking.date, booking.end_time),
+        service_name=service.name,
+        duration_minutes=service.duration_minutes,
+        price_eur=str(service.price_eur),
+        stamp=booking.updated_at or booking.created_at or datetime(1970, 1, 1),
     )
-    location = "HoPono Massage Studio, Nicosia, Cyprus"
-
-    ics = (
-        "BEGIN:VCALENDAR\r\n"
-        "VERSION:2.0\r\n"
-        "PRODID:-//HoPono Massage//Booking//EN\r\n"
-        "CALSCALE:GREGORIAN\r\n"
-        "METHOD:PUBLISH\r\n"
-        "BEGIN:VEVENT\r\n"
-        f"UID:{uid}\r\n"
-        f"DTSTAMP:{now}\r\n"
-        f"DTSTART:{dtstart}\r\n"
-        f"DTEND:{dtend}\r\n"
-        f"SUMMARY:{summary}\r\n"
-        f"DESCRIPTION:{description}\r\n"
-        f"LOCATION:{location}\r\n"
-        "STATUS:CONFIRMED\r\n"
-        "BEGIN:VALARM\r\n"
-        "TRIGGER:-PT1H\r\n"
-        "ACTION:DISPLAY\r\n"
-        "DESCRIPTION:Reminder: Your HoPono Massage appointment is in 1 hour\r\n"
-        "END:VALARM\r\n"
-        "END:VEVENT\r\n"
-        "END:VCALENDAR\r\n"
+
+
+def calendar_entry(booking):
+    """
+    The booking's ICS file, its strong ETag and the Google/Outlook links.
+
+    Built once per booking version and memoized: the key holds every value
+    the output depends on, and DTSTAMP is the booking's updated_at rather
+    than the current time, so the same version always yields the same bytes.
+    """
+    return _build_entry(_event(booking))
+
+
+@lru_cache(maxsize=2048)
+def _build_entry(event):
+    ics = _ics(event)
+    return CalendarEntry(
+        ics=ics,
+        etag=hashlib.sha256(ics.encode("utf-8")).hexdigest()[:32],
+        google_url=_google_url(event),
+        outlook_url=_outlook_url(event),
     )
-    return ics
+
+
+def generate_ics(booking):
+    return calendar_entry(booking).ics
 
 
 def google_calendar_url(booking):
-    start_dt = datetime.combine(booking.date, booking.start_time)
-    end_dt = datetime.combine(booking.date, booking.end_time)
-
-    dates = f"{start_dt.strftime('%Y%m%dT%H%M%S')}/{end_dt.strftime('%Y%m%dT%H%M%S')}"
-    title = f"{booking.service.name} — HoPono Massage"
-    details = (
-        f"Service: {booking.service.name}\n"
-        f"Duration: {booking.service.duration_minutes} minutes\n"
-        f"Price: EUR {booking.service.price_eur}\n"
+    return calendar_entry(booking).google_url
+
+
+def outlook_calendar_url(booking):
+    return calendar_entry(booking).outlook_url
+
+
+def _title(event):
+    return f"{event.service_name} — HoPono Massage"
+
+
+def _details(event):
+    return (
+        f"Service: {event.service_name}\n"
+        f"Duration: {event.duration_minutes} minutes\n"
+        f"Price: EUR {event.price_eur}\n"
         f"\nQuestions? Call +357 96 537 959"
     )
-    location = "HoPono Massage Studio, Nicosia, Cyprus"
 
+
+def _ics(event):
+    return render_calendar([{
+        "uid": f"hopono-booking-{event.booking_id}@hoponomassage.com",
+        "start": event.start_dt,
+        "end": event.end_dt,
+        "summary": _title(event),
+        "dtstamp": event.stamp,
+        "description": _details(event),
+        "location": STUDIO_LOCATION,
+        "alarm_minutes": 60,
+        "alarm_text": "Reminder: Your HoPono Massage appointment is in 1 hour",
+    }], prodid="-//HoPono Massage//Booking//EN").decode("utf-8")
+
+
+def _google_url(event):
+    dates = f"{event.start_dt.strftime('%Y%m%dT%H%M%S')}/{event.end_dt.strftime('%Y%m%dT%H%M%S')}"
     url = (
         "https://calendar.google.com/calendar/render"
         f"?action=TEMPLATE"
-        f"&text={quote(title)}"
+        f"&text={quote(_title(event))}"
         f"&dates={dates}"
-        f"&details={quote(details)}"
-        f"&location={quote(location)}"
+        f"&details={quote(_details(event))}"
+        f"&location={quote(STUDIO_LOCATION)}"
     )
     return url
 
 
-def outlook_calendar_url(booking):
-    start_dt = datetime.combine(booking.date, booking.start_time)
-    end_dt = datetime.combine(booking.date, booking.end_time)
-
-    title = f"{booking.service.name} — HoPono Massage"
-    body = (
-        f"Service: {booking.service.name}\n"
-        f"Duration: {booking.service.duration_minutes} minutes\n"
-        f"Price: EUR {booking.service.price_eur}\n"
-        f"\nQuestions? Call +357 96 537 959"
-    )
-    location = "HoPono Massage Studio, Nicosia, Cyprus"
-
+def _outlook_url(event):
     url = (
         "https://outlook.live.com/calendar/0/action/compose"
-        f"?subject={quote(title)}"
-        f"&startdt={start_dt.strftime('%Y-%m-%dT%H:%M:%S')}"
-        f"&enddt={end_dt.strftime('%Y-%m-%dT%H:%M:%S')}"
-        f"&body={quote(body)}"
-        f"&location={quote(location)}"
+        f"?subject={quote(_title(event))}"
+        f"&startdt={event.start_dt.strftime('%Y-%m-%dT%H:%M:%S')}"
+        f"&enddt={event.end_dt.strftime('%Y-%m-%dT%H:%M:%S')}"
+        f"&body={quote(_details(event))}"
+        f"&location={quote(STUDIO_LOCATION)}"
     )
     return url
@@ -0,0 +1,257 @@
+import logging
+from datetime import datetime
+from urllib.parse import urlsplit
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from markupsafe import Markup
+from sqlalchemy import exists, func, or_
+from app.extensions import db
+from app.models.archive import ArchivedBooking
+from app.models.booking import Booking
+from app.models.campaign import Campaign
+from app.models.client import Client
+from app.models.outbound_message import OutboundMessage
+from app.services.message_templates import html_to_text, render_message, sanitize_html
+from app.services.outbox_service import enqueue_message
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_CHANNELS = ("email", "sms")
+FANOUT_CHUNK_SIZE = 500
+UNSUBSCRIBE_SALT = "campaign-unsubscribe"
+
+
+def create_campaign(name, channel, body, subject=None, last_visit_before=None,
+                    service_id=None, created_by=None):
+    """Validate and save a draft campaign. Raises ValueError on bad input."""
+    name = (name or "").strip()
+    body = (body or "").strip()
+    subject = (subject or "").strip() or None
+    if not name or not body:
+        raise ValueError("Name and message are required.")
+    if channel not in CAMPAIGN_CHANNELS:
+        raise ValueError("Invalid channel.")
+    if channel == "email":
+        if not subject:
+            raise ValueError("Email campaigns need a subject.")
+        body = sanitize_html(body)
+
+    campaign = Campaign(
+        name=name,
+        channel=channel,
+        subject=subject,
+        body=body,
+        last_visit_before=last_visit_before,
+        service_id=service_id,
+        created_by=created_by,
+    )
+    db.session.add(campaign)
+    db.session.commit()
+    return campaign
+
+
+def segment_query(campaign):
+    """
+    Query of (id, name, email, phone) for the clients a campaign targets:
+    marketing consent given, not erased, reachable on the campaign's channel,
+    and matching the optional last-visit and service filters.
+    """
+    query = db.session.query(Client.id, Client.name, Client.email, Client.phone).filter(
+        Client.marketing_consent.is_(True),
+        Client.anonymized_at.is_(None),
+    )
+    if campaign.channel == "sms":
+        query = query.filter(Client.phone.isnot(None), Client.phone != "")
+    else:
+        query = query.filter(Client.email.isnot(None), Client.email != "")
+    # Both filters look at archived bookings too
+    if campaign.last_visit_before:
+        for model in (Booking, ArchivedBooking):
+            query = query.filter(~exists().where(
+                model.client_id == Client.id,
+                model.status == "completed",
+                model.date >= campaign.last_visit_before,
+            ))
+    if campaign.service_id:
+        query = query.filter(or_(*(
+            exists().where(
+                model.client_id == Client.id,
+                model.status == "completed",
+                model.service_id == campaign.service_id,
+            )
+            for model in (Booking, ArchivedBooking)
+        )))
+    return query
+
+
+def count_segment(campaign):
+    return segment_query(campaign).order_by(None).count()
+
+
+def start_campaign(campaign_id):
+    campaign = db.session.get(Campaign, campaign_id)
+    if not campaign:
+        raise ValueError("Campaign not found.")
+    if campaign.status not in ("draft", "paused"):
+        raise ValueError(f"A {campaign.status} campaign cannot be started.")
+    campaign.status = "running"
+    campaign.started_at = campaign.started_at or datetime.utcnow()
+    db.session.commit()
+    return campaign
+
+
+def pause_campaign(campaign_id):
+    """Stop fan-out and hold queued messages; start_campaign resumes where it left off."""
+    campaign = db.session.get(Campaign, campaign_id)
+    if not campaign:
+        raise ValueError("Campaign not found.")
+    if campaign.status != "running":
+        raise ValueError("Only a running campaign can be paused.")
+    campaign.status = "paused"
+    db.session.commit()
+    return campaign
+
+
+def _unsubscribe_serializer():
+    return URLSafeSerializer(current_app.config["SECRET_KEY"], salt=UNSUBSCRIBE_SALT)
+
+
+def unsubscribe_url_builder():
+    """
+    Return a function mapping a client id to its signed unsubscribe link.
+    Campaigns are queued and sent by background jobs with no request to take
+    the host from, so links are built on PUBLIC_BASE_URL. Needs an app context.
+    """
+    base = urlsplit(current_app.config["PUBLIC_BASE_URL"])
+    adapter = current_app.url_map.bind(base.netloc, script_name=base.path or "/", url_scheme=base.scheme)
+    serializer = _unsubscribe_serializer()
+    return lambda client_id: adapter.build(
+        "public.unsubscribe_page", {"token": serializer.dumps(client_id)}, force_external=True,
+    )
+
+
+def unsubscribe(token):
+    """
+    Withdraw the marketing consent of the client a signed unsubscribe link
+    was issued to. Raises ValueError if the link is not valid.
+    """
+    try:
+        client_id = _unsubscribe_serializer().loads(token)
+    except BadSignature:
+        raise ValueError("This unsubscribe link is not valid.")
+    client = db.session.get(Client, client_id)
+    if not client:
+        raise ValueError("This unsubscribe link is not valid.")
+    client.marketing_consent = False
+    client.marketing_consented_at = None
+    db.session.commit()
+    return client
+
+
+def _render_for(campaign, name, content_text, unsubscribe_url):
+    message = render_message(
+        "campaign",
+        client_name=name,
+        subject=campaign.subject,
+        content_html=Markup(campaign.body),
+        content_text=content_text,
+        unsubscribe_url=unsubscribe_url,
+    )
+    return (message.subject, message.html) if campaign.channel == "email" else (None, message.sms)
+
+
+def fan_out_chunk(campaign, chunk_size=FANOUT_CHUNK_SIZE):
+    """
+    Queue the next chunk of recipients for a running campaign and commit.
+
+    Recipients are read in client id order after the campaign's cursor, and
+    each gets an outbox row keyed campaign:<id>:<client id>. The rows and the
+    advanced cursor commit together, so a crash between chunks resumes at
+    the next client, and the dedupe key stops a recipient from ever being
+    queued twice.
+
+    Returns the number of messages queued (0 once the segment is exhausted).
+    """
+    rows = (
+        segment_query(campaign)
+        .filter(Client.id > campaign.last_client_id)
+        .order_by(Client.id)
+        .limit(chunk_size)
+        .all()
+    )
+    if not rows:
+        campaign.fanout_done = True
+        db.session.commit()
+        return 0
+
+    keys = [f"campaign:{campaign.id}:{row.id}" for row in rows]
+    already = {
+        key for (key,) in db.session.query(OutboundMessage.dedupe_key)
+        .filter(OutboundMessage.dedupe_key.in_(keys))
+    }
+    content_text = campaign.body if campaign.channel == "sms" else html_to_text(campaign.body).strip()
+    unsubscribe_url = unsubscribe_url_builder()
+
+    queued = 0
+    for row, key in zip(rows, keys):
+        if key in already:
+            continue
+        subject, body = _render_for(campaign, row.name, content_text, unsubscribe_url(row.id))
+        enqueue_message(
+            campaign.channel,
+            row.email if campaign.channel == "email" else row.phone,
+            body,
+            subject=subject,
+            client_id=row.id,
+            dedupe_key=key,
+            campaign_id=campaign.id,
+        )
+        queued += 1
+
+    campaign.last_client_id = rows[-1].id
+    campaign.queued_count += queued
+    db.session.commit()
+    return queued
+
+
+def get_campaign_progress(campaign):
+    """Returns dict with keys: queued, pending, sent, failed, skipped, done"""
+    counts = dict(
+        db.session.query(OutboundMessage.status, func.count(OutboundMessage.id))
+        .filter(OutboundMessage.campaign_id == campaign.id)
+        .group_by(OutboundMessage.status)
+        .all()
+    )
+    pending = counts.get("pending", 0) + counts.get("sending", 0)
+    return {
+        "queued": campaign.queued_count,
+        "pending": pending,
+        "sent": counts.get("sent", 0),
+        "failed": counts.get("failed", 0),
+        "skipped": counts.get("skipped", 0),
+        "done": campaign.fanout_done and pending == 0,
+    }
+
+
+def advance_campaigns(chunk_size=FANOUT_CHUNK_SIZE):
+    """
+    Scheduler step: fan out every running campaign, and mark campaigns
+    complete once all their messages have been sent or given up on. The
+    status is re-read between chunks, so a pause stops fan-out at once.
+    """
+    for campaign in Campaign.query.filter_by(status="running").all():
+        try:
+            while not campaign.fanout_done:
+                fan_out_chunk(campaign, chunk_size)
+                db.session.refresh(campaign)
+                if campaign.status != "running":
+                    logger.info("Campaign #%d is %s, stopping fan-out", campaign.id, campaign.status)
+                    break
+            if campaign.status == "running" and get_campaign_progress(campaign)["done"]:
+                campaign.status = "completed"
+                campaign.completed_at = datetime.utcnow()
+                db.session.commit()
+                logger.info("Campaign #%d completed (%d messages)", campaign.id, campaign.queued_count)
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Campaign #%d fan-out failed: %s", campaign.id, e)
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. It then half-opens: one trial call
+    is let through, and its outcome closes the circuit again or re-opens it
+    for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def is_open(self):
+        """True while calls would be rejected; does not consume the half-open trial."""
+        with self._lock:
+            state = self._current_state()
+            return state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight)
+
+    def allow(self):
+        """Return True if a call may proceed. In half-open state only one trial call is allowed."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit %s opened after %d consecutive failures; failing fast for %ss",
+                                   self.name, self._failures, self.reset_timeout)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def snapshot(self):
+        """Returns dict with keys: name, state, consecutive_failures, retry_in"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = max(0, round(self.reset_timeout - (self._clock() - self._opened_at)))
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in": retry_in,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Return the process-wide breaker for a provider, created on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get("PROVIDER_FAILURE_THRESHOLD", 5)),
+                reset_timeout=int(os.environ.get("PROVIDER_RESET_SECONDS", 60)),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_breaker_states():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
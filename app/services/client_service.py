@@ -0,0 +1,274 @@
+import heapq
+import re
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import case, func, select, tuple_, union_all
+from app.extensions import db
+from app.models.archive import ArchivedBooking, ArchivedPayment
+from app.models.booking import Booking
+from app.models.client import Client
+from app.models.note import ClientNote
+from app.models.outbound_message import OutboundMessage
+from app.models.payment import Payment
+
+HISTORY_PAGE_SIZE = 20
+CLIENT_PAGE_SIZE = 50
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to '+' and digits so formatting differences compare equal."""
+    digits = _NON_DIGITS.sub("", phone or "")
+    if not digits:
+        return None
+    return f"+{digits}" if (phone or "").strip().startswith("+") else digits
+
+
+def _booking_stats(booking_model, payment_model, client_id):
+    total_paid = (
+        db.session.query(func.coalesce(func.sum(payment_model.amount_eur), 0))
+        .filter(payment_model.client_id == client_id)
+        .scalar_subquery()
+    )
+    return (
+        db.session.query(
+            func.count(case((booking_model.status == "completed", 1))).label("visit_count"),
+            func.count(case((booking_model.status == "no_show", 1))).label("no_show_count"),
+            func.max(case((booking_model.status == "completed", booking_model.date))).label("last_visit"),
+            total_paid.label("total_paid"),
+        )
+        .filter(booking_model.client_id == client_id)
+        .one()
+    )
+
+
+def get_client_stats(client_id):
+    """
+    Compute a client's headline figures, one SQL round trip each for the
+    live and the archived bookings.
+
+    Returns dict with keys: total_paid, visit_count, last_visit, no_show_count
+    """
+    row = _booking_stats(Booking, Payment, client_id)
+    archived = _booking_stats(ArchivedBooking, ArchivedPayment, client_id)
+    return {
+        "total_paid": (row.total_paid or 0) + (archived.total_paid or 0),
+        "visit_count": row.visit_count + archived.visit_count,
+        "last_visit": row.last_visit or archived.last_visit,
+        "no_show_count": row.no_show_count + archived.no_show_count,
+    }
+
+
+def _page(query, page, per_page):
+    """Fetch one page plus a look-ahead row, avoiding a COUNT(*) query."""
+    page = max(page or 1, 1)
+    rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return rows[:per_page], len(rows) > per_page
+
+
+def _page_with_archive(query, archived_query, sort_key, page, per_page):
+    """
+    Like _page over the live and archived rows together. Both queries must
+    be ordered newest first by `sort_key`; each is read only as far as the
+    requested page reaches and the two are merged in Python.
+    """
+    page = max(page or 1, 1)
+    offset = (page - 1) * per_page
+    reach = offset + per_page + 1
+    merged = heapq.merge(query.limit(reach).all(), archived_query.limit(reach).all(), key=sort_key, reverse=True)
+    rows = list(islice(merged, offset, reach))
+    return rows[:per_page], len(rows) > per_page
+
+
+def get_booking_history(client_id, page=1, per_page=HISTORY_PAGE_SIZE):
+    """Live and archived bookings, newest first; archived rows are ArchivedBooking instances."""
+    query = (
+        Booking.query.filter_by(client_id=client_id)
+        .options(db.joinedload(Booking.service), db.joinedload(Booking.payment))
+        .order_by(Booking.date.desc(), Booking.start_time.desc(), Booking.id.desc())
+    )
+    archived_query = (
+        ArchivedBooking.query.filter_by(client_id=client_id)
+        .options(db.joinedload(ArchivedBooking.service), db.joinedload(ArchivedBooking.payment))
+        .order_by(ArchivedBooking.date.desc(), ArchivedBooking.start_time.desc(), ArchivedBooking.id.desc())
+    )
+    return _page_with_archive(query, archived_query, lambda b: (b.date, b.start_time, b.id), page, per_page)
+
+
+def get_payment_history(client_id, page=1, per_page=HISTORY_PAGE_SIZE):
+    """Live and archived payments, newest first; archived rows are ArchivedPayment instances."""
+    query = (
+        Payment.query.filter_by(client_id=client_id)
+        .options(db.joinedload(Payment.booking).joinedload(Booking.service))
+        .order_by(Payment.paid_at.desc(), Payment.id.desc())
+    )
+    archived_query = (
+        ArchivedPayment.query.filter_by(client_id=client_id)
+        .options(db.joinedload(ArchivedPayment.booking).joinedload(ArchivedBooking.service))
+        .order_by(ArchivedPayment.paid_at.desc(), ArchivedPayment.id.desc())
+    )
+    return _page_with_archive(query, archived_query, lambda p: (p.paid_at or datetime.min, p.id), page, per_page)
+
+
+def get_note_history(client_id, page=1, per_page=HISTORY_PAGE_SIZE):
+    query = (
+        ClientNote.query.filter_by(client_id=client_id)
+        .order_by(ClientNote.created_at.desc(), ClientNote.id.desc())
+    )
+    return _page(query, page, per_page)
+
+
+def list_clients_page(search=None, after=None, limit=CLIENT_PAGE_SIZE):
+    """
+    Return one keyset page of clients ordered by (name, id) with summary columns.
+
+    `after` is the (name, id) of the last client on the previous page. The
+    per-client booking figures (live and archived) come from one grouped
+    subquery restricted to the clients on this page, so the cost does not
+    grow with the client base.
+
+    Returns (rows, next_cursor) where each row is a dict with keys: client,
+    booking_count, visit_count, last_visit, and next_cursor is a (name, id)
+    tuple or None on the last page.
+    """
+    page_query = db.session.query(Client.id)
+    if search:
+        page_query = page_query.filter(
+            db.or_(
+                Client.name.ilike(f"%{search}%"),
+                Client.email.ilike(f"%{search}%"),
+                Client.phone.ilike(f"%{search}%"),
+            )
+        )
+    if after:
+        page_query = page_query.filter(tuple_(Client.name, Client.id) > tuple_(*after))
+    page_ids = (
+        page_query.order_by(Client.name, Client.id)
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    page_client_ids = db.session.query(page_ids.c.id)
+    bookings = union_all(*(
+        select(model.client_id, model.status, model.date).where(model.client_id.in_(page_client_ids))
+        for model in (Booking, ArchivedBooking)
+    )).subquery()
+    summary = (
+        db.session.query(
+            bookings.c.client_id.label("client_id"),
+            func.count().label("booking_count"),
+            func.count(case((bookings.c.status == "completed", 1))).label("visit_count"),
+            func.max(case((bookings.c.status == "completed", bookings.c.date))).label("last_visit"),
+        )
+        .group_by(bookings.c.client_id)
+        .subquery()
+    )
+
+    results = (
+        db.session.query(
+            Client,
+            func.coalesce(summary.c.booking_count, 0),
+            func.coalesce(summary.c.visit_count, 0),
+            summary.c.last_visit,
+        )
+        .join(page_ids, page_ids.c.id == Client.id)
+        .outerjoin(summary, summary.c.client_id == Client.id)
+        .order_by(Client.name, Client.id)
+        .all()
+    )
+
+    rows = [
+        {
+            "client": client,
+            "booking_count": booking_count,
+            "visit_count": visit_count,
+            "last_visit": last_visit,
+        }
+        for client, booking_count, visit_count, last_visit in results[:limit]
+    ]
+    next_cursor = None
+    if len(results) > limit:
+        last = rows[-1]["client"]
+        next_cursor = (last.name, last.id)
+    return rows, next_cursor
+
+
+def find_duplicate_groups():
+    """
+    Group clients that share a normalized phone number.
+
+    Candidates are found with a single GROUP BY over the indexed
+    phone_normalized column instead of comparing every pair of clients.
+
+    Returns a list of lists of Client, each inner list ordered oldest first.
+    """
+    dup_phones = (
+        db.session.query(Client.phone_normalized)
+        .filter(Client.phone_normalized.isnot(None))
+        .group_by(Client.phone_normalized)
+        .having(func.count(Client.id) > 1)
+        .subquery()
+    )
+    clients = (
+        Client.query.join(dup_phones, dup_phones.c.phone_normalized == Client.phone_normalized)
+        .order_by(Client.phone_normalized, Client.created_at, Client.id)
+        .all()
+    )
+
+    groups = {}
+    for client in clients:
+        groups.setdefault(client.phone_normalized, []).append(client)
+    return list(groups.values())
+
+
+def merge_clients(target_id, source_ids, merged_by=None):
+    """
+    Fold the source clients into the target client in one transaction.
+
+    Bookings and payments (live and archived), notes and queued messages are
+    re-pointed with set-based UPDATEs, the target inherits any GDPR consent
+    the sources had, and the source rows are deleted. Marketing consent is
+    never carried over: the target may have withdrawn it, and a merge must
+    not re-subscribe anyone. A note on the target records which emails were merged.
+
+    Returns the number of source clients merged.
+    """
+    source_ids = [sid for sid in set(source_ids) if sid != target_id]
+    if not source_ids:
+        raise ValueError("Select at least one other client to merge.")
+
+    target = db.session.get(Client, target_id)
+    if not target:
+        raise ValueError("Primary client not found.")
+    sources = Client.query.filter(Client.id.in_(source_ids)).all()
+    if len(sources) != len(source_ids):
+        raise ValueError("One or more selected clients no longer exist.")
+
+    try:
+        for model in (Booking, Payment, ClientNote, OutboundMessage, ArchivedBooking, ArchivedPayment):
+            model.query.filter(model.client_id.in_(source_ids)).update(
+                {model.client_id: target_id}, synchronize_session=False
+            )
+
+        for source in sources:
+            if source.gdpr_consent and not target.gdpr_consent:
+                target.gdpr_consent = True
+                target.gdpr_consented_at = source.gdpr_consented_at
+
+        merged_emails = ", ".join(sorted(s.email for s in sources))
+        db.session.add(ClientNote(
+            client_id=target_id,
+            content=f"Merged duplicate client records: {merged_emails}",
+            created_by=merged_by,
+        ))
+        target.updated_at = datetime.utcnow()
+
+        Client.query.filter(Client.id.in_(source_ids)).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    db.session.expire_all()
+    return len(source_ids)
@@ -0,0 +1,151 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models.client import Client
+from app.models.delivery_event import DeliveryEvent
+from app.models.reminder_log import ReminderLog
+from app.services.client_service import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+# Provider event -> ReminderLog.delivery_status. Events not listed (opens,
+# clicks, ...) are consumed without changing anything.
+SMS_STATUSES = {
+    "SENT": "sent",
+    "DELIVERED": "delivered",
+    "UNDELIVERED": "undelivered",
+    "FAILED": "undelivered",
+    "REJECTED": "rejected",
+    "EXPIRED": "expired",
+}
+EMAIL_STATUSES = {
+    "request": "sent",
+    "deferred": "deferred",
+    "soft_bounce": "soft_bounce",
+    "delivered": "delivered",
+    "hard_bounce": "bounced",
+    "invalid_email": "bounced",
+    "blocked": "blocked",
+    "spam": "complaint",
+}
+# Statuses that mean the contact itself is bad, not just this one message.
+BAD_PHONE_STATUSES = {"undelivered", "rejected"}
+BAD_EMAIL_STATUSES = {"bounced"}
+# Interim statuses never overwrite a final one that arrived first.
+INTERIM_STATUSES = {"sent", "deferred", "soft_bounce"}
+
+
+def _first(data, *keys):
+    for key in keys:
+        if data.get(key):
+            return str(data[key])
+    return None
+
+
+def record_sms_reports(payload):
+    """Queue Send.to delivery reports (one report or a list). Returns the number queued."""
+    reports = [p for p in (payload if isinstance(payload, list) else [payload]) if isinstance(p, dict)]
+    for report in reports:
+        db.session.add(DeliveryEvent(
+            provider="sms",
+            event=(_first(report, "status") or "UNKNOWN").upper()[:30],
+            provider_message_id=_first(report, "messageId", "message_id", "_id"),
+            recipient=_first(report, "phone", "to"),
+            payload=json.dumps(report),
+        ))
+    db.session.commit()
+    return len(reports)
+
+
+def record_email_events(payload):
+    """Queue Brevo transactional webhook events (one event or a list). Returns the number queued."""
+    events = [p for p in (payload if isinstance(payload, list) else [payload]) if isinstance(p, dict)]
+    for event in events:
+        db.session.add(DeliveryEvent(
+            provider="email",
+            event=(_first(event, "event") or "unknown").lower()[:30],
+            provider_message_id=_first(event, "message-id", "message_id", "messageId"),
+            recipient=(_first(event, "email") or "").lower() or None,
+            payload=json.dumps(event),
+        ))
+    db.session.commit()
+    return len(events)
+
+
+def fold_delivery_events(batch_size=500):
+    """
+    Apply one batch of queued delivery events and mark them processed.
+
+    Delivery statuses are written to the ReminderLog row that recorded the
+    send (matched on provider message id), and hard failures flag the
+    client's email or phone so reminders stop using that channel. Events
+    are applied in arrival order; an interim status never replaces a final
+    one. Returns the number of events processed.
+    """
+    events = (
+        DeliveryEvent.query.filter(DeliveryEvent.processed_at.is_(None))
+        .order_by(DeliveryEvent.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not events:
+        return 0
+
+    message_ids = {e.provider_message_id for e in events if e.provider_message_id}
+    logs = {
+        log.provider_message_id: log
+        for log in ReminderLog.query.filter(ReminderLog.provider_message_id.in_(message_ids))
+    } if message_ids else {}
+
+    now = datetime.utcnow()
+    bad_emails, bad_phones = set(), set()
+    for event in events:
+        event.processed_at = now
+        if event.provider == "sms":
+            status = SMS_STATUSES.get(event.event)
+        else:
+            status = EMAIL_STATUSES.get(event.event)
+        if status is None:
+            continue
+
+        log = logs.get(event.provider_message_id)
+        if log is not None and not (status in INTERIM_STATUSES and log.delivery_status
+                                    and log.delivery_status not in INTERIM_STATUSES):
+            log.delivery_status = status
+            log.delivery_updated_at = event.received_at
+
+        if event.recipient:
+            if status in BAD_EMAIL_STATUSES:
+                bad_emails.add(event.recipient)
+            elif status in BAD_PHONE_STATUSES:
+                phone = normalize_phone(event.recipient)
+                if phone:
+                    # Send.to may report the number without its "+"; stored numbers usually have it
+                    digits = phone.lstrip("+")
+                    bad_phones.update((digits, f"+{digits}"))
+
+    if bad_emails:
+        Client.query.filter(Client.email.in_(bad_emails), Client.email_bounced_at.is_(None)).update(
+            {Client.email_bounced_at: now}, synchronize_session=False,
+        )
+    if bad_phones:
+        Client.query.filter(
+            Client.phone_normalized.in_(bad_phones), Client.phone_undeliverable_at.is_(None),
+        ).update({Client.phone_undeliverable_at: now}, synchronize_session=False)
+    db.session.commit()
+
+    if bad_emails or bad_phones:
+        logger.info("Delivery receipts flagged %d email(s) and %d phone number(s) as bad",
+                    len(bad_emails), len(bad_phones) // 2)
+    return len(events)
+
+
+def prune_delivery_events(days=30):
+    """Delete processed events older than `days`; they hold recipient addresses."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = DeliveryEvent.query.filter(
+        DeliveryEvent.processed_at.isnot(None), DeliveryEvent.processed_at < cutoff,
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -0,0 +1,214 @@
+"""
+Local stand-ins for Brevo SMTP and the Send.to API, for development and
+benchmarks. Both run in background threads, answer like the real services
+closely enough for smtplib and SMSClient, and can add latency and random
+failures. Nothing here is used by the app unless it is pointed at them:
+
+    BREVO_SMTP_HOST=127.0.0.1 BREVO_SMTP_PORT=<port> SMTP_USE_TLS=false
+    SENDTO_API_URL=http://127.0.0.1:<port>
+"""
+import json
+import logging
+import random
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class _FakeProvider:
+    """Shared bookkeeping: latency, failure injection and a record of accepted messages."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.accepted = []  # (monotonic arrival time, recipient)
+        self.rejected = 0
+
+    def _should_fail(self):
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+    def _record(self, recipients):
+        now = time.monotonic()
+        with self._lock:
+            self.accepted.extend((now, r) for r in recipients)
+
+    def _record_failure(self, count=1):
+        with self._lock:
+            self.rejected += count
+
+    def _make_server(self):
+        raise NotImplementedError
+
+    def start(self):
+        self._server = self._make_server()
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name=f"{type(self).__name__}:{self.port}")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            lines.append(line[1:] if line.startswith(b"..") else line)
+
+    def handle(self):
+        fake = self.server.fake
+        recipients = []
+        self._reply("220 fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode("utf-8", "replace").strip().split()
+            verb = parts[0].upper() if parts else ""
+            if verb == "EHLO":
+                self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "HELO":
+                self._reply("250 fake-smtp")
+            elif verb == "AUTH":
+                mechanism = parts[1].upper() if len(parts) > 1 else ""
+                if mechanism == "LOGIN":
+                    if len(parts) < 3:
+                        self._reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif len(parts) < 3:
+                    self._reply("334 ")
+                    self.rfile.readline()
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                self._reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                recipients.append(" ".join(parts[1:]).split(":", 1)[-1].strip("<>"))
+                self._reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                self._read_data()
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake._should_fail():
+                    fake._record_failure(len(recipients))
+                    self._reply("451 4.3.0 Fake temporary failure")
+                else:
+                    fake._record(recipients)
+                    self._reply(f"250 2.0.0 OK queued as {uuid.uuid4().hex[:12]}")
+                recipients = []
+            elif verb in ("RSET", "NOOP"):
+                recipients = [] if verb == "RSET" else recipients
+                self._reply("250 2.0.0 OK")
+            elif verb == "QUIT":
+                self._reply("221 2.0.0 Bye")
+                return
+            else:
+                self._reply("502 5.5.2 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeSMTPServer(_FakeProvider):
+    """Plain-text SMTP sink (no STARTTLS) that accepts any AUTH and drops the mail."""
+
+    def _make_server(self):
+        return _ThreadingSMTPServer((self.host, self.port), _SMTPHandler)
+
+    def env(self):
+        return {
+            "BREVO_SMTP_HOST": self.host,
+            "BREVO_SMTP_PORT": str(self.port),
+            "SMTP_USE_TLS": "false",
+            "BREVO_SMTP_LOGIN": "fake",
+            "BREVO_API_KEY": "fake",
+        }
+
+
+class _SMSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._respond(400, {"success": False, "message": "Invalid JSON"})
+            return
+        if self.path.rstrip("/") != "/sms/send":
+            self._respond(404, {"success": False, "message": "Not found"})
+            return
+
+        recipients = [m.get("to") for m in payload.get("messages", [])] or [payload.get("to")]
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake._should_fail():
+            fake._record_failure(len(recipients))
+            self._respond(503, {"success": False, "message": "Fake provider outage"})
+            return
+        fake._record(recipients)
+        self._respond(200, {"success": True, "message_id": uuid.uuid4().hex})
+
+    def log_message(self, *args):
+        pass
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class FakeSMSServer(_FakeProvider):
+    """HTTP server speaking the subset of the Send.to API that SMSClient uses."""
+
+    def _make_server(self):
+        return _QuietHTTPServer((self.host, self.port), _SMSHandler)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def env(self):
+        return {"SENDTO_API_URL": self.url, "SENDTO_API_KEY": "fake"}
@@ -0,0 +1,330 @@
+import json
+import logging
+import zipfile
+from datetime import date, datetime
+from itertools import chain
+from sqlalchemy import String, cast, exists, literal, or_
+from app.extensions import db
+from app.models.archive import ArchivedBooking, ArchivedPayment, ArchivedReminderLog
+from app.models.booking import Booking
+from app.models.client import Client
+from app.models.delivery_event import DeliveryEvent
+from app.models.note import ClientNote
+from app.models.outbound_message import OutboundMessage
+from app.models.payment import Payment
+from app.models.reminder_log import ReminderLog
+from app.models.service import Service
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 200
+RETENTION_BATCH_SIZE = 100
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, default=_json_default, ensure_ascii=False)
+
+
+def _client_profile(client):
+    return {
+        "id": client.id,
+        "name": client.name,
+        "email": client.email,
+        "phone": client.phone,
+        "reminder_preference": client.reminder_preference,
+        "gdpr_consent": client.gdpr_consent,
+        "gdpr_consented_at": client.gdpr_consented_at,
+        "marketing_consent": client.marketing_consent,
+        "marketing_consented_at": client.marketing_consented_at,
+        "created_at": client.created_at,
+        "updated_at": client.updated_at,
+    }
+
+
+def _booking_rows(booking_model, client_id):
+    bookings = (
+        db.session.query(booking_model, Service.name)
+        .join(Service, Service.id == booking_model.service_id)
+        .filter(booking_model.client_id == client_id)
+        .order_by(booking_model.id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+    return (
+        {
+            "id": b.id,
+            "service": service_name,
+            "date": b.date,
+            "start_time": b.start_time.strftime("%H:%M"),
+            "end_time": b.end_time.strftime("%H:%M"),
+            "status": b.status,
+            "discount_amount": b.discount_amount,
+            "source": b.source,
+            "created_at": b.created_at,
+        }
+        for b, service_name in bookings
+    )
+
+
+def _payment_rows(payment_model, client_id):
+    payments = (
+        payment_model.query.filter_by(client_id=client_id)
+        .order_by(payment_model.id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+    return (
+        {
+            "id": p.id,
+            "booking_id": p.booking_id,
+            "amount_eur": p.amount_eur,
+            "method": p.method,
+            "notes": p.notes,
+            "paid_at": p.paid_at,
+        }
+        for p in payments
+    )
+
+
+def _reminder_log_rows(log_model, booking_model, client_id):
+    logs = (
+        log_model.query.join(booking_model, booking_model.id == log_model.booking_id)
+        .filter(booking_model.client_id == client_id)
+        .order_by(log_model.id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+    return (
+        {
+            "id": r.id,
+            "booking_id": r.booking_id,
+            "type": r.type,
+            "status": r.status,
+            "sent_at": r.sent_at,
+            "error_message": r.error_message,
+        }
+        for r in logs
+    )
+
+
+def _export_sections(client_id):
+    """
+    Yield (section name, row iterator) pairs; rows are fetched in chunks.
+    Archived bookings, payments and reminder logs follow the live ones.
+    """
+    yield "bookings", chain(_booking_rows(Booking, client_id), _booking_rows(ArchivedBooking, client_id))
+    yield "payments", chain(_payment_rows(Payment, client_id), _payment_rows(ArchivedPayment, client_id))
+
+    notes = (
+        ClientNote.query.filter_by(client_id=client_id)
+        .order_by(ClientNote.id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+    yield "notes", (
+        {
+            "id": n.id,
+            "booking_id": n.booking_id,
+            "content": n.content,
+            "created_at": n.created_at,
+        }
+        for n in notes
+    )
+
+    yield "reminder_logs", chain(
+        _reminder_log_rows(ReminderLog, Booking, client_id),
+        _reminder_log_rows(ArchivedReminderLog, ArchivedBooking, client_id),
+    )
+
+
+def stream_export_json(client):
+    """
+    Yield a client's personal data as a JSON document, piece by piece.
+
+    Each section is read with yield_per so memory stays flat no matter how
+    much history the client has.
+    """
+    yield '{"exported_at": ' + _dumps(datetime.utcnow())
+    yield ', "client": ' + _dumps(_client_profile(client))
+    for name, rows in _export_sections(client.id):
+        yield f', "{name}": ['
+        first = True
+        for row in rows:
+            yield ("" if first else ", ") + _dumps(row)
+            first = False
+        yield "]"
+    yield "}\n"
+
+
+class _ChunkBuffer:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export_zip(client):
+    """Yield a ZIP archive containing the JSON export, compressed on the fly."""
+    buf = _ChunkBuffer()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(f"hopono-client-{client.id}.json", "w") as member:
+            for piece in stream_export_json(client):
+                member.write(piece.encode("utf-8"))
+                chunk = buf.drain()
+                if chunk:
+                    yield chunk
+    yield buf.drain()
+
+
+def _anonymize_ids(client_ids):
+    """Scrub personal data for the given clients with set-based UPDATEs. Caller commits."""
+    now = datetime.utcnow()
+    booking_ids = db.session.query(Booking.id).filter(Booking.client_id.in_(client_ids))
+
+    # Raw delivery events carry the address or number in `recipient` and `payload`;
+    # match them by contact and by the message ids of the clients' reminders.
+    contacts = set()
+    for email, phone, phone_normalized in db.session.query(
+        Client.email, Client.phone, Client.phone_normalized
+    ).filter(Client.id.in_(client_ids)):
+        contacts.update(v for v in (email, (email or "").lower(), phone, phone_normalized) if v)
+        if phone_normalized:
+            contacts.add(phone_normalized.lstrip("+"))
+    message_ids = db.session.query(ReminderLog.provider_message_id).filter(
+        ReminderLog.booking_id.in_(booking_ids), ReminderLog.provider_message_id.isnot(None)
+    ).union(
+        db.session.query(ArchivedReminderLog.provider_message_id)
+        .join(ArchivedBooking, ArchivedBooking.id == ArchivedReminderLog.booking_id)
+        .filter(ArchivedBooking.client_id.in_(client_ids), ArchivedReminderLog.provider_message_id.isnot(None))
+    )
+    DeliveryEvent.query.filter(or_(
+        DeliveryEvent.recipient.in_(contacts),
+        DeliveryEvent.provider_message_id.in_(message_ids.scalar_subquery()),
+    )).delete(synchronize_session=False)
+
+    ClientNote.query.filter(ClientNote.client_id.in_(client_ids)).delete(synchronize_session=False)
+    OutboundMessage.query.filter(OutboundMessage.client_id.in_(client_ids)).delete(synchronize_session=False)
+    Payment.query.filter(Payment.client_id.in_(client_ids)).update(
+        {Payment.notes: None}, synchronize_session=False
+    )
+    Booking.query.filter(Booking.client_id.in_(client_ids)).update(
+        {Booking.admin_notes: None}, synchronize_session=False
+    )
+    ReminderLog.query.filter(ReminderLog.booking_id.in_(booking_ids)).update(
+        {ReminderLog.error_message: None}, synchronize_session=False
+    )
+    archived_booking_ids = db.session.query(ArchivedBooking.id).filter(ArchivedBooking.client_id.in_(client_ids))
+    ArchivedPayment.query.filter(ArchivedPayment.client_id.in_(client_ids)).update(
+        {ArchivedPayment.notes: None}, synchronize_session=False
+    )
+    ArchivedBooking.query.filter(ArchivedBooking.client_id.in_(client_ids)).update(
+        {ArchivedBooking.admin_notes: None}, synchronize_session=False
+    )
+    ArchivedReminderLog.query.filter(ArchivedReminderLog.booking_id.in_(archived_booking_ids)).update(
+        {ArchivedReminderLog.error_message: None}, synchronize_session=False
+    )
+    Client.query.filter(Client.id.in_(client_ids)).update(
+        {
+            Client.name: "Erased client",
+            Client.email: literal("erased-").concat(cast(Client.id, String)).concat("@invalid"),
+            Client.phone: "",
+            Client.phone_normalized: None,
+            Client.gdpr_consent: False,
+            Client.gdpr_consented_at: None,
+            Client.marketing_consent: False,
+            Client.marketing_consented_at: None,
+            Client.anonymized_at: now,
+            Client.updated_at: now,
+        },
+        synchronize_session=False,
+    )
+
+
+def anonymize_client(client_id):
+    """
+    Erase a client's personal data while keeping bookings and payments for
+    the accounts. Free-text notes are deleted outright.
+    """
+    client = db.session.get(Client, client_id)
+    if not client:
+        raise ValueError("Client not found.")
+    if client.anonymized_at:
+        raise ValueError("This client has already been erased.")
+
+    try:
+        _anonymize_ids([client_id])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()
+    logger.info("Anonymized client #%d", client_id)
+
+
+def anonymize_inactive_clients(years, batch_size=RETENTION_BATCH_SIZE):
+    """
+    Anonymize clients with no booking on or after the retention cutoff.
+
+    Work is done in batches of `batch_size` clients, each committed on its
+    own, so no single transaction holds row locks for long.
+
+    Returns the number of clients anonymized.
+    """
+    today = date.today()
+    try:
+        cutoff = today.replace(year=today.year - years)
+    except ValueError:  # 29 February
+        cutoff = today.replace(year=today.year - years, day=28)
+    cutoff_dt = datetime.combine(cutoff, datetime.min.time())
+
+    # The archival horizon can be shorter than the retention period
+    recent_booking = exists().where(
+        Booking.client_id == Client.id,
+        Booking.date >= cutoff,
+    )
+    recent_archived_booking = exists().where(
+        ArchivedBooking.client_id == Client.id,
+        ArchivedBooking.date >= cutoff,
+    )
+
+    total = 0
+    while True:
+        ids = [
+            row[0]
+            for row in db.session.query(Client.id)
+            .filter(
+                Client.anonymized_at.is_(None),
+                Client.created_at < cutoff_dt,
+                ~recent_booking,
+                ~recent_archived_booking,
+            )
+            .order_by(Client.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+        try:
+            _anonymize_ids(ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        total += len(ids)
+        logger.info("Retention: anonymized batch of %d clients (total %d)", len(ids), total)
+
+    return total
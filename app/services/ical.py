@@ -0,0 +1,171 @@
+"""
+iCalendar (RFC 5545) writer shared by the booking confirmation file and the
+admin export. Events are written one at a time to a binary stream, so an
+export of any size holds at most one event in memory.
+"""
+import io
+
+CRLF = b"\r\n"
+# Content lines are at most 75 octets; continuation lines start with a space.
+MAX_LINE_OCTETS = 75
+
+STUDIO_TZID = "Europe/Nicosia"
+STUDIO_LOCATION = "HoPono Massage Studio, Nicosia, Cyprus"
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"})
+
+
+def escape_text(value):
+    """Escape a TEXT value: backslash, semicolon, comma and line breaks."""
+    return str(value).replace("\r\n", "\n").replace("\r", "\n").translate(_TEXT_ESCAPES)
+
+
+def fold(line):
+    """
+    Fold an encoded content line (no trailing CRLF) into 75-octet pieces,
+    never splitting a UTF-8 sequence. A single pass over the bytes.
+    """
+    if len(line) <= MAX_LINE_OCTETS:
+        return line
+    pieces = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(line) - start > limit:
+        cut = start + limit
+        while line[cut] & 0xC0 == 0x80:  # continuation byte: back up to the character start
+            cut -= 1
+        pieces.append(line[start:cut])
+        start, limit = cut, MAX_LINE_OCTETS - 1
+    pieces.append(line[start:])
+    return b"\r\n ".join(pieces)
+
+
+def content_line(name, value):
+    """One folded content line with its CRLF. `name` may carry parameters (`DTSTART;TZID=...`)."""
+    return fold(f"{name}:{value}".encode("utf-8")) + CRLF
+
+
+def _lines(*pairs):
+    return b"".join(content_line(name, value) for name, value in pairs)
+
+
+def _vtimezone(tzid, standard, daylight):
+    """A VTIMEZONE with yearly STANDARD/DAYLIGHT rules: (dtstart, rrule, offset from, offset to, name)."""
+    parts = [_lines(("BEGIN", "VTIMEZONE"), ("TZID", tzid))]
+    for kind, (dtstart, rrule, offset_from, offset_to, name) in (("STANDARD", standard), ("DAYLIGHT", daylight)):
+        parts.append(_lines(
+            ("BEGIN", kind),
+            ("DTSTART", dtstart),
+            ("RRULE", rrule),
+            ("TZOFFSETFROM", offset_from),
+            ("TZOFFSETTO", offset_to),
+            ("TZNAME", name),
+            ("END", kind),
+        ))
+    parts.append(_lines(("END", "VTIMEZONE")))
+    return b"".join(parts)
+
+
+# Built once at import; every calendar with events in a zone copies its block.
+VTIMEZONES = {
+    STUDIO_TZID: _vtimezone(
+        STUDIO_TZID,
+        standard=("19701025T040000", "FREQ=YEARLY;BYDAY=-1SU;BYMONTH=10", "+0300", "+0200", "EET"),
+        daylight=("19700329T030000", "FREQ=YEARLY;BYDAY=-1SU;BYMONTH=3", "+0200", "+0300", "EEST"),
+    ),
+}
+
+
+def _local(value):
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def _utc(value):
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+class CalendarWriter:
+    """
+    Writes one VCALENDAR to a binary stream: `begin()`, any number of
+    `add_event()` calls, then `end()`. Event times are naive local times in
+    `tzid`, whose VTIMEZONE is written in the header.
+    """
+
+    def __init__(self, stream, prodid, tzid=STUDIO_TZID):
+        if tzid not in VTIMEZONES:
+            raise ValueError(f"No VTIMEZONE for {tzid}")
+        self.stream = stream
+        self.prodid = prodid
+        self.tzid = tzid
+        self.events = 0
+
+    def begin(self):
+        self.stream.write(_lines(
+            ("BEGIN", "VCALENDAR"),
+            ("VERSION", "2.0"),
+            ("PRODID", self.prodid),
+            ("CALSCALE", "GREGORIAN"),
+            ("METHOD", "PUBLISH"),
+            ("X-WR-TIMEZONE", self.tzid),
+        ) + VTIMEZONES[self.tzid])
+
+    def add_event(self, uid, start, end, summary, dtstamp, description=None, location=None,
+                  status="CONFIRMED", alarm_minutes=None, alarm_text=None):
+        """Write one VEVENT. `dtstamp` is a naive UTC datetime; text values are escaped here."""
+        tz = f";TZID={self.tzid}"
+        parts = [
+            b"BEGIN:VEVENT\r\n",
+            content_line("UID", uid),
+            content_line("DTSTAMP", _utc(dtstamp)),
+            content_line("DTSTART" + tz, _local(start)),
+            content_line("DTEND" + tz, _local(end)),
+            content_line("SUMMARY", escape_text(summary)),
+        ]
+        if description:
+            parts.append(content_line("DESCRIPTION", escape_text(description)))
+        if location:
+            parts.append(content_line("LOCATION", escape_text(location)))
+        parts.append(content_line("STATUS", status))
+        if alarm_minutes is not None:
+            parts.append(_lines(
+                ("BEGIN", "VALARM"),
+                ("TRIGGER", f"-PT{alarm_minutes}M"),
+                ("ACTION", "DISPLAY"),
+                ("DESCRIPTION", escape_text(alarm_text or summary)),
+                ("END", "VALARM"),
+            ))
+        parts.append(b"END:VEVENT\r\n")
+        self.stream.write(b"".join(parts))
+        self.events += 1
+
+    def end(self):
+        self.stream.write(b"END:VCALENDAR\r\n")
+
+
+def render_calendar(events, prodid, tzid=STUDIO_TZID):
+    """A whole calendar as bytes. `events` is an iterable of `add_event()` keyword dicts."""
+    buffer = io.BytesIO()
+    writer = CalendarWriter(buffer, prodid, tzid)
+    writer.begin()
+    for event in events:
+        writer.add_event(**event)
+    writer.end()
+    return buffer.getvalue()
+
+
+def stream_calendar(events, prodid, tzid=STUDIO_TZID, chunk_size=64 * 1024):
+    """
+    Generate a calendar as byte chunks of roughly `chunk_size`, pulling
+    `events` (an iterable of `add_event()` keyword dicts) lazily.
+    """
+    buffer = io.BytesIO()
+    writer = CalendarWriter(buffer, prodid, tzid)
+    writer.begin()
+    for event in events:
+        writer.add_event(**event)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    writer.end()
+    yield buffer.getvalue()
+
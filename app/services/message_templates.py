@@ -0,0 +1,142 @@
+import re
+from functools import lru_cache
+from html import unescape
+from pathlib import Path
+from typing import NamedTuple
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+from markupsafe import Markup
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "messages"
+
+MESSAGE_KINDS = ("reminder", "confirmation", "cancellation", "closure", "direct", "campaign")
+
+STUDIO = {
+    "name": "HoPono Massage",
+    "full_name": "HoPono Massage Studio",
+    "location": "Nicosia, Cyprus",
+    "phone": "+35796537959",
+    "phone_display": "+357 96 537 959",
+}
+
+SUBJECTS = {
+    "reminder": "Reminder: Your HoPono appointment on {{ booking_date }}",
+    "confirmation": "Booking confirmed: {{ service_name }} on {{ booking_date }}",
+    "cancellation": "Booking cancelled: {{ service_name }} on {{ booking_date }}",
+    "closure": "Sorry, we're closed on {{ booking_date }} - please rebook",
+    "direct": "{{ subject }}",
+    "campaign": "{{ subject }}",
+}
+
+SAMPLE_CONTEXT = {
+    "client_name": "Maria",
+    "service_name": "Balinese Massage",
+    "booking_date": "October 24, 2026",
+    "booking_time": "10:00",
+    "calendar_url": "https://hoponomassage.com/book/calendar/sample.ics",
+    "rebook_url": "https://hoponomassage.com/book/",
+    "reason": "illness",
+    "subject": "Autumn at HoPono",
+    "content_html": Markup("<p>Book any 90-minute session this month and enjoy a complimentary foot ritual.</p>"),
+    "content_text": "Book any 90-minute session this month and enjoy a complimentary foot ritual.",
+    "unsubscribe_url": "https://hoponomassage.com/unsubscribe/sample",
+}
+
+# Templates are compiled once per process and never re-checked on disk;
+# Template.render is thread-safe, so the outbox worker pool shares them
+# without an app context.
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_env.globals["studio"] = STUDIO
+_text_env = _env.overlay(autoescape=False)
+
+_BODY_MARKER = "\x00body\x00"
+
+
+class RenderedMessage(NamedTuple):
+    subject: str
+    html: str
+    text: str
+    sms: str
+
+
+@lru_cache(maxsize=None)
+def _shell():
+    """The HTML layout around every email, rendered once and split around the body."""
+    html = _env.get_template("layout.html").render(content=Markup(_BODY_MARKER))
+    head, tail = html.split(_BODY_MARKER)
+    return head, tail
+
+
+@lru_cache(maxsize=None)
+def _templates(kind):
+    if kind not in MESSAGE_KINDS:
+        raise ValueError(f"Unknown message template: {kind}")
+    try:
+        sms = _text_env.get_template(f"{kind}.sms.txt")
+    except TemplateNotFound:
+        sms = None
+    return (
+        _text_env.from_string(SUBJECTS[kind]),
+        _env.get_template(f"{kind}.html"),
+        _text_env.get_template(f"{kind}.txt"),
+        sms,
+    )
+
+
+def render_message(kind, **context):
+    """Render the subject, HTML body, plain-text alternative and SMS text for a message kind."""
+    subject, html, text, sms = _templates(kind)
+    head, tail = _shell()
+    return RenderedMessage(
+        subject=subject.render(context).strip(),
+        html=head + html.render(context) + tail,
+        text=text.render(context).strip() + "\n",
+        sms=sms.render(context).strip() if sms else "",
+    )
+
+
+def render_preview(kind):
+    return render_message(kind, **SAMPLE_CONTEXT)
+
+
+_DANGEROUS_TAGS = re.compile(r"<\s*\/?\s*(script|iframe|object|embed|form|meta|link|base)\b[^>]*>", re.IGNORECASE)
+_EVENT_HANDLERS = re.compile(r"\bon\w+\s*=", re.IGNORECASE)
+
+
+def sanitize_html(html):
+    """Strip active content from admin-authored HTML before it is emailed."""
+    html = _DANGEROUS_TAGS.sub("", html)
+    html = _EVENT_HANDLERS.sub("", html)
+    return html
+
+
+_DROP_BLOCKS = re.compile(r"<(style|script|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_LINE_BREAKS = re.compile(r"<br\s*/?>|</(p|div|h[1-6]|tr|li|table)\s*>", re.IGNORECASE)
+_CELL_BREAKS = re.compile(r"</t[dh]\s*>", re.IGNORECASE)
+_LINKS = re.compile(r"<a\b[^>]*\bhref=[\"']([^\"']+)[\"'][^>]*>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*\n+")
+
+
+def _link_text(match):
+    href, label = match.group(1), _TAGS.sub("", match.group(2)).strip()
+    if not label or href == label or href.startswith(("tel:", "mailto:")):
+        return label or href
+    return f"{label} ({href})"
+
+
+def html_to_text(html):
+    """Derive a plain-text alternative from arbitrary HTML (used for ad-hoc and campaign emails)."""
+    text = _DROP_BLOCKS.sub("", html)
+    text = _LINKS.sub(_link_text, text)
+    text = _CELL_BREAKS.sub(" ", text)
+    text = _LINE_BREAKS.sub("\n", text)
+    text = unescape(_TAGS.sub("", text))
+    lines = (_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip() + "\n"
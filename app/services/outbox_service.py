@@ -0,0 +1,318 @@
+import logging
+from datetime import datetime, timedelta
+import pytz
+from flask import current_app
+from sqlalchemy import and_, exists, or_
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.campaign import Campaign
+from app.models.outbound_message import OutboundMessage
+from app.models.settings import Setting
+from app.services.message_templates import render_message
+
+logger = logging.getLogger(__name__)
+
+CYPRUS_TZ = pytz.timezone("Europe/Nicosia")
+
+# Outbox kinds rendered from the booking at send time, and the booking
+# status each one still applies to.
+BOOKING_NOTICE_KINDS = {"confirmation": "confirmed", "cancellation": "cancelled"}
+
+
+def get_reminder_hours_before():
+    setting = db.session.get(Setting, "reminder_hours_before")
+    return int(setting.value) if setting else 24
+
+
+def get_channel_settings():
+    sms_setting = db.session.get(Setting, "sms_enabled")
+    sms_enabled = sms_setting.value.lower() == "true" if sms_setting else True
+
+    email_setting = db.session.get(Setting, "email_enabled")
+    email_enabled = email_setting.value.lower() == "true" if email_setting else True
+    return sms_enabled, email_enabled
+
+
+def pick_notice_channel(client, sms_enabled, email_enabled):
+    """
+    Channel for a one-off notice to a client: their preferred one if it is
+    enabled and their contact on it is not flagged bad, else the other.
+    Returns 'sms', 'email' or None.
+    """
+    can_sms = sms_enabled and bool(client.phone) and client.phone_undeliverable_at is None
+    can_email = email_enabled and bool(client.email) and client.email_bounced_at is None
+    if client.reminder_preference == "phone" and can_sms:
+        return "sms"
+    if can_email:
+        return "email"
+    return "sms" if can_sms else None
+
+
+def reminder_due_at(booking_date, start_time, hours_before):
+    """UTC (naive) time a reminder is due for a booking starting at the given Cyprus local time."""
+    local_start = CYPRUS_TZ.localize(datetime.combine(booking_date, start_time))
+    return local_start.astimezone(pytz.utc).replace(tzinfo=None) - timedelta(hours=hours_before)
+
+
+def enqueue_reminder(booking_id, client_id=None, send_at=None):
+    """
+    Queue a reminder for a booking. The row is added to the current session
+    and becomes visible to workers only when the caller commits.
+    """
+    msg = OutboundMessage(
+        kind="reminder",
+        booking_id=booking_id,
+        client_id=client_id,
+        dedupe_key=f"reminder:{booking_id}",
+        next_attempt_at=send_at or datetime.utcnow(),
+    )
+    db.session.add(msg)
+    return msg
+
+
+def schedule_reminder(booking, hours_before=None):
+    """
+    Queue the booking's reminder for exactly `start - hours_before`, or move
+    an already queued one. Reminders that were skipped (e.g. the booking was
+    cancelled and is now confirmed again) are re-armed; sent ones are left
+    alone. Bookings that have already started get no reminder. Caller commits.
+    """
+    if hours_before is None:
+        hours_before = get_reminder_hours_before()
+    now = datetime.utcnow()
+    due = reminder_due_at(booking.date, booking.start_time, hours_before)
+    if due + timedelta(hours=hours_before) <= now:
+        return None
+    send_at = max(due, now)
+
+    msg = OutboundMessage.query.filter_by(dedupe_key=f"reminder:{booking.id}").first()
+    if msg is None:
+        return enqueue_reminder(booking.id, booking.client_id, send_at=send_at)
+    if msg.status in ("pending", "skipped"):
+        msg.status = "pending"
+        msg.next_attempt_at = send_at
+        msg.attempts = 0
+        msg.last_error = None
+    return msg
+
+
+def cancel_reminder(booking_id):
+    """Withdraw a booking's queued reminder. Caller commits."""
+    OutboundMessage.query.filter(
+        OutboundMessage.kind == "reminder",
+        OutboundMessage.booking_id == booking_id,
+        OutboundMessage.status == "pending",
+    ).update(
+        {OutboundMessage.status: "skipped", OutboundMessage.last_error: "booking cancelled"},
+        synchronize_session=False,
+    )
+
+
+def reschedule_pending_reminders(hours_before):
+    """
+    Move every queued reminder to match a new reminder_hours_before setting.
+    Returns the number of reminders moved. Caller commits.
+    """
+    now = datetime.utcnow()
+    rows = (
+        db.session.query(OutboundMessage, Booking.date, Booking.start_time)
+        .join(Booking, Booking.id == OutboundMessage.booking_id)
+        .filter(OutboundMessage.kind == "reminder", OutboundMessage.status == "pending")
+        .all()
+    )
+    for msg, booking_date, start_time in rows:
+        msg.next_attempt_at = max(reminder_due_at(booking_date, start_time, hours_before), now)
+    return len(rows)
+
+
+def booking_notifications_enabled():
+    setting = db.session.get(Setting, "booking_notifications_enabled")
+    return setting.value.lower() == "true" if setting else True
+
+
+def enqueue_booking_notice(booking, kind):
+    """
+    Queue a confirmation or cancellation notice for a booking. Only a
+    reference is stored; the worker renders the message (and the ICS
+    attachment) when it sends it, so the request that changed the booking
+    pays for one INSERT in its own transaction. Does nothing when booking
+    notifications are turned off. Caller commits.
+    """
+    if kind not in BOOKING_NOTICE_KINDS:
+        raise ValueError(f"Unknown booking notice: {kind}")
+    if not booking_notifications_enabled():
+        return None
+    msg = OutboundMessage(
+        kind=kind,
+        booking_id=booking.id,
+        client_id=booking.client_id,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(msg)
+    return msg
+
+
+def enqueue_message(channel, recipient, body, subject=None, client_id=None,
+                    booking_id=None, dedupe_key=None, send_after=None, campaign_id=None):
+    """Queue a ready-to-send SMS or email. The caller commits."""
+    if channel not in ("sms", "email"):
+        raise ValueError(f"Unknown channel: {channel}")
+    msg = OutboundMessage(
+        kind="message",
+        channel=channel,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        client_id=client_id,
+        booking_id=booking_id,
+        campaign_id=campaign_id,
+        dedupe_key=dedupe_key,
+        next_attempt_at=send_after or datetime.utcnow(),
+    )
+    db.session.add(msg)
+    return msg
+
+
+def enqueue_client_message(client, channel, body, subject=None):
+    """
+    Queue an ad-hoc message from an admin to one client, wrapped in the
+    studio's "direct" template. Raises ValueError on bad input. Caller commits.
+    """
+    body = (body or "").strip()
+    subject = (subject or "").strip() or None
+    if not body:
+        raise ValueError("Message is required.")
+    if client.anonymized_at:
+        raise ValueError("This client's contact details have been erased.")
+    if channel == "email" and not subject:
+        raise ValueError("Emails need a subject.")
+    recipient = client.phone if channel == "sms" else client.email
+    if channel not in ("sms", "email") or not recipient:
+        raise ValueError("The client has no contact details for that channel.")
+
+    message = render_message("direct", client_name=client.name, subject=subject, content_text=body)
+    return enqueue_message(
+        channel,
+        recipient,
+        message.sms if channel == "sms" else message.html,
+        subject=message.subject if channel == "email" else None,
+        client_id=client.id,
+    )
+
+
+def message_status(msg):
+    """Returns dict with keys: id, channel, recipient, subject, status, attempts, last_error, created_at, sent_at"""
+    return {
+        "id": msg.id,
+        "channel": msg.channel,
+        "recipient": msg.recipient,
+        "subject": msg.subject,
+        "status": msg.status,
+        "attempts": msg.attempts,
+        "last_error": msg.last_error,
+        "created_at": msg.created_at.strftime("%d %b %Y %H:%M") if msg.created_at else None,
+        "sent_at": msg.sent_at.strftime("%d %b %Y %H:%M") if msg.sent_at else None,
+    }
+
+
+def _due(now):
+    lease = timedelta(seconds=current_app.config.get("OUTBOX_LEASE_SECONDS", 600))
+    return or_(
+        and_(OutboundMessage.status == "pending", OutboundMessage.next_attempt_at <= now),
+        and_(OutboundMessage.status == "sending", OutboundMessage.locked_at < now - lease),
+    )
+
+
+def _campaign_due(now, channel):
+    """Due messages of a campaign on `channel` that is not paused."""
+    return and_(
+        _due(now),
+        OutboundMessage.campaign_id.isnot(None),
+        OutboundMessage.channel == channel,
+        ~exists().where(Campaign.id == OutboundMessage.campaign_id, Campaign.status == "paused"),
+    )
+
+
+def _lock_due(condition, limit):
+    return (
+        OutboundMessage.query.filter(condition)
+        .order_by(OutboundMessage.next_attempt_at, OutboundMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def claim_batch(worker_id, limit, campaign_limits=None):
+    """
+    Claim up to `limit` due messages for this worker and commit the claim.
+
+    Reminders, booking notices and admin messages are claimed first; campaign
+    messages only fill the rest of the batch, at most campaign_limits[channel]
+    per channel (None: no per-channel cap). However large a campaign, it
+    never holds transactional messages back.
+
+    Rows are selected with FOR UPDATE SKIP LOCKED so concurrent workers never
+    pick the same message. Messages stuck in 'sending' past the lease (their
+    worker died) are claimed again.
+    """
+    now = datetime.utcnow()
+    messages = _lock_due(and_(_due(now), OutboundMessage.campaign_id.is_(None)), limit)
+    for channel in ("sms", "email"):
+        room = limit - len(messages)
+        if campaign_limits is not None:
+            room = min(room, campaign_limits.get(channel, 0))
+        if room > 0:
+            messages += _lock_due(_campaign_due(now, channel), room)
+    for msg in messages:
+        msg.status = "sending"
+        msg.locked_at = now
+        msg.locked_by = worker_id
+        msg.attempts += 1
+    db.session.commit()
+    return messages
+
+
+def has_due_campaign_messages(channel):
+    """True if a campaign message on `channel` is waiting to be claimed."""
+    return db.session.query(exists().where(_campaign_due(datetime.utcnow(), channel))).scalar()
+
+
+def mark_sent(msg):
+    msg.status = "sent"
+    msg.sent_at = datetime.utcnow()
+    msg.last_error = None
+    msg.locked_at = None
+    msg.locked_by = None
+
+
+def defer(msg, until):
+    """Release a claimed message untouched until `until`; the claim does not count as an attempt."""
+    msg.status = "pending"
+    msg.next_attempt_at = until
+    msg.attempts = max(msg.attempts - 1, 0)
+    msg.locked_at = None
+    msg.locked_by = None
+
+
+def mark_skipped(msg, reason):
+    msg.status = "skipped"
+    msg.last_error = reason
+    msg.locked_at = None
+    msg.locked_by = None
+
+
+def mark_failed(msg, error):
+    """Schedule a retry with exponential backoff, or give up after max attempts."""
+    max_attempts = current_app.config.get("OUTBOX_MAX_ATTEMPTS", 5)
+    base = current_app.config.get("OUTBOX_RETRY_BASE_SECONDS", 60)
+    msg.last_error = error
+    msg.locked_at = None
+    msg.locked_by = None
+    if msg.attempts >= max_attempts:
+        msg.status = "failed"
+        logger.warning("Outbound message #%d failed permanently after %d attempts: %s",
+                       msg.id, msg.attempts, error)
+    else:
+        msg.status = "pending"
+        msg.next_attempt_at = datetime.utcnow() + timedelta(seconds=base * 2 ** (msg.attempts - 1))
@@ -0,0 +1,134 @@
+from datetime import datetime
+from sqlalchemy import case, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.payment import Payment
+from app.models.service import Service
+
+PAYMENT_METHODS = ("revolut", "cash", "quickpay", "other")
+
+# Reconciliation covers at most this many days, like the reports.
+MAX_RECONCILIATION_DAYS = 366
+
+
+def _expected_amount():
+    return Service.price_eur - func.coalesce(Booking.discount_amount, 0)
+
+
+def get_reconciliation(date_from, date_to):
+    """
+    Summarize payments for completed bookings dated within [date_from, date_to].
+    Raises ValueError if the range is longer than MAX_RECONCILIATION_DAYS.
+
+    Returns dict with keys: by_method (method -> {count, total}), expected,
+    received, outstanding, completed_count, paid_count
+    """
+    if (date_to - date_from).days >= MAX_RECONCILIATION_DAYS:
+        raise ValueError(f"Reconciliation covers at most {MAX_RECONCILIATION_DAYS} days.")
+    # Same bookings as the totals below, so the per-method sums add up to `received`
+    method_rows = (
+        db.session.query(Payment.method, func.count(Payment.id), func.sum(Payment.amount_eur))
+        .join(Booking, Booking.id == Payment.booking_id)
+        .filter(Booking.date.between(date_from, date_to), Booking.status == "completed")
+        .group_by(Payment.method)
+        .all()
+    )
+    by_method = {m: {"count": 0, "total": 0} for m in PAYMENT_METHODS}
+    for method, count, total in method_rows:
+        by_method[method] = {"count": count, "total": total or 0}
+
+    totals = (
+        db.session.query(
+            func.count(Booking.id),
+            func.count(Payment.id),
+            func.coalesce(func.sum(_expected_amount()), 0),
+            func.coalesce(func.sum(Payment.amount_eur), 0),
+            func.coalesce(func.sum(case((Payment.id.is_(None), _expected_amount()))), 0),
+        )
+        .join(Service, Service.id == Booking.service_id)
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .filter(Booking.date.between(date_from, date_to), Booking.status == "completed")
+        .one()
+    )
+    completed_count, paid_count, expected, received, outstanding = totals
+
+    return {
+        "by_method": by_method,
+        "expected": expected,
+        "received": received,
+        "outstanding": outstanding,
+        "completed_count": completed_count,
+        "paid_count": paid_count,
+    }
+
+
+def get_unpaid_bookings(date_from, date_to):
+    return (
+        Booking.query.filter(Booking.date.between(date_from, date_to), Booking.status == "completed")
+        .outerjoin(Payment)
+        .filter(Payment.id.is_(None))
+        .options(db.joinedload(Booking.client), db.joinedload(Booking.service))
+        .order_by(Booking.date, Booking.start_time)
+        .all()
+    )
+
+
+def get_paid_bookings(date_from, date_to):
+    return (
+        Booking.query.filter(Booking.date.between(date_from, date_to))
+        .join(Payment)
+        .options(
+            db.contains_eager(Booking.payment),
+            db.joinedload(Booking.client),
+            db.joinedload(Booking.service),
+        )
+        .order_by(Booking.date, Booking.start_time)
+        .all()
+    )
+
+
+def record_bulk_payments(booking_ids, method, recorded_by=None, notes=None):
+    """
+    Record a full payment (service price minus discount) for each booking in
+    a single INSERT ... SELECT. Bookings that are not completed or already
+    have a payment are skipped. Raises ValueError, recording nothing, if a
+    payment for one of them is recorded concurrently.
+
+    Returns the number of payments recorded.
+    """
+    if method not in PAYMENT_METHODS:
+        raise ValueError("Invalid payment method.")
+    if not booking_ids:
+        raise ValueError("Select at least one booking.")
+
+    source = (
+        select(
+            Booking.id,
+            Booking.client_id,
+            _expected_amount(),
+            literal(method),
+            literal(notes),
+            literal(datetime.utcnow()),
+            literal(recorded_by, type_=db.Integer),
+        )
+        .join(Service, Service.id == Booking.service_id)
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .where(
+            Booking.id.in_(booking_ids),
+            Booking.status == "completed",
+            Payment.id.is_(None),
+        )
+    )
+    stmt = insert(Payment).from_select(
+        ["booking_id", "client_id", "amount_eur", "method", "notes", "paid_at", "recorded_by"],
+        source,
+    )
+    try:
+        result = db.session.execute(stmt)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise ValueError("A payment for one of these bookings was just recorded elsewhere. "
+                         "Nothing was recorded; please try again.")
+    return result.rowcount
@@ -1,50 +1,326 @@
 import os
 import logging
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
+from app.services.circuit_breaker import get_breaker
+from app.services.message_templates import html_to_text, render_message
 
 logger = logging.getLogger(__name__)
 
 
-def send_sms(phone, message):
-    """Send an SMS via Send.to (sms.to) REST API."""
-    api_key = os.environ.get("SENDTO_API_KEY")
+class SMSClient:
+    """
+    Send.to (sms.to) API client built on a pooled, keep-alive requests.Session.
 
-    if not api_key:
-        logger.warning("Send.to not configured (SENDTO_API_KEY missing). Skipping SMS to %s", phone)
-        return False
+    `session` is the transport: anything with a requests-compatible `post`
+    method, so tests and benchmarks can point the client at a local fake
+    server (via `base_url`) or swap the transport out entirely.
 
-    try:
-        resp = requests.post(
-            "https://api.sms.to/sms/send",
-            json={
-                "message": message,
-                "to": phone,
-                "sender_id": "HoPono",
-            },
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            timeout=15,
-        )
-        data = resp.json()
-        if resp.ok and data.get("success"):
+    With a `breaker`, transport errors and 5xx responses count as provider
+    failures, and sends fail fast while the circuit is open.
+    """
+
+    def __init__(self, api_key, base_url="https://api.sms.to", sender_id="HoPono",
+                 session=None, pool_size=4, timeout=(3.05, 10), max_batch=100, breaker=None,
+                 callback_url=None):
+        self.api_key = api_key
+        self.breaker = breaker
+        self.callback_url = callback_url
+        self.base_url = base_url.rstrip("/")
+        self.sender_id = sender_id
+        self.timeout = timeout
+        self.max_batch = max_batch
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        self.session = session
+
+    def _post(self, payload):
+        """POST to the send endpoint. Returns (ok, response data or None)."""
+        if self.breaker and not self.breaker.allow():
+            logger.warning("Send.to circuit open, failing fast")
+            return False, None
+        try:
+            resp = self.session.post(f"{self.base_url}/sms/send", json=payload, timeout=self.timeout)
+            data = resp.json()
+        except Exception:
+            if self.breaker:
+                self.breaker.record_failure()
+            raise
+        if self.breaker:
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        return resp.ok and bool(data.get("success")), data
+
+    def send(self, phone, message):
+        """Send one SMS. Returns True on success."""
+        return self.send_with_id(phone, message)[0]
+
+    def send_with_id(self, phone, message):
+        """Send one SMS. Returns (ok, Send.to message_id or None) for matching delivery reports."""
+        payload = {"message": message, "to": phone, "sender_id": self.sender_id}
+        if self.callback_url:
+            payload["callback_url"] = self.callback_url
+        try:
+            ok, data = self._post(payload)
+        except Exception as e:
+            logger.error("Failed to send SMS to %s via Send.to: %s", phone, e)
+            return False, None
+        if data is None:
+            return False, None
+        if ok:
             logger.info("SMS sent to %s via Send.to (message_id: %s)", phone, data.get("message_id"))
-            return True
         else:
             logger.error("Send.to SMS failed for %s: %s", phone, data)
-            return False
-    except Exception as e:
-        logger.error("Failed to send SMS to %s via Send.to: %s", phone, e)
+        return ok, data.get("message_id") if ok else None
+
+    def send_bulk(self, messages):
+        """
+        Send personalized SMS to many recipients with one API request per
+        `max_batch` messages.
+
+        `messages` is a list of (phone, text) pairs. Returns a list of bools in
+        the same order; every message in a request shares that request's outcome.
+        """
+        results = []
+        for i in range(0, len(messages), self.max_batch):
+            chunk = messages[i:i + self.max_batch]
+            payload = {
+                "messages": [{"to": phone, "message": text} for phone, text in chunk],
+                "sender_id": self.sender_id,
+            }
+            if self.callback_url:
+                payload["callback_url"] = self.callback_url
+            try:
+                ok, data = self._post(payload)
+            except Exception as e:
+                logger.error("Failed to send bulk SMS (%d messages) via Send.to: %s", len(chunk), e)
+                ok, data = False, None
+            if ok:
+                logger.info("Bulk SMS sent to %d recipients via Send.to", len(chunk))
+            elif data is not None:
+                logger.error("Send.to bulk SMS failed (%d messages): %s", len(chunk), data)
+            results.extend([ok] * len(chunk))
+        return results
+
+
+_sms_client = None
+_sms_client_key = None
+_sms_client_lock = threading.Lock()
+
+
+def get_sms_client():
+    """Return the process-wide SMS client, or None if Send.to is not configured."""
+    global _sms_client, _sms_client_key
+    api_key = os.environ.get("SENDTO_API_KEY")
+    if not api_key:
+        return None
+    key = (
+        api_key,
+        os.environ.get("SENDTO_API_URL", "https://api.sms.to"),
+        int(os.environ.get("SMS_POOL_SIZE", 4)),
+        os.environ.get("SENDTO_CALLBACK_URL"),
+    )
+    with _sms_client_lock:
+        if _sms_client is None or _sms_client_key != key:
+            _, base_url, pool_size, callback_url = key
+            _sms_client = SMSClient(api_key, base_url=base_url, pool_size=pool_size,
+                                    breaker=get_breaker("sms"), callback_url=callback_url)
+            _sms_client_key = key
+        return _sms_client
+
+
+def send_sms(phone, message):
+    """Send an SMS via Send.to (sms.to) REST API."""
+    client = get_sms_client()
+    if client is None:
+        logger.warning("Send.to not configured (SENDTO_API_KEY missing). Skipping SMS to %s", phone)
         return False
+    return client.send(phone, message)
+
+
+def send_sms_with_id(phone, message):
+    """Like send_sms, but returns (ok, provider message id) so delivery reports can be matched."""
+    client = get_sms_client()
+    if client is None:
+        logger.warning("Send.to not configured (SENDTO_API_KEY missing). Skipping SMS to %s", phone)
+        return False, None
+    return client.send_with_id(phone, message)
+
 
+def send_sms_bulk(messages):
+    """Send many (phone, text) SMS in as few API requests as possible."""
+    client = get_sms_client()
+    if client is None:
+        logger.warning("Send.to not configured (SENDTO_API_KEY missing). Skipping %d SMS", len(messages))
+        return [False] * len(messages)
+    return client.send_bulk(messages)
 
-def send_email(to_email, subject, html_content):
-    """Send an email via Brevo SMTP relay."""
+
+class _PooledConnection:
+    def __init__(self, server):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPPool:
+    """
+    Pool of authenticated SMTP sessions reused across messages.
+
+    A session is handed back to the pool after each message and retired once
+    it has sent `max_messages_per_connection` messages or sat idle longer than
+    `idle_timeout` seconds. If the server has dropped a pooled session, the
+    message is retried once on a fresh connection.
+    """
+
+    def __init__(self, host, port, login=None, password=None, use_tls=True,
+                 max_connections=4, max_messages_per_connection=100,
+                 idle_timeout=60, timeout=30):
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.login:
+                server.login(self.login, self.password)
+        except Exception:
+            server.close()
+            raise
+        return _PooledConnection(server)
+
+    def _checkout(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if now - conn.last_used <= self.idle_timeout:
+                    return conn
+                conn.close()
+        return self._connect()
+
+    def _checkin(self, conn):
+        if conn.sent >= self.max_messages_per_connection:
+            conn.close()
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def _send_on(self, conn, msg):
+        try:
+            conn.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            conn.close()
+            raise
+        except Exception:
+            # Per-message failures (e.g. a refused recipient) leave the session usable.
+            conn.sent += 1
+            self._checkin(conn)
+            raise
+        conn.sent += 1
+        self._checkin(conn)
+
+    def send_message(self, msg):
+        with self._slots:
+            conn = self._checkout()
+            try:
+                self._send_on(conn, msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                logger.info("SMTP session to %s dropped, reconnecting", self.host)
+                self._send_on(self._connect(), msg)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_smtp_pool = None
+_smtp_pool_key = None
+_smtp_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """Return the process-wide SMTP pool, rebuilding it if the SMTP settings changed."""
+    global _smtp_pool, _smtp_pool_key
+    key = (
+        os.environ.get("BREVO_SMTP_HOST", "smtp-relay.brevo.com"),
+        int(os.environ.get("BREVO_SMTP_PORT", 587)),
+        os.environ.get("BREVO_SMTP_LOGIN"),
+        os.environ.get("BREVO_API_KEY"),
+        os.environ.get("SMTP_USE_TLS", "true").lower() == "true",
+        int(os.environ.get("SMTP_MAX_CONNECTIONS", 4)),
+        int(os.environ.get("SMTP_MAX_MESSAGES_PER_CONNECTION", 100)),
+    )
+    with _smtp_pool_lock:
+        if _smtp_pool is None or _smtp_pool_key != key:
+            if _smtp_pool is not None:
+                _smtp_pool.close()
+            host, port, login, password, use_tls, max_connections, max_messages = key
+            _smtp_pool = SMTPPool(
+                host, port, login, password,
+                use_tls=use_tls,
+                max_connections=max_connections,
+                max_messages_per_connection=max_messages,
+            )
+            _smtp_pool_key = key
+        return _smtp_pool
+
+
+def close_smtp_pool():
+    """Quit any idle pooled SMTP sessions, e.g. at the end of a reminder run."""
+    with _smtp_pool_lock:
+        pool = _smtp_pool
+    if pool is not None:
+        pool.close()
+
+
+def send_email(to_email, subject, html_content, text_content=None, attachments=None, message_id=None,
+               headers=None):
+    """
+    Send an email via Brevo SMTP relay, reusing pooled sessions. A plain-text
+    alternative is derived from the HTML when one is not given. `attachments`
+    is a list of (filename, text content, mime type) tuples. `message_id`
+    sets the Message-ID header, which Brevo echoes in its webhook events.
+    `headers` is a dict of extra headers, e.g. List-Unsubscribe.
+    """
     smtp_login = os.environ.get("BREVO_SMTP_LOGIN")
     smtp_password = os.environ.get("BREVO_API_KEY")
     from_email = os.environ.get("BREVO_FROM_EMAIL", "noreply@hoponomassage.com")
@@ -54,83 +330,61 @@ def send_email(to_email, subject, html_content):
         logger.warning("Brevo SMTP not configured (BREVO_SMTP_LOGIN or BREVO_API_KEY missing). Skipping email to %s", to_email)
         return False
 
+    breaker = get_breaker("email")
+    if not breaker.allow():
+        logger.warning("Brevo SMTP circuit open, failing fast for %s", to_email)
+        return False
+
     try:
-        msg = MIMEMultipart("alternative")
+        body = MIMEMultipart("alternative")
+        body.attach(MIMEText(text_content or html_to_text(html_content), "plain"))
+        body.attach(MIMEText(html_content, "html"))
+        if attachments:
+            msg = MIMEMultipart("mixed")
+            msg.attach(body)
+            for filename, content, mime_type in attachments:
+                part = MIMEText(content, mime_type.split("/", 1)[1], "utf-8")
+                part.add_header("Content-Disposition", "attachment", filename=filename)
+                msg.attach(part)
+        else:
+            msg = body
         msg["From"] = f"{from_name} <{from_email}>"
         msg["To"] = to_email
         msg["Subject"] = subject
-        msg.attach(MIMEText(html_content, "html"))
+        if message_id:
+            msg["Message-ID"] = message_id
+        for name, value in (headers or {}).items():
+            msg[name] = value
 
-        with smtplib.SMTP("smtp-relay.brevo.com", 587) as server:
-            server.starttls()
-            server.login(smtp_login, smtp_password)
-            server.send_message(msg)
+        get_smtp_pool().send_message(msg)
 
+        breaker.record_success()
         logger.info("Email sent to %s via Brevo SMTP", to_email)
         return True
+    except smtplib.SMTPRecipientsRefused as e:
+        # The relay is up and answered; only this message was rejected.
+        breaker.record_success()
+        logger.error("Brevo SMTP rejected email to %s: %s", to_email, e)
+        return False
     except Exception as e:
+        breaker.record_failure()
         logger.error("Failed to send email to %s via Brevo SMTP: %s", to_email, e)
         return False
 
 
 def build_reminder_sms(client_name, service_name, booking_time):
     """Build SMS reminder text (keep under 160 chars)."""
-    return (
-        f"Hi {client_name}! Reminder: your {service_name} at HoPono is "
-        f"tomorrow at {booking_time}. Questions? Call +35796537959. See you soon!"
-    )
+    return render_message(
+        "reminder", client_name=client_name, service_name=service_name, booking_time=booking_time,
+    ).sms
 
 
 def build_reminder_email(client_name, service_name, booking_date, booking_time):
-    """Build HTML email for appointment reminder."""
-    return f"""
-    <div style="font-family: 'Helvetica Neue', Arial, sans-serif; max-width: 600px; margin: 0 auto; background-color: #0c1117; border-radius: 16px; overflow: hidden;">
-        <div style="background-color: #161b22; padding: 32px; text-align: center; border-bottom: 1px solid rgba(255,255,255,0.05);">
-            <h1 style="color: #dba11d; font-family: Georgia, serif; margin: 0; font-size: 28px; font-weight: 400; letter-spacing: 1px;">
-                HoPono Massage
-            </h1>
-            <p style="color: rgba(255,255,255,0.3); font-size: 12px; margin: 8px 0 0 0; text-transform: uppercase; letter-spacing: 2px;">
-                Nicosia, Cyprus
-            </p>
-        </div>
-        <div style="padding: 36px 32px;">
-            <h2 style="color: #dba11d; font-size: 20px; font-weight: 500; margin: 0 0 20px 0;">
-                Appointment Reminder
-            </h2>
-            <p style="color: rgba(255,255,255,0.7); font-size: 15px; line-height: 1.6; margin: 0 0 12px 0;">
-                Hi {client_name},
-            </p>
-            <p style="color: rgba(255,255,255,0.5); font-size: 15px; line-height: 1.6; margin: 0 0 24px 0;">
-                This is a friendly reminder about your upcoming appointment:
-            </p>
-            <div style="background-color: #161b22; padding: 24px; border-radius: 12px; border: 1px solid rgba(255,255,255,0.05); margin: 0 0 24px 0;">
-                <table style="width: 100%; border-collapse: collapse;">
-                    <tr>
-                        <td style="padding: 8px 0; color: rgba(255,255,255,0.4); font-size: 14px; width: 80px;">Service</td>
-                        <td style="padding: 8px 0; color: white; font-size: 14px; font-weight: 600;">{service_name}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px 0; color: rgba(255,255,255,0.4); font-size: 14px;">Date</td>
-                        <td style="padding: 8px 0; color: white; font-size: 14px; font-weight: 600;">{booking_date}</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px 0; color: rgba(255,255,255,0.4); font-size: 14px;">Time</td>
-                        <td style="padding: 8px 0; color: #dba11d; font-size: 14px; font-weight: 600;">{booking_time}</td>
-                    </tr>
-                </table>
-            </div>
-            <p style="color: rgba(255,255,255,0.5); font-size: 14px; line-height: 1.6; margin: 0 0 8px 0;">
-                If you need to reschedule or have any questions, please contact us at
-                <a href="tel:+35796537959" style="color: #dba11d; text-decoration: none;">+357 96 537 959</a>.
-            </p>
-            <p style="color: rgba(255,255,255,0.5); font-size: 14px; line-height: 1.6; margin: 0;">
-                We look forward to seeing you!
-            </p>
-        </div>
-        <div style="background-color: #161b22; padding: 20px 32px; text-align: center; border-top: 1px solid rgba(255,255,255,0.05);">
-            <p style="color: rgba(255,255,255,0.2); font-size: 12px; margin: 0;">
-                &copy; HoPono Massage Studio &middot; Nicosia, Cyprus
-            </p>
-        </div>
-    </div>
-    """
+    """Build the reminder email; returns a RenderedMessage with subject, html and text."""
+    return render_message(
+        "reminder",
+        client_name=client_name,
+        service_name=service_name,
+        booking_date=booking_date,
+        booking_time=booking_time,
+    )
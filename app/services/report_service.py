@@ -0,0 +1,146 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.reminder_log import ReminderLog
+from app.services.outbox_service import get_reminder_hours_before
+
+# Reports cover at most this many days, so every query stays an index range
+# scan no matter how much history the log holds.
+MAX_REPORT_DAYS = 366
+
+# Receipt statuses (see delivery_service) that mean the provider gave up.
+DELIVERY_FAILURES = {"undelivered", "rejected", "expired", "bounced", "blocked"}
+
+
+def _minutes_after_start():
+    """SQL for how long after the booking's start its reminder went out (negative = before)."""
+    if db.engine.dialect.name == "sqlite":
+        start = func.julianday(Booking.date.op("||")(" ").op("||")(Booking.start_time))
+        return (func.julianday(ReminderLog.sent_at) - start) * 1440
+    return func.extract("epoch", ReminderLog.sent_at - (Booking.date + Booking.start_time)) / 60
+
+
+def _rate(part, whole):
+    return round(100 * part / whole, 1) if whole else None
+
+
+def get_reminder_report(date_from=None, date_to=None):
+    """
+    Reminder delivery for bookings dated date_from..date_to (default: the
+    last 30 days), all from grouped queries over reminder_log.
+
+    Returns dict with keys: date_from, date_to, hours_before, bookings,
+    reached, reach_rate, channels, fallbacks, retries_recovered,
+    failure_reasons, daily
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise ValueError("The start date must be before the end date.")
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise ValueError(f"Reports cover at most {MAX_REPORT_DAYS} days.")
+    hours_before = get_reminder_hours_before()
+    in_range = Booking.date.between(date_from, date_to)
+
+    # One row per (channel, status, delivery status); lateness only means anything for sent rows.
+    rows = (
+        db.session.query(
+            ReminderLog.type,
+            ReminderLog.status,
+            ReminderLog.delivery_status,
+            func.count(ReminderLog.id),
+            func.avg(_minutes_after_start()),
+        )
+        .join(Booking, Booking.id == ReminderLog.booking_id)
+        .filter(in_range)
+        .group_by(ReminderLog.type, ReminderLog.status, ReminderLog.delivery_status)
+        .all()
+    )
+    channels = {}
+    lateness = defaultdict(float)
+    for channel, status, delivery_status, count, avg_after_start in rows:
+        stats = channels.setdefault(channel, {
+            "channel": channel, "sent": 0, "failed": 0, "delivered": 0, "undelivered": 0,
+        })
+        if status == "sent":
+            stats["sent"] += count
+            lateness[channel] += count * float(avg_after_start or 0)
+            if delivery_status == "delivered":
+                stats["delivered"] += count
+            elif delivery_status in DELIVERY_FAILURES:
+                stats["undelivered"] += count
+        elif status == "failed":
+            stats["failed"] += count
+    for channel, stats in channels.items():
+        after_start = lateness[channel] / stats["sent"] if stats["sent"] else None
+        stats["success_rate"] = _rate(stats["sent"], stats["sent"] + stats["failed"])
+        stats["delivery_rate"] = _rate(stats["delivered"], stats["sent"])
+        stats["avg_lead_minutes"] = round(-after_start, 1) if after_start is not None else None
+        # Against the current reminder_hours_before; past changes to the setting skew old bookings.
+        stats["avg_late_minutes"] = round(after_start + hours_before * 60, 1) if after_start is not None else None
+
+    # A booking has at most one failed and one sent row (the last failure is kept),
+    # so a failed row next to a sent one is a fallback or a successful retry.
+    failed_log = aliased(ReminderLog)
+    sent_log = aliased(ReminderLog)
+    recovered = (
+        db.session.query(failed_log.type, sent_log.type, func.count(failed_log.id))
+        .join(sent_log, and_(sent_log.booking_id == failed_log.booking_id, sent_log.status == "sent"))
+        .join(Booking, Booking.id == failed_log.booking_id)
+        .filter(failed_log.status == "failed", in_range)
+        .group_by(failed_log.type, sent_log.type)
+        .all()
+    )
+    fallbacks = [
+        {"from": from_type, "to": to_type, "count": count}
+        for from_type, to_type, count in recovered if from_type != to_type
+    ]
+    retries_recovered = sum(count for from_type, to_type, count in recovered if from_type == to_type)
+
+    reasons = (
+        db.session.query(ReminderLog.type, ReminderLog.error_message, func.count(ReminderLog.id))
+        .join(Booking, Booking.id == ReminderLog.booking_id)
+        .filter(ReminderLog.status == "failed", in_range)
+        .group_by(ReminderLog.type, ReminderLog.error_message)
+        .order_by(func.count(ReminderLog.id).desc())
+        .limit(10)
+        .all()
+    )
+
+    # Send volume per day; served by the (status, sent_at) index.
+    day = func.date(ReminderLog.sent_at)
+    daily = defaultdict(lambda: {"sms": 0, "email": 0})
+    for sent_on, channel, count in (
+        db.session.query(day, ReminderLog.type, func.count(ReminderLog.id))
+        .filter(
+            ReminderLog.status == "sent",
+            ReminderLog.sent_at >= datetime.combine(date_from, time.min),
+            ReminderLog.sent_at < datetime.combine(date_to + timedelta(days=1), time.min),
+        )
+        .group_by(day, ReminderLog.type)
+        .all()
+    ):
+        daily[str(sent_on)][channel] = count
+
+    reached = sum(stats["sent"] for stats in channels.values())
+    failed = sum(stats["failed"] for stats in channels.values())
+    attempted = reached + failed - sum(count for _, _, count in recovered)
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "hours_before": hours_before,
+        "bookings": attempted,
+        "reached": reached,
+        "reach_rate": _rate(reached, attempted),
+        "channels": sorted(channels.values(), key=lambda c: c["channel"]),
+        "fallbacks": fallbacks,
+        "retries_recovered": retries_recovered,
+        "failure_reasons": [
+            {"channel": channel, "reason": reason or "unknown", "count": count}
+            for channel, reason, count in reasons
+        ],
+        "daily": [{"date": d, **counts} for d, counts in sorted(daily.items())],
+    }
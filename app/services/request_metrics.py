@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the latency buckets in seconds; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED = "(unmatched)"
+
+# [query count, DB seconds] of the sampled request running in this context, else None.
+_request_sql = ContextVar("request_sql", default=None)
+_sql_listeners_installed = False
+
+
+class _EndpointStats:
+    __slots__ = ("buckets", "count", "seconds", "errors", "queries", "query_seconds", "max_queries")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.errors = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.max_queries = 0
+
+
+def _bucket_index(seconds):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+def _quantile(buckets, count, q):
+    """Estimate a latency quantile from bucket counts, interpolating inside the bucket."""
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+            if i == len(LATENCY_BUCKETS):
+                return lower  # open-ended bucket: all we know is "more than this"
+            return lower + (LATENCY_BUCKETS[i] - lower) * (rank - seen) / n
+        seen += n
+    return LATENCY_BUCKETS[-1]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    Per-process latency histograms and SQL totals, keyed by (endpoint, method).
+    Only sampled requests are recorded, so counts are those of the sample.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.since = datetime.utcnow()
+
+    def observe(self, endpoint, method, status, seconds, queries, query_seconds):
+        key = (endpoint or UNMATCHED, method)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats()
+            stats.buckets[_bucket_index(seconds)] += 1
+            stats.count += 1
+            stats.seconds += seconds
+            if status >= 500:
+                stats.errors += 1
+            stats.queries += queries
+            stats.query_seconds += query_seconds
+            stats.max_queries = max(stats.max_queries, queries)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.since = datetime.utcnow()
+
+    def _copy(self):
+        with self._lock:
+            return self.since, [
+                (endpoint, method, list(s.buckets), s.count, s.seconds, s.errors,
+                 s.queries, s.query_seconds, s.max_queries)
+                for (endpoint, method), s in self._stats.items()
+            ]
+
+    def snapshot(self):
+        """
+        Returns dict with keys: since, endpoints (list of dicts with keys:
+        endpoint, method, count, errors, avg_ms, p50_ms, p95_ms, p99_ms,
+        total_seconds, avg_queries, max_queries, avg_db_ms, db_share)
+        """
+        since, rows = self._copy()
+
+        def ms(seconds):
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        endpoints = []
+        for endpoint, method, buckets, count, seconds, errors, queries, query_seconds, max_queries in rows:
+            endpoints.append({
+                "endpoint": endpoint,
+                "method": method,
+                "count": count,
+                "errors": errors,
+                "avg_ms": ms(seconds / count),
+                "p50_ms": ms(_quantile(buckets, count, 0.5)),
+                "p95_ms": ms(_quantile(buckets, count, 0.95)),
+                "p99_ms": ms(_quantile(buckets, count, 0.99)),
+                "total_seconds": round(seconds, 3),
+                "avg_queries": round(queries / count, 1),
+                "max_queries": max_queries,
+                "avg_db_ms": ms(query_seconds / count),
+                "db_share": round(100 * query_seconds / seconds, 1) if seconds else None,
+            })
+        endpoints.sort(key=lambda e: e["total_seconds"], reverse=True)
+        return {"since": since, "endpoints": endpoints}
+
+    def prometheus(self, sample_rate):
+        """The metrics in the Prometheus text exposition format (0.0.4)."""
+        _, rows = self._copy()
+        rows.sort()
+        out = [
+            "# HELP hopono_metrics_sample_rate Share of requests recorded by this process.",
+            "# TYPE hopono_metrics_sample_rate gauge",
+            f"hopono_metrics_sample_rate {sample_rate}",
+            "# HELP hopono_http_request_duration_seconds Latency of sampled requests by endpoint.",
+            "# TYPE hopono_http_request_duration_seconds histogram",
+        ]
+        for endpoint, method, buckets, count, seconds, *_ in rows:
+            labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += n
+                out.append(f'hopono_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            out.append(f"hopono_http_request_duration_seconds_sum{{{labels}}} {seconds}")
+            out.append(f"hopono_http_request_duration_seconds_count{{{labels}}} {count}")
+        for name, help_text, index in (
+            ("hopono_http_request_errors_total", "Sampled requests that returned a 5xx.", 5),
+            ("hopono_http_request_sql_queries_total", "SQL statements run by sampled requests.", 6),
+            ("hopono_http_request_sql_seconds_total", "Time sampled requests spent in SQL statements.", 7),
+        ):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            for row in rows:
+                out.append(f'{name}{{endpoint="{_label(row[0])}",method="{row[1]}"}} {row[index]}')
+        return "\n".join(out) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+# The start time lives on the statement's execution context, which is discarded
+# with it, so a statement that raises leaves nothing behind on the connection.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_sql.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    totals = _request_sql.get()
+    started = getattr(context, "_metrics_started", None)
+    if totals is not None and started is not None:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def init_request_metrics(app):
+    """
+    Record latency, query count and DB time for a METRICS_SAMPLE_RATE share
+    of requests. Unsampled requests cost one random() call; with a rate of
+    0 nothing is hooked at all.
+    """
+    global _sql_listeners_installed
+    sample_rate = app.config.get("METRICS_SAMPLE_RATE", 1.0)
+    if sample_rate <= 0:
+        return
+    if not _sql_listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _sql_listeners_installed = True
+
+    @app.before_request
+    def _start_request_metrics():
+        if sample_rate >= 1 or random.random() < sample_rate:
+            g._metrics_started = time.perf_counter()
+            _request_sql.set([0, 0.0])
+
+    @app.after_request
+    def _response_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_request_metrics(exc):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        queries, query_seconds = _request_sql.get()
+        _request_sql.set(None)
+        status = 500 if exc is not None else g.get("_metrics_status", 500)
+        metrics.observe(request.endpoint, request.method, status,
+                        time.perf_counter() - started, queries, query_seconds)
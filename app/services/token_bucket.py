@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens are added per second up to
+    `capacity`, and each send takes one. Callers never block on it: they
+    size their work with available(), take() what they use, and come back
+    after wait_time().
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self):
+        """Whole tokens that can be taken right now."""
+        with self._lock:
+            self._refill()
+            return max(int(self._tokens), 0)
+
+    def take(self, count):
+        """Take `count` tokens without waiting (callers size `count` with available())."""
+        with self._lock:
+            self._refill()
+            self._tokens -= count
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is now)."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.rate)
@@ -0,0 +1,18 @@
+import logging
+from app.services.archive_service import MIN_ARCHIVE_MONTHS, archive_bookings, archive_cutoff, get_archive_months
+
+logger = logging.getLogger(__name__)
+
+
+def run_archival(app):
+    with app.app_context():
+        months = get_archive_months()
+        if months <= 0:
+            logger.info("Booking archival disabled (archive_after_months=%d), skipping", months)
+            return
+        months = max(months, MIN_ARCHIVE_MONTHS)
+
+        cutoff = archive_cutoff(months)
+        logger.info("Booking archival running: moving bookings dated before %s", cutoff)
+        count = archive_bookings(cutoff, batch_size=app.config.get("ARCHIVE_BATCH_SIZE", 500))
+        logger.info("Booking archival completed. Archived %d bookings.", count)
@@ -0,0 +1,80 @@
+import io
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from app.services.ical import STUDIO_LOCATION, fold, stream_calendar
+
+# Names with Greek and accented letters, so folding has multibyte sequences to respect.
+_NAMES = ["Ανδρέας Παπαδόπουλος", "Maria Georgiou", "Zoë Müller-Lüdenscheidt", "Ελένη Χριστοδούλου"]
+_SERVICES = ["Deep Tissue Massage", "Lomi Lomi; Hawaiian, 90 min", "Θεραπευτικό Μασάζ"]
+
+
+def _events(count):
+    start = datetime(2026, 1, 5, 9, 0)
+    stamp = datetime(2026, 1, 1)
+    for i in range(count):
+        begins = start + timedelta(days=i // 8, hours=i % 8)
+        name = _NAMES[i % len(_NAMES)]
+        service = _SERVICES[i % len(_SERVICES)]
+        yield {
+            "uid": f"hopono-booking-{i}@hopono.com",
+            "start": begins,
+            "end": begins + timedelta(minutes=60),
+            "summary": f"HoPono: {service} - {name}",
+            "dtstamp": stamp,
+            "description": (
+                f"Client: {name}\n"
+                f"Phone: +3579900{i % 10000:04d}\n"
+                f"Email: bench{i}@example.invalid\n"
+                f"Service: {service} (60min)\n"
+                f"Price: €55.00\n"
+                f"Status: Confirmed"
+            ),
+            "location": STUDIO_LOCATION,
+        }
+
+
+def run_benchmark(events=10000, chunk_size=64 * 1024):
+    """
+    Stream a synthetic `events`-event export through the iCalendar writer
+    and measure it. No database is involved: this times the writer alone.
+
+    Returns dict with keys: events, bytes, chunks, elapsed, throughput,
+    megabytes_per_second, peak_memory, fold_lines, fold_elapsed
+    """
+    def export():
+        size = chunks = 0
+        for chunk in stream_calendar(_events(events), prodid="-//HoPono Massage//Benchmark//EN", chunk_size=chunk_size):
+            size += len(chunk)
+            chunks += 1
+        return size, chunks
+
+    started = time.perf_counter()
+    size, chunks = export()
+    elapsed = time.perf_counter() - started
+
+    # Memory on a second run: tracing slows everything down too much to time under it.
+    tracemalloc.start()
+    export()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # The folder on its own, over long multibyte lines.
+    line = ("DESCRIPTION:" + "Θεραπευτικό Μασάζ\\, Nicosia\\n" * 20).encode("utf-8")
+    sink = io.BytesIO()
+    fold_started = time.perf_counter()
+    for _ in range(events):
+        sink.write(fold(line))
+    fold_elapsed = time.perf_counter() - fold_started
+
+    return {
+        "events": events,
+        "bytes": size,
+        "chunks": chunks,
+        "elapsed": elapsed,
+        "throughput": events / elapsed if elapsed else 0.0,
+        "megabytes_per_second": size / elapsed / 1e6 if elapsed else 0.0,
+        "peak_memory": peak_memory,
+        "fold_lines": events,
+        "fold_elapsed": fold_elapsed,
+    }
@@ -0,0 +1,10 @@
+import logging
+from app.services.campaign_service import advance_campaigns
+
+logger = logging.getLogger(__name__)
+
+
+def run_campaigns(app):
+    """Fan out running campaigns into the outbox and close finished ones."""
+    with app.app_context():
+        advance_campaigns(app.config.get("CAMPAIGN_CHUNK_SIZE", 500))
@@ -0,0 +1,19 @@
+import logging
+from app.extensions import db
+from app.models.settings import Setting
+from app.services.gdpr_service import anonymize_inactive_clients
+
+logger = logging.getLogger(__name__)
+
+
+def run_retention(app):
+    with app.app_context():
+        setting = db.session.get(Setting, "retention_years")
+        years = int(setting.value) if setting else 0
+        if years <= 0:
+            logger.info("Data retention disabled (retention_years=%d), skipping", years)
+            return
+
+        logger.info("Data retention running: anonymizing clients inactive for %d years", years)
+        count = anonymize_inactive_clients(years)
+        logger.info("Data retention completed. Anonymized %d clients.", count)
@@ -0,0 +1,19 @@
+import logging
+from app.services.delivery_service import fold_delivery_events, prune_delivery_events
+
+logger = logging.getLogger(__name__)
+
+
+def process_delivery_receipts(app):
+    """Fold every queued webhook event into ReminderLog/Client, then drop old processed events."""
+    with app.app_context():
+        batch_size = app.config.get("DELIVERY_EVENT_BATCH_SIZE", 500)
+        total = 0
+        while True:
+            count = fold_delivery_events(batch_size)
+            total += count
+            if count < batch_size:
+                break
+        pruned = prune_delivery_events(app.config.get("DELIVERY_EVENT_RETENTION_DAYS", 30))
+        if total or pruned:
+            logger.info("Delivery receipts: processed %d event(s), pruned %d", total, pruned)
@@ -0,0 +1,128 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.scheduler_lease import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+
+# Unique per process, readable in devtools: host, pid and a short random tag
+# so a recycled pid never inherits a dead process's lease.
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+_state = {"is_leader": False, "expires_at": None}
+_state_lock = threading.Lock()
+
+
+def is_leader():
+    """True while this process holds an unexpired scheduler lease."""
+    with _state_lock:
+        return _state["is_leader"] and _state["expires_at"] > datetime.utcnow()
+
+
+def _set_state(leader, expires_at=None):
+    with _state_lock:
+        was_leader = _state["is_leader"]
+        _state["is_leader"] = leader
+        _state["expires_at"] = expires_at
+    if leader and not was_leader:
+        logger.info("Process %s became scheduler leader", PROCESS_ID)
+    elif was_leader and not leader:
+        logger.warning("Process %s lost scheduler leadership", PROCESS_ID)
+
+
+def try_acquire_leadership(app):
+    """
+    Take or renew the scheduler lease. A single conditional UPDATE succeeds
+    only if this process already holds the lease or the current one has
+    expired, so at most one process can win. Returns True if this process
+    is the leader.
+    """
+    lease_seconds = app.config.get("SCHEDULER_LEASE_SECONDS", 45)
+    with app.app_context():
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        try:
+            updated = SchedulerLease.query.filter(
+                SchedulerLease.name == LEASE_NAME,
+                or_(SchedulerLease.holder == PROCESS_ID, SchedulerLease.expires_at < now),
+            ).update(
+                {
+                    SchedulerLease.acquired_at: db.case(
+                        (SchedulerLease.holder == PROCESS_ID, SchedulerLease.acquired_at), else_=now
+                    ),
+                    SchedulerLease.holder: PROCESS_ID,
+                    SchedulerLease.renewed_at: now,
+                    SchedulerLease.expires_at: expires_at,
+                },
+                synchronize_session=False,
+            )
+            if not updated and not db.session.get(SchedulerLease, LEASE_NAME):
+                db.session.add(SchedulerLease(
+                    name=LEASE_NAME,
+                    holder=PROCESS_ID,
+                    acquired_at=now,
+                    renewed_at=now,
+                    expires_at=expires_at,
+                ))
+                updated = 1
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            updated = 0
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Scheduler lease heartbeat failed: %s", e)
+            updated = 0
+
+    _set_state(bool(updated), expires_at if updated else None)
+    return bool(updated)
+
+
+def release_leadership(app):
+    """Give up the lease on shutdown so another process takes over immediately."""
+    if not is_leader():
+        return
+    try:
+        with app.app_context():
+            SchedulerLease.query.filter_by(name=LEASE_NAME, holder=PROCESS_ID).update(
+                {SchedulerLease.expires_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+    except Exception as e:
+        logger.error("Failed to release scheduler lease: %s", e)
+    _set_state(False)
+
+
+def leader_only(func):
+    """Wrap a scheduled job so it only runs in the process holding the lease."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_leader():
+            logger.debug("Skipping %s: not the scheduler leader", func.__name__)
+            return None
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def get_leader_status():
+    """Returns dict with keys: process_id, is_leader, holder, acquired_at, renewed_at, expires_at, expired"""
+    lease = db.session.get(SchedulerLease, LEASE_NAME)
+    return {
+        "process_id": PROCESS_ID,
+        "is_leader": is_leader(),
+        "holder": lease.holder if lease else None,
+        "acquired_at": lease.acquired_at if lease else None,
+        "renewed_at": lease.renewed_at if lease else None,
+        "expires_at": lease.expires_at if lease else None,
+        "expired": lease.expires_at < datetime.utcnow() if lease else True,
+    }
@@ -0,0 +1,396 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.campaign import Campaign
+from app.services.campaign_service import CAMPAIGN_CHANNELS, unsubscribe_url_builder
+from app.models.reminder_log import ReminderLog
+from app.services.calendar_service import generate_ics
+from app.services.message_templates import render_message
+from app.services.outbox_service import (
+    BOOKING_NOTICE_KINDS,
+    claim_batch,
+    defer,
+    get_channel_settings,
+    get_reminder_hours_before,
+    has_due_campaign_messages,
+    mark_sent,
+    mark_failed,
+    mark_skipped,
+    pick_notice_channel,
+    reminder_due_at,
+)
+from app.services.reminder_service import send_sms, send_sms_bulk, send_email, close_smtp_pool
+from app.services.token_bucket import TokenBucket
+from app.tasks.leader import is_leader
+from app.tasks.send_reminders import (
+    init_channel_limits,
+    channel_slot,
+    snapshot_booking,
+    dispatch_reminder,
+    commit_reminder_logs,
+)
+
+logger = logging.getLogger(__name__)
+
+# A reminder claimed more than this far ahead of its due time (the booking was
+# moved later) is put back for the new time instead of being sent.
+EARLY_TOLERANCE = timedelta(minutes=2)
+
+# Messages of a paused campaign are looked at again after this long.
+PAUSED_CAMPAIGN_RECHECK = timedelta(minutes=5)
+
+_drain_lock = threading.Lock()
+_drain_again = threading.Event()
+_campaign_buckets = {}
+_buckets_lock = threading.Lock()
+_campaign_timer = None
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _deliver(channel, recipient, subject, body, text=None, attachments=None, headers=None):
+    with channel_slot(channel):
+        if channel == "sms":
+            ok = send_sms(recipient, body)
+        else:
+            ok = send_email(recipient, subject, body, text, attachments, headers=headers)
+    return ok, []
+
+
+def _campaign_bucket(app, channel):
+    """Process-wide token bucket holding campaign sends on a channel to the configured rate."""
+    with _buckets_lock:
+        bucket = _campaign_buckets.get(channel)
+        if bucket is None:
+            key = "CAMPAIGN_SMS_PER_SECOND" if channel == "sms" else "CAMPAIGN_EMAIL_PER_SECOND"
+            bucket = TokenBucket(app.config.get(key, 2 if channel == "sms" else 5))
+            _campaign_buckets[channel] = bucket
+        return bucket
+
+
+def _sendable_campaign_messages(messages):
+    """
+    Campaign messages that can go now; hold back paused campaigns and skip
+    deleted ones. The rate limit was applied when the messages were claimed,
+    so nothing here waits on a token.
+    """
+    campaign_ids = {m.campaign_id for m in messages}
+    statuses = dict(
+        db.session.query(Campaign.id, Campaign.status).filter(Campaign.id.in_(campaign_ids))
+    )
+    now = datetime.utcnow()
+
+    sendable = []
+    for msg in messages:
+        status = statuses.get(msg.campaign_id)
+        if status == "paused":
+            defer(msg, now + PAUSED_CAMPAIGN_RECHECK)
+        elif status is None:
+            mark_skipped(msg, "campaign deleted")
+        else:
+            sendable.append(msg)
+    return sendable
+
+
+def _deliver_sms_bulk(pairs):
+    """Send (phone, text) pairs in as few provider requests as possible; one ok per pair."""
+    with channel_slot("sms"):
+        return send_sms_bulk(pairs)
+
+
+def _sends_campaigns(app):
+    """
+    Whether this process may claim campaign messages. The token buckets are
+    per process, so only one process sends campaigns: the dedicated worker
+    when OUTBOX_EMBEDDED_WORKER is off, else the scheduler leader. Every
+    other drain passes campaign limits of 0 and sends transactional mail only.
+    """
+    return not app.config.get("OUTBOX_EMBEDDED_WORKER", True) or is_leader()
+
+
+def campaign_retry_delay(app):
+    """
+    Seconds until a campaign held back by its rate limit can send again, or
+    None if no campaign message is waiting on a token. Needs an app context.
+    """
+    if not _sends_campaigns(app):
+        return None
+    delays = [
+        _campaign_bucket(app, channel).wait_time()
+        for channel in CAMPAIGN_CHANNELS
+        if not _campaign_bucket(app, channel).available() and has_due_campaign_messages(channel)
+    ]
+    return min(delays) if delays else None
+
+
+def _notice_tasks(messages):
+    """
+    Render booking confirmations/cancellations from the current booking and
+    build their send callables. Confirmation emails carry the ICS.
+    """
+    bookings = {
+        b.id: b
+        for b in Booking.query.filter(Booking.id.in_([m.booking_id for m in messages]))
+        .options(db.joinedload(Booking.client), db.joinedload(Booking.service))
+    }
+    sms_enabled, email_enabled = get_channel_settings()
+
+    tasks = {}
+    for msg in messages:
+        booking = bookings.get(msg.booking_id)
+        if booking is None or booking.status != BOOKING_NOTICE_KINDS[msg.kind]:
+            mark_skipped(msg, f"booking no longer {BOOKING_NOTICE_KINDS[msg.kind]}")
+            continue
+        client = booking.client
+        if client.anonymized_at:
+            mark_skipped(msg, "client anonymized")
+            continue
+        channel = pick_notice_channel(client, sms_enabled, email_enabled)
+        if channel is None:
+            mark_skipped(msg, "no channel available")
+            continue
+
+        rendered = render_message(
+            msg.kind,
+            client_name=client.name,
+            service_name=booking.service.name,
+            booking_date=booking.date.strftime("%B %d, %Y"),
+            booking_time=booking.start_time.strftime("%H:%M"),
+        )
+        if channel == "sms":
+            msg.channel, msg.recipient = "sms", client.phone
+            tasks[msg.id] = partial(_deliver, "sms", client.phone, None, rendered.sms)
+        else:
+            msg.channel, msg.recipient = "email", client.email
+            attachments = None
+            if msg.kind == "confirmation":
+                attachments = [("hopono-booking.ics", generate_ics(booking), "text/calendar")]
+            tasks[msg.id] = partial(
+                _deliver, "email", client.email, rendered.subject, rendered.html, rendered.text, attachments,
+            )
+    return tasks
+
+
+def _reminder_tasks(messages):
+    """Build send callables for reminder messages; skip ones that no longer apply."""
+    booking_ids = [m.booking_id for m in messages]
+    bookings = {
+        b.id: b
+        for b in Booking.query.filter(Booking.id.in_(booking_ids))
+        .options(db.joinedload(Booking.client), db.joinedload(Booking.service))
+    }
+    already_sent = {
+        booking_id for (booking_id,) in db.session.query(ReminderLog.booking_id).filter(
+            ReminderLog.booking_id.in_(booking_ids),
+            ReminderLog.status == "sent",
+        )
+    }
+    sms_enabled, email_enabled = get_channel_settings()
+    hours_before = get_reminder_hours_before()
+    now = datetime.utcnow()
+
+    tasks = {}
+    for msg in messages:
+        booking = bookings.get(msg.booking_id)
+        if booking is None or booking.status != "confirmed":
+            mark_skipped(msg, "booking no longer confirmed")
+            continue
+        if booking.id in already_sent:
+            mark_skipped(msg, "reminder already sent")
+            continue
+        due = reminder_due_at(booking.date, booking.start_time, hours_before)
+        if due > now + EARLY_TOLERANCE:
+            defer(msg, due)
+        else:
+            job = snapshot_booking(booking)
+            tasks[msg.id] = lambda job=job: dispatch_reminder(job, sms_enabled, email_enabled)[1:]
+    return tasks
+
+
+def process_batch(app, worker_id=None, batch_size=None):
+    """
+    Claim one batch of due outbound messages, send them through the bounded
+    pool and record the outcome. Returns the number of messages claimed.
+
+    Delivery is at-least-once: if the process dies after sending but before
+    committing, the message is re-sent once its lease expires.
+    """
+    with app.app_context():
+        init_channel_limits(app)
+        worker_id = worker_id or _worker_id()
+        batch_size = batch_size or app.config.get("OUTBOX_BATCH_SIZE", 50)
+
+        # Campaign messages are claimed only as fast as their channel's bucket refills
+        buckets = {channel: _campaign_bucket(app, channel) for channel in CAMPAIGN_CHANNELS}
+        campaigns = _sends_campaigns(app)
+        messages = claim_batch(
+            worker_id, batch_size,
+            campaign_limits={
+                channel: bucket.available() if campaigns else 0 for channel, bucket in buckets.items()
+            },
+        )
+        if not messages:
+            return 0
+        for channel, bucket in buckets.items():
+            bucket.take(sum(1 for m in messages if m.campaign_id and m.channel == channel))
+
+        reminders = [m for m in messages if m.kind == "reminder"]
+        notices = [m for m in messages if m.kind in BOOKING_NOTICE_KINDS]
+        campaign_messages = [m for m in messages if m.campaign_id]
+        tasks = _reminder_tasks(reminders) if reminders else {}
+        if notices:
+            tasks.update(_notice_tasks(notices))
+        plain = [m for m in messages if m.kind == "message" and not m.campaign_id]
+        if campaign_messages:
+            plain.extend(_sendable_campaign_messages(campaign_messages))
+        # Plain SMS (campaigns, day-closure notices) share bulk provider requests
+        bulk_sms = [m for m in plain if m.channel == "sms"]
+        unsubscribe_url = unsubscribe_url_builder() if any(m.campaign_id for m in plain) else None
+        for msg in plain:
+            if msg.channel != "sms":
+                headers = None
+                if msg.campaign_id and msg.client_id:
+                    # One-click unsubscribe (RFC 8058) for mail clients that offer it
+                    headers = {
+                        "List-Unsubscribe": f"<{unsubscribe_url(msg.client_id)}>",
+                        "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
+                    }
+                tasks[msg.id] = partial(
+                    _deliver, msg.channel, msg.recipient, msg.subject, msg.body, headers=headers,
+                )
+
+        max_workers = (
+            app.config.get("REMINDER_SMS_CONCURRENCY", 4)
+            + app.config.get("REMINDER_EMAIL_CONCURRENCY", 4)
+        )
+        results = {}
+        if tasks or bulk_sms:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="outbox") as pool:
+                bulk_future = None
+                if bulk_sms:
+                    bulk_future = pool.submit(_deliver_sms_bulk, [(m.recipient, m.body) for m in bulk_sms])
+                futures = {pool.submit(fn): msg_id for msg_id, fn in tasks.items()}
+                if bulk_future is not None:
+                    try:
+                        outcomes = bulk_future.result()
+                    except Exception as e:
+                        logger.error("Bulk SMS of %d outbound messages crashed: %s", len(bulk_sms), e)
+                        outcomes = [False] * len(bulk_sms)
+                    for msg, ok in zip(bulk_sms, outcomes):
+                        results[msg.id] = (ok, [])
+                for future in as_completed(futures):
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        logger.error("Outbound message #%d crashed: %s", futures[future], e)
+                        results[futures[future]] = (False, [])
+
+        logs = []
+        for msg in messages:
+            if msg.id not in results:
+                continue
+            ok, msg_logs = results[msg.id]
+            if ok:
+                mark_sent(msg)
+            elif msg.kind == "reminder":
+                errors = [log.error_message for log in msg_logs if log.status == "failed"]
+                mark_failed(msg, "; ".join(errors) or "no channel available")
+            else:
+                mark_failed(msg, f"{msg.channel} send failed")
+            # Record the retry schedule on the reminder log before the commit expires msg
+            retry_at = msg.next_attempt_at if msg.status == "pending" else None
+            for log in msg_logs:
+                log.attempt_count = msg.attempts
+                log.next_attempt_at = retry_at if log.status == "failed" else None
+            logs.extend(msg_logs)
+        db.session.commit()
+        commit_reminder_logs(logs)
+
+        sent = sum(1 for ok, _ in results.values() if ok)
+        logger.info("Outbox batch: claimed %d, sent %d, failed %d, skipped or deferred %d",
+                    len(messages), sent, len(results) - sent, len(messages) - len(results))
+        return len(messages)
+
+
+def drain_outbox(app):
+    """
+    Send everything currently due, batch by batch. Used by the embedded
+    scheduler job and wake_outbox. If another drain is already running it is
+    asked to make one more pass instead, so newly queued messages are not
+    left for the next tick.
+    """
+    while True:
+        if not _drain_lock.acquire(blocking=False):
+            _drain_again.set()
+            logger.info("Outbox drain already in progress, asked it to re-check")
+            return
+        try:
+            batch_size = app.config.get("OUTBOX_BATCH_SIZE", 50)
+            while True:
+                _drain_again.clear()
+                if process_batch(app, batch_size=batch_size) < batch_size and not _drain_again.is_set():
+                    break
+        finally:
+            close_smtp_pool()
+            _drain_lock.release()
+        # A wake that arrived between the last check and the release
+        if not _drain_again.is_set():
+            with app.app_context():
+                delay = campaign_retry_delay(app)
+            if delay is not None:
+                _schedule_drain(app, delay)
+            return
+
+
+def _schedule_drain(app, delay):
+    """Drain again once rate-limited campaign messages can go; one timer at a time."""
+    global _campaign_timer
+    if not app.config.get("OUTBOX_EMBEDDED_WORKER", True):
+        return
+    with _buckets_lock:
+        timer = _campaign_timer
+        if timer is not None and timer.is_alive() and timer is not threading.current_thread():
+            return
+        _campaign_timer = threading.Timer(delay, drain_outbox, args=(app,))
+        _campaign_timer.daemon = True
+        _campaign_timer.start()
+
+
+def wake_outbox(app):
+    """
+    Have a message queued by this request sent right away rather than on the
+    next scheduler tick. Drains in a background thread, so the request never
+    waits on a provider; with a dedicated worker its poll picks it up instead.
+    """
+    if not app.config.get("OUTBOX_EMBEDDED_WORKER", True):
+        return
+    threading.Thread(target=drain_outbox, args=(app,), daemon=True, name="outbox-wake").start()
+
+
+def run_worker(app, poll_seconds=None):
+    """Dedicated worker loop: claim and send batches until interrupted."""
+    poll_seconds = poll_seconds or app.config.get("OUTBOX_POLL_SECONDS", 5)
+    worker_id = _worker_id()
+    logger.info("Outbox worker %s started (poll every %ss)", worker_id, poll_seconds)
+    try:
+        while True:
+            with _drain_lock:
+                claimed = process_batch(app, worker_id=worker_id)
+            if not claimed:
+                close_smtp_pool()
+                with app.app_context():
+                    delay = campaign_retry_delay(app)
+                time.sleep(poll_seconds if delay is None else min(poll_seconds, delay))
+    except KeyboardInterrupt:
+        logger.info("Outbox worker %s stopping", worker_id)
+    finally:
+        close_smtp_pool()
@@ -0,0 +1,178 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect
+from app.extensions import db
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _seed(bookings, phone_share):
+    """Create one client and one confirmed booking per reminder, all due now."""
+    from app.models import Booking, Client, Service, Setting
+    from app.tasks.send_reminders import CYPRUS_TZ
+
+    db.session.add_all([
+        Setting(key="reminder_hours_before", value="24"),
+        Setting(key="sms_enabled", value="true"),
+        Setting(key="email_enabled", value="true"),
+    ])
+    service = Service(name="Benchmark Massage", duration_minutes=60, price_eur=50)
+    db.session.add(service)
+    db.session.flush()
+
+    phone_every = round(1 / phone_share) if phone_share else 0
+    clients = [
+        Client(
+            name=f"Bench Client {i}",
+            email=f"bench{i}@example.invalid",
+            phone=f"+3579900{i:04d}",
+            reminder_preference="phone" if phone_every and i % phone_every == 0 else "email",
+            gdpr_consent=True,
+        )
+        for i in range(bookings)
+    ]
+    db.session.add_all(clients)
+    db.session.flush()
+
+    start = datetime.now(CYPRUS_TZ).replace(tzinfo=None, second=0, microsecond=0) + timedelta(hours=2)
+    rows = []
+    for i, client in enumerate(clients):
+        begins = start + timedelta(minutes=i % 600)
+        ends = begins + timedelta(minutes=60)
+        rows.append(Booking(
+            client_id=client.id,
+            service_id=service.id,
+            date=begins.date(),
+            start_time=begins.time(),
+            end_time=ends.time(),
+            buffer_before=(begins - timedelta(minutes=30)).time(),
+            buffer_after=(ends + timedelta(minutes=30)).time(),
+            status="confirmed",
+        ))
+    db.session.add_all(rows)
+    db.session.commit()
+
+
+def run_benchmark(bookings=200, sms_latency=0.05, email_latency=0.05, failure_rate=0.0,
+                  phone_share=0.5, database_url=None, seed=1):
+    """
+    Seed `bookings` due reminders in a throwaway database, run the reminder
+    pipeline against local fake providers and measure it.
+
+    `sent`, `retrying` and `failed` count bookings by the final state of
+    their reminder, so they add up to `bookings`: delivered, failed on every
+    channel with a retry scheduled, or given up on / never sent.
+    `bookings_with_failure` counts bookings that had a failed channel attempt
+    along the way, and `sent_after_failure` those of them that were delivered
+    anyway (on the other channel). Provider-level rejections, one per failed
+    call, are in `provider_rejections`.
+
+    Returns dict with keys: bookings, sent, retrying, failed,
+    bookings_with_failure, sent_after_failure, elapsed, throughput,
+    latency_p50, latency_p95, latency_p99, queries, queries_per_booking,
+    sms_accepted, email_accepted, provider_rejections
+    """
+    from app import create_app
+    from app.services import reminder_service
+    from app.services.fake_providers import FakeSMSServer, FakeSMTPServer
+    from app.tasks.send_reminders import check_and_send_reminders
+
+    workdir = None
+    if database_url is None:
+        workdir = tempfile.mkdtemp(prefix="hopono-bench-")
+        database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    smtp = FakeSMTPServer(latency=email_latency, failure_rate=failure_rate, seed=seed).start()
+    sms = FakeSMSServer(latency=sms_latency, failure_rate=failure_rate, seed=seed).start()
+    saved_env = {}
+    for key, value in {**smtp.env(), **sms.env()}.items():
+        saved_env[key] = os.environ.get(key)
+        os.environ[key] = value
+
+    try:
+        app = create_app(overrides={
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "OUTBOX_EMBEDDED_WORKER": True,
+        }, start_scheduler=False)
+        with app.app_context():
+            if inspect(db.engine).get_table_names():
+                raise ValueError("The benchmark database must be empty; it is seeded and dropped afterwards.")
+            db.create_all()
+            _seed(bookings, phone_share)
+
+            queries = [0]
+
+            def _count(*args):
+                queries[0] += 1
+
+            event.listen(db.engine, "before_cursor_execute", _count)
+            started = time.monotonic()
+            try:
+                check_and_send_reminders(app)
+            finally:
+                elapsed = time.monotonic() - started
+                event.remove(db.engine, "before_cursor_execute", _count)
+
+            from app.models import OutboundMessage, ReminderLog
+            outcomes = dict(
+                db.session.query(OutboundMessage.status, func.count(OutboundMessage.id))
+                .filter(OutboundMessage.kind == "reminder")
+                .group_by(OutboundMessage.status)
+            )
+            sent = outcomes.get("sent", 0)
+            retrying = outcomes.get("pending", 0) + outcomes.get("sending", 0)
+            failed = bookings - sent - retrying
+            bookings_with_failure = ReminderLog.query.filter_by(status="failed").count()
+            sent_after_failure = (
+                db.session.query(func.count(ReminderLog.id))
+                .filter(
+                    ReminderLog.status == "sent",
+                    ReminderLog.booking_id.in_(
+                        db.session.query(ReminderLog.booking_id).filter(ReminderLog.status == "failed")
+                    ),
+                )
+                .scalar()
+            )
+            db.drop_all()
+            db.engine.dispose()
+    finally:
+        smtp.stop()
+        sms.stop()
+        reminder_service.close_smtp_pool()
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if workdir:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+    latencies = sorted(arrived - started for arrived, _ in smtp.accepted + sms.accepted)
+    return {
+        "bookings": bookings,
+        "sent": sent,
+        "retrying": retrying,
+        "failed": failed,
+        "bookings_with_failure": bookings_with_failure,
+        "sent_after_failure": sent_after_failure,
+        "elapsed": elapsed,
+        "throughput": sent / elapsed if elapsed else 0.0,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "latency_p99": _percentile(latencies, 99),
+        "queries": queries[0],
+        "queries_per_booking": queries[0] / bookings if bookings else 0.0,
+        "sms_accepted": len(sms.accepted),
+        "email_accepted": len(smtp.accepted),
+        "provider_rejections": sms.rejected + smtp.rejected,
+    }
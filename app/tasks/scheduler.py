@@ -1,5 +1,7 @@
+import atexit
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 logger = logging.getLogger(__name__)
@@ -8,21 +10,84 @@ scheduler = BackgroundScheduler()
 
 
 def init_scheduler(app):
+    """
+    Start the scheduler in this process. Every gunicorn worker runs one, but
+    jobs are wrapped with leader_only so they execute only in the process
+    holding the database lease; the heartbeat job renews it, and a standby
+    takes over once a dead leader's lease expires.
+    """
     if scheduler.running:
         logger.info("Scheduler already running, skipping init")
         return
 
     from app.tasks.send_reminders import check_and_send_reminders
+    from app.tasks.data_retention import run_retention
+    from app.tasks.archival import run_archival
+    from app.tasks.outbox_worker import drain_outbox
+    from app.tasks.campaigns import run_campaigns
+    from app.tasks.delivery_receipts import process_delivery_receipts
+    from app.tasks.leader import leader_only, release_leadership, try_acquire_leadership
 
     scheduler.add_job(
-        func=check_and_send_reminders,
-        trigger=IntervalTrigger(minutes=15),
+        func=try_acquire_leadership,
+        trigger=IntervalTrigger(seconds=app.config.get("SCHEDULER_HEARTBEAT_SECONDS", 15)),
+        id="leader_heartbeat",
+        replace_existing=True,
+        kwargs={"app": app},
+    )
+    scheduler.add_job(
+        func=leader_only(check_and_send_reminders),
+        trigger=IntervalTrigger(minutes=app.config.get("REMINDER_SWEEP_MINUTES", 60)),
         id="reminder_check",
         replace_existing=True,
         kwargs={"app": app},
     )
+    scheduler.add_job(
+        func=leader_only(run_retention),
+        trigger=CronTrigger(hour=3, minute=30, timezone="Europe/Nicosia"),
+        id="data_retention",
+        replace_existing=True,
+        kwargs={"app": app},
+    )
+    scheduler.add_job(
+        func=leader_only(run_archival),
+        trigger=CronTrigger(hour=4, minute=0, timezone="Europe/Nicosia"),
+        id="booking_archival",
+        replace_existing=True,
+        kwargs={"app": app},
+    )
+    scheduler.add_job(
+        func=leader_only(run_campaigns),
+        trigger=IntervalTrigger(minutes=1),
+        id="campaign_fanout",
+        replace_existing=True,
+        kwargs={"app": app},
+    )
+    scheduler.add_job(
+        func=leader_only(process_delivery_receipts),
+        trigger=IntervalTrigger(minutes=1),
+        id="delivery_receipts",
+        replace_existing=True,
+        kwargs={"app": app},
+    )
+    if app.config.get("OUTBOX_EMBEDDED_WORKER", True):
+        scheduler.add_job(
+            func=leader_only(drain_outbox),
+            trigger=IntervalTrigger(seconds=30),
+            id="outbox_drain",
+            replace_existing=True,
+            kwargs={"app": app},
+        )
     scheduler.start()
-    logger.info("Reminder scheduler started — checking every 15 minutes")
+    atexit.register(release_leadership, app)
+    logger.info(
+        "Reminder scheduler started — reconciliation sweep every %d minutes",
+        app.config.get("REMINDER_SWEEP_MINUTES", 60),
+    )
+
+    if not try_acquire_leadership(app):
+        logger.info("Another process holds the scheduler lease; standing by")
+        return
 
     try:
         logger.info("Running initial reminder check on startup")
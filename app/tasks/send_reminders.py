@@ -1,14 +1,24 @@
 import logging
 import threading
 from datetime import datetime, timedelta
-import pytz
+from email.utils import make_msgid
+from types import SimpleNamespace
+from sqlalchemy import exists, tuple_
 from sqlalchemy.exc import IntegrityError
 from app.extensions import db
 from app.models.booking import Booking
 from app.models.reminder_log import ReminderLog
-from app.models.settings import Setting
+from app.models.outbound_message import OutboundMessage
+from app.services.circuit_breaker import get_breaker
+from app.services.outbox_service import (
+    CYPRUS_TZ,
+    enqueue_reminder,
+    get_channel_settings,
+    get_reminder_hours_before,
+    reminder_due_at,
+)
 from app.services.reminder_service import (
-    send_sms,
+    send_sms_with_id,
     send_email,
     build_reminder_sms,
     build_reminder_email,
@@ -16,80 +26,214 @@ from app.services.reminder_service import (
 
 logger = logging.getLogger(__name__)
 
-CYPRUS_TZ = pytz.timezone("Europe/Nicosia")
 _check_lock = threading.Lock()
 
+# Per-channel caps on in-flight sends, sized from config on first use.
+_channel_slots = {}
+_channel_slots_lock = threading.Lock()
+
+
+def init_channel_limits(app):
+    with _channel_slots_lock:
+        if not _channel_slots:
+            _channel_slots["sms"] = threading.BoundedSemaphore(app.config.get("REMINDER_SMS_CONCURRENCY", 4))
+            _channel_slots["email"] = threading.BoundedSemaphore(app.config.get("REMINDER_EMAIL_CONCURRENCY", 4))
+
 
-def _log_reminder(booking_id, rtype, success, error_msg=None):
-    log = ReminderLog(
+def channel_slot(channel):
+    return _channel_slots[channel]
+
+
+def _log_reminder(logs, booking_id, rtype, success, error_msg=None, provider_message_id=None):
+    logs.append(ReminderLog(
         booking_id=booking_id,
         type=rtype,
         status="sent" if success else "failed",
         sent_at=datetime.now(CYPRUS_TZ).replace(tzinfo=None) if success else None,
         error_message=None if success else (error_msg or f"{rtype} send failed"),
-    )
-    db.session.add(log)
-    return log
+        provider_message_id=provider_message_id if success else None,
+    ))
 
 
-def _try_sms(booking, client, service, time_str):
+def _try_sms(booking, client, service, time_str, logs):
+    if get_breaker("sms").is_open():
+        _log_reminder(logs, booking.id, "sms", False, "SMS provider unavailable (circuit open)")
+        return False
     sms_text = build_reminder_sms(client.name, service.name, time_str)
     logger.info("Sending SMS to %s for booking #%d", client.phone, booking.id)
-    success = send_sms(client.phone, sms_text)
-    _log_reminder(booking.id, "sms", success)
+    with channel_slot("sms"):
+        success, message_id = send_sms_with_id(client.phone, sms_text)
+    _log_reminder(logs, booking.id, "sms", success, provider_message_id=message_id)
     logger.info("SMS for booking #%d: %s", booking.id, "sent" if success else "FAILED")
     return success
 
 
-def _try_email(booking, client, service, time_str, date_str):
-    html = build_reminder_email(client.name, service.name, date_str, time_str)
+def _try_email(booking, client, service, time_str, date_str, logs):
+    if get_breaker("email").is_open():
+        _log_reminder(logs, booking.id, "email", False, "Email provider unavailable (circuit open)")
+        return False
+    message = build_reminder_email(client.name, service.name, date_str, time_str)
     logger.info("Sending email to %s for booking #%d", client.email, booking.id)
-    success = send_email(
-        client.email,
-        f"Reminder: Your HoPono appointment on {date_str}",
-        html,
-    )
-    _log_reminder(booking.id, "email", success)
+    message_id = make_msgid(domain="hoponomassage.com")
+    with channel_slot("email"):
+        success = send_email(client.email, message.subject, message.html, message.text, message_id=message_id)
+    _log_reminder(logs, booking.id, "email", success, provider_message_id=message_id)
     logger.info("Email for booking #%d: %s", booking.id, "sent" if success else "FAILED")
     return success
 
 
 def _attempt_reminder(booking, client, service, time_str, date_str,
-                      sms_enabled, email_enabled):
+                      sms_enabled, email_enabled, logs):
     pref = client.reminder_preference
-    can_sms = sms_enabled and bool(client.phone)
-    can_email = email_enabled and bool(client.email)
+    can_sms = sms_enabled and bool(client.phone) and not client.phone_undeliverable
+    can_email = email_enabled and bool(client.email) and not client.email_bounced
 
     if pref == "phone":
         if can_sms:
-            if _try_sms(booking, client, service, time_str):
+            if _try_sms(booking, client, service, time_str, logs):
                 return True
             logger.info("SMS failed for booking #%d, trying email fallback", booking.id)
         else:
             logger.info("SMS unavailable for booking #%d (enabled=%s, phone=%s), trying email",
                         booking.id, sms_enabled, bool(client.phone))
         if can_email:
-            return _try_email(booking, client, service, time_str, date_str)
+            return _try_email(booking, client, service, time_str, date_str, logs)
     elif pref == "email":
         if can_email:
-            if _try_email(booking, client, service, time_str, date_str):
+            if _try_email(booking, client, service, time_str, date_str, logs):
                 return True
             logger.info("Email failed for booking #%d, trying SMS fallback", booking.id)
         else:
             logger.info("Email unavailable for booking #%d (enabled=%s, email=%s), trying SMS",
                         booking.id, email_enabled, bool(client.email))
         if can_sms:
-            return _try_sms(booking, client, service, time_str)
+            return _try_sms(booking, client, service, time_str, logs)
     else:
         if can_email:
-            return _try_email(booking, client, service, time_str, date_str)
+            return _try_email(booking, client, service, time_str, date_str, logs)
         if can_sms:
-            return _try_sms(booking, client, service, time_str)
+            return _try_sms(booking, client, service, time_str, logs)
 
     logger.warning("No channel available to send reminder for booking #%d", booking.id)
     return False
 
 
+def snapshot_booking(booking):
+    """Copy what a worker thread needs out of the ORM objects, so no session crosses threads."""
+    client = booking.client
+    service = booking.service
+    return (
+        SimpleNamespace(id=booking.id),
+        SimpleNamespace(
+            name=client.name,
+            phone=client.phone,
+            email=client.email,
+            reminder_preference=client.reminder_preference,
+            email_bounced=client.email_bounced_at is not None,
+            phone_undeliverable=client.phone_undeliverable_at is not None,
+        ),
+        SimpleNamespace(name=service.name),
+        booking.start_time.strftime("%H:%M"),
+        booking.date.strftime("%B %d, %Y"),
+    )
+
+
+def dispatch_reminder(job, sms_enabled, email_enabled):
+    booking, client, service, time_str, date_str = job
+    logs = []
+    try:
+        success = _attempt_reminder(
+            booking, client, service, time_str, date_str,
+            sms_enabled, email_enabled, logs,
+        )
+    except Exception as e:
+        logger.error("Reminder dispatch for booking #%d crashed: %s", booking.id, e)
+        success = False
+    return booking.id, success, logs
+
+
+def _log_row(log):
+    return dict(
+        booking_id=log.booking_id, type=log.type, status=log.status, sent_at=log.sent_at,
+        error_message=log.error_message, attempt_count=log.attempt_count or 1,
+        next_attempt_at=log.next_attempt_at, provider_message_id=log.provider_message_id,
+    )
+
+
+def _stage_row(row, current=None):
+    """Add a log row to the session, or fold a failure into the booking's existing failed row."""
+    if current is not None:
+        for key, value in row.items():
+            setattr(current, key, value)
+    else:
+        db.session.add(ReminderLog(**row))
+
+
+def commit_reminder_logs(logs):
+    """
+    Commit a batch of ReminderLog rows.
+
+    A booking keeps a single "failed" row (unique on booking_id, status):
+    failures from one attempt are merged into it, and later attempts update
+    its error, attempt count and next attempt time. If the batch still hits
+    the unique constraint (another process logged the same booking first),
+    fall back to committing row by row so only the duplicates are dropped.
+
+    Returns the set of booking ids whose "sent" row was committed.
+    """
+    if not logs:
+        return set()
+
+    rows = []
+    failed = {}
+    for log in logs:
+        row = _log_row(log)
+        if row["status"] == "failed":
+            previous = failed.get(row["booking_id"])
+            if previous:
+                previous.update(row, error_message=f"{previous['error_message']}; {row['error_message']}")
+                continue
+            failed[row["booking_id"]] = row
+        rows.append(row)
+
+    existing = {
+        log.booking_id: log
+        for log in ReminderLog.query.filter(
+            ReminderLog.booking_id.in_(list(failed)), ReminderLog.status == "failed"
+        )
+    } if failed else {}
+
+    for row in rows:
+        _stage_row(row, existing.get(row["booking_id"]) if row["status"] == "failed" else None)
+    sent_ids = [row["booking_id"] for row in rows if row["status"] == "sent"]
+    if sent_ids:
+        # A delivered reminder has no retry pending on its earlier failure row
+        ReminderLog.query.filter(
+            ReminderLog.booking_id.in_(sent_ids), ReminderLog.status == "failed"
+        ).update({ReminderLog.next_attempt_at: None}, synchronize_session=False)
+    try:
+        db.session.commit()
+        return {row["booking_id"] for row in rows if row["status"] == "sent"}
+    except IntegrityError:
+        db.session.rollback()
+
+    committed = set()
+    for row in rows:
+        current = ReminderLog.query.filter_by(
+            booking_id=row["booking_id"], status="failed"
+        ).first() if row["status"] == "failed" else None
+        _stage_row(row, current)
+        try:
+            db.session.commit()
+            if row["status"] == "sent":
+                committed.add(row["booking_id"])
+        except IntegrityError:
+            db.session.rollback()
+            logger.info("Booking #%d %s reminder already logged (concurrent), skipping",
+                        row["booking_id"], row["status"])
+    return committed
+
+
 def check_and_send_reminders(app):
     if not _check_lock.acquire(blocking=False):
         logger.info("Reminder check already in progress, skipping")
@@ -99,98 +243,77 @@ def check_and_send_reminders(app):
     finally:
         _check_lock.release()
 
+    if app.config.get("OUTBOX_EMBEDDED_WORKER", True):
+        from app.tasks.outbox_worker import drain_outbox
+        drain_outbox(app)
 
-def _do_check_and_send(app):
-    with app.app_context():
-        setting = db.session.get(Setting, "reminder_hours_before")
-        hours_before = int(setting.value) if setting else 24
 
-        sms_setting = db.session.get(Setting, "sms_enabled")
-        sms_enabled = sms_setting.value.lower() == "true" if sms_setting else True
+def find_reminder_candidates(window_start, window_end):
+    """
+    Return (booking_id, client_id, date, start_time) for confirmed bookings starting in
+    (window_start, window_end] that have neither a sent reminder nor a
+    queued one. Everything is filtered in one query.
+    """
+    already_sent = exists().where(
+        ReminderLog.booking_id == Booking.id,
+        ReminderLog.status == "sent",
+    )
+    already_queued = exists().where(
+        OutboundMessage.booking_id == Booking.id,
+        OutboundMessage.kind == "reminder",
+    )
+    starts_at = tuple_(Booking.date, Booking.start_time)
+    return (
+        db.session.query(Booking.id, Booking.client_id, Booking.date, Booking.start_time)
+        .filter(
+            Booking.status == "confirmed",
+            Booking.date.between(window_start.date(), window_end.date()),
+            starts_at > tuple_(window_start.date(), window_start.time()),
+            starts_at <= tuple_(window_end.date(), window_end.time()),
+            ~already_sent,
+            ~already_queued,
+        )
+        .order_by(Booking.date, Booking.start_time)
+        .all()
+    )
 
-        email_setting = db.session.get(Setting, "email_enabled")
-        email_enabled = email_setting.value.lower() == "true" if email_setting else True
+
+def _do_check_and_send(app):
+    """
+    Reconciliation sweep: queue reminders for any upcoming booking that does
+    not have one yet (bookings created before exact-time scheduling, or a
+    hook that failed). Each is queued for its exact due time; a worker sends it.
+    """
+    with app.app_context():
+        hours_before = get_reminder_hours_before()
 
         now_cyprus = datetime.now(CYPRUS_TZ).replace(tzinfo=None)
         target = now_cyprus + timedelta(hours=hours_before)
+        window_end = target + timedelta(hours=12)
 
         logger.info(
-            "Reminder check running. Cyprus time: %s, target window end: %s, sms_enabled=%s, email_enabled=%s",
+            "Reminder sweep running. Cyprus time: %s, target window end: %s",
             now_cyprus.strftime("%Y-%m-%d %H:%M:%S"),
             target.strftime("%Y-%m-%d %H:%M:%S"),
-            sms_enabled,
-            email_enabled,
         )
 
-        window_end = target + timedelta(hours=12)
-        date_cursor = now_cyprus.date()
-        dates_to_check = set()
-        while date_cursor <= window_end.date():
-            dates_to_check.add(date_cursor)
-            date_cursor += timedelta(days=1)
-
-        bookings = (
-            Booking.query.filter(
-                Booking.status == "confirmed",
-                Booking.date.in_(list(dates_to_check)),
-            )
-            .all()
-        )
+        candidates = find_reminder_candidates(now_cyprus.replace(microsecond=0), window_end.replace(microsecond=0))
+        now = datetime.utcnow()
+        for booking_id, client_id, booking_date, start_time in candidates:
+            send_at = max(reminder_due_at(booking_date, start_time, hours_before), now)
+            enqueue_reminder(booking_id, client_id, send_at=send_at)
+
+        queued = len(candidates)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            logger.info("Reminders were queued concurrently by another process, skipping this run")
+            queued = 0
 
         logger.info(
-            "Found %d confirmed bookings on %s",
-            len(bookings),
-            ", ".join(d.isoformat() for d in sorted(dates_to_check)),
+            "Reminder sweep completed. Window %s to %s, queued %d missing reminders.",
+            now_cyprus.strftime("%Y-%m-%d %H:%M"),
+            window_end.strftime("%Y-%m-%d %H:%M"),
+            queued,
         )
-
-        sent_count = 0
-        for booking in bookings:
-            booking_dt = datetime.combine(booking.date, booking.start_time)
-
-            if not (now_cyprus < booking_dt <= window_end):
-                logger.debug(
-                    "Booking #%d at %s outside reminder window (%s to %s), skipping",
-                    booking.id,
-                    booking_dt.strftime("%Y-%m-%d %H:%M"),
-                    now_cyprus.strftime("%Y-%m-%d %H:%M"),
-                    window_end.strftime("%Y-%m-%d %H:%M"),
-                )
-                continue
-
-            existing = ReminderLog.query.filter(
-                ReminderLog.booking_id == booking.id,
-                ReminderLog.status == "sent",
-            ).first()
-            if existing:
-                logger.debug("Booking #%d already has a sent reminder, skipping", booking.id)
-                continue
-
-            client = booking.client
-            service = booking.service
-            time_str = booking.start_time.strftime("%H:%M")
-            date_str = booking.date.strftime("%B %d, %Y")
-
-            logger.info(
-                "Processing reminder for booking #%d: %s, %s at %s, preference=%s",
-                booking.id,
-                client.name,
-                service.name,
-                time_str,
-                client.reminder_preference,
-            )
-
-            success = _attempt_reminder(
-                booking, client, service, time_str, date_str,
-                sms_enabled, email_enabled,
-            )
-            if success:
-                try:
-                    db.session.commit()
-                    sent_count += 1
-                except IntegrityError:
-                    db.session.rollback()
-                    logger.info("Booking #%d reminder already sent (concurrent), skipping", booking.id)
-            else:
-                db.session.commit()
-
-        logger.info("Reminder check completed. Processed %d bookings, sent %d reminders.", len(bookings), sent_count)
@@ -0,0 +1,45 @@
+"""add phone_normalized to clients
+
+Revision ID: cda6f3328fd8
+Revises: b239180cceed
+Create Date: 2026-10-19 10:02:17.554120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = 'cda6f3328fd8'
+down_revision = 'b239180cceed'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return None
+    return f"+{digits}" if (phone or "").strip().startswith("+") else digits
+
+
+def upgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_normalized', sa.String(length=30), nullable=True))
+        batch_op.create_index('ix_clients_phone_normalized', ['phone_normalized'], unique=False)
+
+    # Backfill existing rows
+    conn = op.get_bind()
+    clients = conn.execute(sa.text("SELECT id, phone FROM clients")).fetchall()
+    for row in clients:
+        conn.execute(
+            sa.text("UPDATE clients SET phone_normalized = :phone WHERE id = :id"),
+            {"phone": _normalize(row[1]), "id": row[0]},
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_phone_normalized')
+        batch_op.drop_column('phone_normalized')
@@ -155,6 +155,9 @@ def seed():
             "buffer_minutes": "30",
             "sms_enabled": "true",
             "email_enabled": "true",
+            "booking_notifications_enabled": "true",
+            "retention_years": "0",
+            "archive_after_months": "0",
         }
         for key, value in defaults.items():
             if not db.session.get(Setting, key):
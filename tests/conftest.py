@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production")
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app(
+        "testing",
+        overrides={"SQLALCHEMY_ENGINE_OPTIONS": {}, "OUTBOX_EMBEDDED_WORKER": False},
+        start_scheduler=False,
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
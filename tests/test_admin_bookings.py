@@ -0,0 +1,53 @@
+from datetime import date, time, timedelta
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import AdminUser, Booking, Client, OutboundMessage, Service
+
+
+@pytest.fixture
+def admin(app):
+    app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False)
+    db.session.add(AdminUser(username="admin", password_hash=generate_password_hash("pw")))
+    db.session.commit()
+    client = app.test_client()
+    client.post("/admin/login", data={"username": "admin", "password": "pw"})
+    return client
+
+
+def _booking(day, status):
+    service = Service(name="Balinese", duration_minutes=60, price_eur=50)
+    client = Client(name="Ann", email="ann@example.com", phone="+35799123456", gdpr_consent=True)
+    db.session.add_all([service, client])
+    db.session.flush()
+    booking = Booking(
+        client_id=client.id, service_id=service.id, date=day,
+        start_time=time(10), end_time=time(11), buffer_before=time(9, 30), buffer_after=time(11, 30),
+        status=status,
+    )
+    db.session.add(booking)
+    db.session.commit()
+    return booking.id
+
+
+def _queued(booking_id):
+    return sorted(m.kind for m in OutboundMessage.query.filter_by(booking_id=booking_id, status="pending"))
+
+
+def test_completed_back_to_confirmed_sends_nothing(app, admin):
+    booking_id = _booking(date.today() - timedelta(days=3), "completed")
+
+    admin.post(f"/admin/bookings/{booking_id}/status", data={"status": "confirmed"})
+
+    assert db.session.get(Booking, booking_id).status == "confirmed"
+    assert _queued(booking_id) == []
+
+
+def test_reconfirming_upcoming_cancelled_booking_notifies(app, admin):
+    booking_id = _booking(date.today() + timedelta(days=3), "cancelled")
+
+    admin.post(f"/admin/bookings/{booking_id}/status", data={"status": "confirmed"})
+
+    assert _queued(booking_id) == ["confirmation", "reminder"]
@@ -0,0 +1,29 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.client import Client
+from app.models.service import Service
+from app.services.booking_service import close_day
+
+
+def test_close_day_rejects_past_days(app):
+    service = Service(name="Balinese", duration_minutes=60, price_eur=50)
+    client = Client(name="Ann", email="ann@example.com", phone="+35799123456", gdpr_consent=True)
+    db.session.add_all([service, client])
+    db.session.flush()
+    yesterday = date.today() - timedelta(days=1)
+    booking = Booking(
+        client_id=client.id, service_id=service.id, date=yesterday,
+        start_time=time(10), end_time=time(11), buffer_before=time(9, 30), buffer_after=time(11, 30),
+        status="confirmed",
+    )
+    db.session.add(booking)
+    db.session.commit()
+
+    with pytest.raises(ValueError, match="Past days"):
+        close_day(yesterday, rebook_url="https://example.com/book/")
+
+    assert db.session.get(Booking, booking.id).status == "confirmed"
@@ -0,0 +1,38 @@
+from app.extensions import db
+from app.models.campaign import Campaign
+from app.models.client import Client
+from app.models.outbound_message import OutboundMessage
+from app.services import campaign_service
+
+
+def _consenting_clients(count):
+    for i in range(count):
+        db.session.add(Client(
+            name=f"Client {i}", email=f"c{i}@example.com", phone=f"+3579900{i:04d}",
+            phone_normalized=f"+3579900{i:04d}", gdpr_consent=True, marketing_consent=True,
+        ))
+    db.session.commit()
+
+
+def test_pause_stops_fan_out_between_chunks(app, monkeypatch):
+    _consenting_clients(5)
+    campaign = Campaign(name="Autumn", channel="sms", body="Offer", status="running")
+    db.session.add(campaign)
+    db.session.commit()
+
+    fan_out_chunk = campaign_service.fan_out_chunk
+
+    def fan_out_then_pause(campaign, chunk_size):
+        queued = fan_out_chunk(campaign, chunk_size)
+        # An admin pauses the campaign from another session
+        Campaign.query.filter_by(id=campaign.id).update({Campaign.status: "paused"})
+        db.session.commit()
+        return queued
+
+    monkeypatch.setattr(campaign_service, "fan_out_chunk", fan_out_then_pause)
+    campaign_service.advance_campaigns(chunk_size=2)
+
+    campaign = db.session.get(Campaign, campaign.id)
+    assert campaign.status == "paused"
+    assert not campaign.fanout_done
+    assert OutboundMessage.query.filter_by(campaign_id=campaign.id).count() == 2
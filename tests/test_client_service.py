@@ -0,0 +1,25 @@
+from app.extensions import db
+from app.models.client import Client
+from app.services.client_service import merge_clients
+
+
+def _client(email, marketing_consent):
+    client = Client(
+        name="Ann", email=email, phone="+357 99 123 456", phone_normalized="+35799123456",
+        gdpr_consent=True, marketing_consent=marketing_consent,
+    )
+    db.session.add(client)
+    db.session.commit()
+    return client.id
+
+
+def test_merge_does_not_resubscribe_target(app):
+    target_id = _client("ann@example.com", marketing_consent=False)
+    source_id = _client("ann.old@example.com", marketing_consent=True)
+
+    assert merge_clients(target_id, [source_id]) == 1
+
+    target = db.session.get(Client, target_id)
+    assert target.marketing_consent is False
+    assert target.marketing_consented_at is None
+    assert db.session.get(Client, source_id) is None
@@ -0,0 +1,37 @@
+from app.extensions import db
+from app.models.client import Client
+from app.services.delivery_service import fold_delivery_events, record_sms_reports
+
+
+def _client(phone, phone_normalized, email="ann@example.com"):
+    client = Client(name="Ann", email=email, phone=phone, phone_normalized=phone_normalized, gdpr_consent=True)
+    db.session.add(client)
+    db.session.commit()
+    return client
+
+
+def test_sms_failure_without_plus_flags_client(app):
+    client = _client("+357 99 123 456", "+35799123456")
+
+    record_sms_reports({"messageId": "m1", "status": "REJECTED", "phone": "35799123456"})
+    fold_delivery_events()
+
+    assert db.session.get(Client, client.id).phone_undeliverable_at is not None
+
+
+def test_sms_failure_with_plus_flags_client_stored_without_plus(app):
+    client = _client("35799123456", "35799123456")
+
+    record_sms_reports({"messageId": "m1", "status": "UNDELIVERED", "phone": "+357 99 123 456"})
+    fold_delivery_events()
+
+    assert db.session.get(Client, client.id).phone_undeliverable_at is not None
+
+
+def test_delivered_sms_does_not_flag_client(app):
+    client = _client("+357 99 123 456", "+35799123456")
+
+    record_sms_reports({"messageId": "m1", "status": "DELIVERED", "phone": "35799123456"})
+    fold_delivery_events()
+
+    assert db.session.get(Client, client.id).phone_undeliverable_at is None
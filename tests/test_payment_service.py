@@ -0,0 +1,52 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.booking import Booking
+from app.models.client import Client
+from app.models.payment import Payment
+from app.models.service import Service
+from app.services.payment_service import record_bulk_payments
+
+
+def _completed_booking():
+    service = Service(name="Balinese", duration_minutes=60, price_eur=50)
+    client = Client(name="Ann", email="ann@example.com", phone="+35799123456", gdpr_consent=True)
+    db.session.add_all([service, client])
+    db.session.flush()
+    booking = Booking(
+        client_id=client.id, service_id=service.id, date=date(2026, 1, 5),
+        start_time=time(10), end_time=time(11), buffer_before=time(9, 30), buffer_after=time(11, 30),
+        status="completed",
+    )
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def test_bulk_payment_records_once(app):
+    booking = _completed_booking()
+
+    assert record_bulk_payments([booking.id], "cash") == 1
+    assert record_bulk_payments([booking.id], "cash") == 0
+    assert Payment.query.count() == 1
+
+
+def test_bulk_payment_raced_by_another_payment(app, monkeypatch):
+    booking = _completed_booking()
+
+    # Another request commits a payment for the booking between our SELECT and
+    # INSERT; the unique booking_id index rejects the insert.
+    def execute(statement, *args, **kwargs):
+        raise IntegrityError(str(statement), {}, Exception("UNIQUE constraint failed: payments.booking_id"))
+
+    monkeypatch.setattr(db.session, "execute", execute)
+    with pytest.raises(ValueError, match="just recorded elsewhere"):
+        record_bulk_payments([booking.id], "revolut")
+    monkeypatch.undo()
+
+    # The session was rolled back and is usable again
+    assert Payment.query.count() == 0
+    assert record_bulk_payments([booking.id], "revolut") == 1